@@ -1,11 +1,24 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
+class DocumentDigest(BaseModel):
+    """Model for the compact description of a document computed at extraction time."""
+    title: Optional[str] = None
+    outline: List[str] = Field(default_factory=list, description="Heading, chapter, sheet or slide titles in reading order.")
+    key_terms: List[str] = Field(default_factory=list, description="Most frequent content words.")
+    chars: int = 0
+    words: int = 0
+    estimated_tokens: int = 0
+    language: Optional[str] = Field(None, description="Guessed ISO 639-1 code.")
+    units: Dict[str, int] = Field(default_factory=dict, description="Number of pages, slides, sheets, ... by kind.")
+
 class DocumentInput(BaseModel):
     """Model for a single input document."""
     name: str
     content: str # Processed text content
     size: int # Size in bytes
+    digest: Optional[DocumentDigest] = None # As returned by /process_file; computed from content when missing
+    spans: Optional[Dict[str, List[Any]]] = None # As returned by /process_file; pages locate headers and footers
 
 class ProcessQueryRequest(BaseModel):
     """Model for the /process_query endpoint request."""
@@ -38,6 +51,14 @@ class VerificationSynthesisResult(BaseModel):
     raw_response: str
     error: Optional[str] = None
 
+class DeduplicationReport(BaseModel):
+    """Model for what near-duplicate elimination removed from the documents before prompting."""
+    removed_chars: int = 0
+    removed_tokens: int = 0
+    removed_paragraphs: int = Field(0, description="Paragraphs repeating an earlier one, exactly or nearly.")
+    removed_furniture_lines: int = Field(0, description="Page header and footer lines repeated across pages.")
+    duplicate_documents: int = Field(0, description="Documents made only of paragraphs seen in earlier documents.")
+
 class ProcessQueryResponse(BaseModel):
     """Model for the /process_query endpoint response."""
     query: str
@@ -45,17 +66,128 @@ class ProcessQueryResponse(BaseModel):
     analysis: AnalysisResult
     perspectives: List[PerspectiveResult]
     verification_synthesis: VerificationSynthesisResult
+    deduplication: Optional[DeduplicationReport] = None
     # Could add a field for document metadata if needed
 
 class FileProcessingRequest(BaseModel):
     """Model for the /process_file endpoint request."""
     filename: str
     file_data_base64: str
+    tabular_mode: str = Field("rows", description="'rows' to extract spreadsheet/CSV cells as text, 'summary' for a compact statistical profile.")
+    html_parser: Optional[str] = Field(None, description="HTML/EPUB engine: 'lxml' (fast, strips boilerplate) or 'html5lib' (browser-grade parsing, slower). Defaults to the profile's engine.")
+    archive_mode: str = Field("list", description="ZIP/RAR handling: 'list' member names only (default), or 'extract' the text of supported members.")
+    profile: Optional[str] = Field(None, description="Extraction profile: 'fast' (no OCR, first 50 PDF pages, compact text), 'balanced' or 'thorough' (html5lib, deskewed OCR). Defaults to 'balanced' for inline /process_file requests and 'thorough' for mode='job' and /process_files.")
+    mode: str = Field("sync", description="'sync' returns the extracted text, 'job' returns a job id at once (poll /jobs/{job_id} or stream /jobs/{job_id}/events).")
 
 class FileProcessingResponse(BaseModel):
     """Model for the /process_file endpoint response."""
     content: str
     error: Optional[str] = None
+    tables: Optional[List[str]] = Field(None, description="Ids of tables kept server-side (summary mode only).")
+    spans: Optional[Dict[str, List[Any]]] = Field(None, description="Document units (pages, slides, sheets, chapters, headings) as columns: 'units' names, per-span 'unit' code, 'index', 'start'/'end' character offsets into content and 'title'.")
+    digest: Optional[DocumentDigest] = Field(None, description="Title, outline, key terms, size and language of the document; pass it back with the document to /process_query.")
+
+class ExtractionJobResult(BaseModel):
+    """Model for the result of a finished extraction job."""
+    content: str
+    tables: Optional[List[str]] = None
+    spans: Optional[Dict[str, List[Any]]] = None
+    digest: Optional[DocumentDigest] = None
+
+class ExtractionJobStatus(BaseModel):
+    """Model for the /jobs/{job_id} endpoint response."""
+    job_id: str
+    filename: str
+    status: str = Field(..., description="One of queued, running, done, failed.")
+    stage: Optional[str] = Field(None, description="Current stage while running: text_layer, ocr or postprocess.")
+    pages_done: int = 0
+    pages_total: Optional[int] = None
+    partial_text: Optional[str] = Field(None, description="Text extracted so far (capped) while the job runs.")
+    result: Optional[ExtractionJobResult] = None
+    error: Optional[str] = None
+
+class FileEstimateRequest(BaseModel):
+    """Model for the /estimate_file endpoint request."""
+    filename: str
+    file_data_base64: str
+    profile: Optional[str] = Field(None, description="Extraction profile to estimate for ('fast' skips OCR). Defaults to the /process_file default.")
+
+class FileCostEstimate(BaseModel):
+    """Model for the /estimate_file endpoint response."""
+    filename: str
+    mime_type: str
+    family: str = Field(..., description="File family whose timing model was used.")
+    unit: str = Field(..., description="What units counts: page, megapixel, row, slide, kilobyte or member.")
+    units: float
+    ocr_units: float = Field(..., description="Units expected to need OCR.")
+    details: Dict[str, Any] = Field(default_factory=dict, description="Format-specific facts read from the file header.")
+    needs_ocr: bool
+    estimated_seconds: float
+    estimated_seconds_without_ocr: float
+    estimated_chars: int
+    estimated_tokens: int
+    lane: str = Field(..., description="'interactive' or 'background' (use mode='job').")
+    calibrated: bool = Field(..., description="Whether the timing model was fitted on recorded extraction timings.")
+
+class UploadInitRequest(BaseModel):
+    """Model for the /uploads endpoint request."""
+    filename: str
+    size: int = Field(..., gt=0, description="Total size of the file in bytes.")
+
+class UploadStatus(BaseModel):
+    """State of a chunked upload."""
+    upload_id: str
+    filename: str
+    size: int
+    received: int = Field(..., description="Bytes stored so far: the offset of the next chunk.")
+    complete: bool
+    mime_type: Optional[str] = Field(None, description="Type sniffed from the first chunk.")
+    sha256: Optional[str] = Field(None, description="Verified hash, set once the upload is finalized.")
+    max_chunk_bytes: int = Field(..., description="Largest chunk accepted per request.")
+
+class UploadFinalizeRequest(BaseModel):
+    """Model for the /uploads/{upload_id}/finalize endpoint request."""
+    sha256: str = Field(..., description="Hex SHA-256 of the whole file, checked against the received bytes.")
+    tabular_mode: str = Field("rows", description="As for /process_file.")
+    html_parser: Optional[str] = Field(None, description="As for /process_file.")
+    archive_mode: str = Field("list", description="As for /process_file.")
+    profile: Optional[str] = Field(None, description="As for /process_file; defaults to 'thorough'.")
+
+class FileBatchRequest(BaseModel):
+    """Model for the /process_files endpoint request."""
+    files: List[FileProcessingRequest] = Field(..., description="Files to process, each with its own options.")
+
+class FileBatchResult(BaseModel):
+    """Model for one line of the /process_files NDJSON response."""
+    index: int = Field(..., description="Position of the file in the request.")
+    filename: str
+    content: Optional[str] = None
+    mime_type: Optional[str] = None
+    tables: Optional[List[str]] = None
+    spans: Optional[Dict[str, List[Any]]] = None
+    digest: Optional[DocumentDigest] = None
+    truncated: bool = False
+    error: Optional[str] = None
+
+class TableFilter(BaseModel):
+    """Model for a single condition of a table query."""
+    column: str
+    op: str = Field("==", description="One of ==, !=, <, <=, >, >=, contains.")
+    value: Any
+
+class TableQueryRequest(BaseModel):
+    """Model for the /tables/{table_id}/query endpoint request."""
+    columns: Optional[List[str]] = Field(None, description="Columns to return (all when omitted).")
+    filters: List[TableFilter] = Field(default_factory=list, description="Conditions combined with AND.")
+    offset: int = Field(0, ge=0)
+    limit: int = Field(100, ge=1, le=1000)
+
+class TableQueryResponse(BaseModel):
+    """Model for the /tables/{table_id}/query endpoint response."""
+    table_id: str
+    columns: List[str]
+    total_matches: int
+    rows: List[List[Any]]
 
 class ErrorResponse(BaseModel):
     """Model for an error response."""
@@ -1,15 +1,25 @@
-from fastapi import APIRouter, HTTPException, Body, status
+from fastapi import APIRouter, HTTPException, Body, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import json
+import asyncio
 import logging
 
 from ..models import schemas
-from ..utils import file_processor
-from ..models.file_models import FileProcessingRequest, FileProcessingResponse
+from ..utils import batch_processing, chunked_uploads, extraction_jobs, file_processor, tabular_profile
+from ..utils.extraction_profiles import INTERACTIVE_EXTRACTION_PROFILE
+from ..utils.extraction_sandbox import ExtractionLimitExceeded
+from ..utils.malware_scan import MalwareScanError
 from ..utils.logger import get_logger
 
 # Logger configuration
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Constants (could be moved to config)
+JOB_EVENTS_POLL_SECONDS = 0.25 # How often the SSE stream checks the job for changes
+JOB_EVENTS_KEEPALIVE_SECONDS = 15 # Comment line sent on idle streams to keep proxies from closing them
+
 router = APIRouter(
     tags=["File Processing"], # Tag for Swagger documentation
 )
@@ -20,11 +30,14 @@ router = APIRouter(
     summary="Processes a single uploaded file",
     description="Accepts a filename and its base64 encoded content, extracts text (TXT, PDF, MD) or performs OCR (images).",
     responses={
-        400: {"model": schemas.ErrorResponse, "description": "Input data error or unsupported file type"},
-        500: {"model": schemas.ErrorResponse, "description": "Internal server error during file processing"}
+        202: {"model": schemas.ExtractionJobStatus, "description": "Job started (mode='job')"},
+        400: {"model": schemas.ErrorResponse, "description": "Input data error, unsupported file type or malware detected"},
+        422: {"model": schemas.ErrorResponse, "description": "Extraction exceeded its memory, CPU time or wall-clock limit"},
+        500: {"model": schemas.ErrorResponse, "description": "Internal server error during file processing"},
+        503: {"model": schemas.ErrorResponse, "description": "Malware scanning is enabled but clamd gave no verdict"}
     }
 )
-async def process_single_file(file_data: FileProcessingRequest) -> FileProcessingResponse:
+async def process_single_file(file_data: schemas.FileProcessingRequest) -> schemas.FileProcessingResponse:
     """
     Process a single uploaded file.
     
@@ -32,26 +45,56 @@ async def process_single_file(file_data: FileProcessingRequest) -> FileProcessin
         file_data (FileProcessingRequest): Request containing filename and base64 encoded content
         
     Returns:
-        FileProcessingResponse: Response containing processing results
+        FileProcessingResponse: Response containing the extracted text, or the job
+            status (202) in mode 'job'
         
     Raises:
         HTTPException: If file processing fails
     """
+    if file_data.mode not in ("sync", "job"):
+        raise HTTPException(status_code=400, detail=f"Unsupported mode: {file_data.mode}")
+    if file_data.mode == "job":
+        try:
+            job = extraction_jobs.start_extraction_job(
+                file_data.file_data_base64,
+                file_data.filename,
+                tabular_mode=file_data.tabular_mode,
+                html_parser=file_data.html_parser,
+                archive_mode=file_data.archive_mode,
+                profile=file_data.profile
+            )
+        except ValueError as ve:
+            logger.error(f"Rejected extraction job for {file_data.filename}: {str(ve)}")
+            raise HTTPException(status_code=400, detail=str(ve))
+        return JSONResponse(status_code=202, content=job.snapshot())
+
     try:
-        # First validate and scan the file
-        is_valid, mime_type, error_message = validate_file_type_and_scan(file_data.content)
-        if not is_valid:
-            raise ValueError(error_message)
-            
-        # Process the file if validation passes
-        result = process_uploaded_file_data(file_data.filename, file_data.content)
-        return FileProcessingResponse(
-            success=True,
-            filename=file_data.filename,
-            mime_type=mime_type,
-            processed_content=result
+        # Validation (MIME type) happens inside process_uploaded_file_data, run in a
+        # resource-limited subprocess; waiting for it happens off the event loop
+        result = await run_in_threadpool(
+            file_processor.process_uploaded_file_sandboxed,
+            file_data.file_data_base64,
+            file_data.filename,
+            tabular_mode=file_data.tabular_mode,
+            html_parser=file_data.html_parser,
+            archive_mode=file_data.archive_mode,
+            profile=file_data.profile or INTERACTIVE_EXTRACTION_PROFILE
+        )
+        return schemas.FileProcessingResponse(
+            content=result["text"],
+            tables=result.get("tables"),
+            spans=result.get("spans"),
+            digest=result.get("digest")
         )
         
+    except ExtractionLimitExceeded as le:
+        logger.error(f"Extraction of {file_data.filename} stopped: {str(le)}")
+        raise HTTPException(status_code=422, detail=str(le))
+
+    except MalwareScanError as se:
+        logger.error(f"Could not scan {file_data.filename}: {str(se)}")
+        raise HTTPException(status_code=503, detail=str(se))
+
     except ValueError as ve:
         logger.error(f"Validation error processing file {file_data.filename}: {str(ve)}")
         raise HTTPException(status_code=400, detail=str(ve))
@@ -63,3 +106,254 @@ async def process_single_file(file_data: FileProcessingRequest) -> FileProcessin
     except Exception as e:
         logger.error(f"Unexpected error processing file {file_data.filename}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post(
+    "/process_files",
+    summary="Processes many uploaded files in one request",
+    description=(
+        "Accepts a list of files (as for /process_file) and processes them concurrently. "
+        "Streams one JSON object per line (application/x-ndjson) as each file finishes, "
+        "in completion order; 'index' is the file's position in the request."
+    ),
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "One FileBatchResult per line"},
+        400: {"model": schemas.ErrorResponse, "description": "Empty batch, too many files or batch too large"}
+    }
+)
+async def process_files(batch: schemas.FileBatchRequest) -> StreamingResponse:
+    """
+    Process a batch of uploaded files, streaming per-file results.
+
+    Per-file failures (unsupported type, size or resource limits) are reported in the
+    file's own line and do not affect the other files.
+    """
+    try:
+        batch_processing.check_batch_size(batch.files)
+    except ValueError as ve:
+        logger.error(f"Rejected file batch: {str(ve)}")
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    async def ndjson_lines():
+        async for result in batch_processing.iter_batch_results(batch.files):
+            line = schemas.FileBatchResult(**result).model_dump(exclude_none=True)
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@router.post(
+    "/estimate_file",
+    response_model=schemas.FileCostEstimate,
+    summary="Predicts the cost of processing a file",
+    description=(
+        "Reads only the structure of the upload (page count and text layers, image size, sheet "
+        "dimensions, archive members) and predicts extraction time, OCR need and token count."
+    ),
+    responses={400: {"model": schemas.ErrorResponse, "description": "Input data error or unsupported file type"}}
+)
+async def estimate_file(file_data: schemas.FileEstimateRequest) -> schemas.FileCostEstimate:
+    """Pre-flight estimate for /process_file, e.g. to warn the user or pick mode='job'."""
+    try:
+        result = await run_in_threadpool(
+            file_processor.estimate_upload_cost,
+            file_data.file_data_base64,
+            file_data.filename,
+            profile=file_data.profile or INTERACTIVE_EXTRACTION_PROFILE
+        )
+        return schemas.FileCostEstimate(**result)
+    except ValueError as ve:
+        logger.error(f"Cannot estimate {file_data.filename}: {str(ve)}")
+        raise HTTPException(status_code=400, detail=str(ve))
+
+def _upload_status(state: chunked_uploads.UploadState) -> schemas.UploadStatus:
+    return schemas.UploadStatus(**state.to_dict(), max_chunk_bytes=chunked_uploads.UPLOAD_CHUNK_MAX_MB * 1024 * 1024)
+
+def _get_upload(upload_id: str) -> chunked_uploads.UploadState:
+    state = chunked_uploads.upload_store.get(upload_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired upload: {upload_id}")
+    return state
+
+@router.post(
+    "/uploads",
+    response_model=schemas.UploadStatus,
+    status_code=201,
+    summary="Starts a resumable chunked upload",
+    description=(
+        "For files too large for /process_file. Send the bytes with PUT /uploads/{upload_id}?offset=N "
+        "in order, then POST /uploads/{upload_id}/finalize with the SHA-256 to start extraction. "
+        "After a dropped connection, GET /uploads/{upload_id} and resume at 'received'."
+    ),
+    responses={400: {"model": schemas.ErrorResponse, "description": "Invalid or too large size"}}
+)
+async def create_upload(upload: schemas.UploadInitRequest) -> schemas.UploadStatus:
+    try:
+        state = await run_in_threadpool(chunked_uploads.upload_store.create, upload.filename, upload.size)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return _upload_status(state)
+
+@router.get(
+    "/uploads/{upload_id}",
+    response_model=schemas.UploadStatus,
+    summary="Reports how much of a chunked upload was received",
+    responses={404: {"model": schemas.ErrorResponse, "description": "Unknown or expired upload"}}
+)
+async def get_upload(upload_id: str) -> schemas.UploadStatus:
+    return _upload_status(_get_upload(upload_id))
+
+@router.put(
+    "/uploads/{upload_id}",
+    response_model=schemas.UploadStatus,
+    summary="Stores one chunk of a chunked upload",
+    description="The request body is the raw chunk (application/octet-stream); offset must equal the bytes received so far.",
+    responses={
+        400: {"model": schemas.ErrorResponse, "description": "Chunk overruns the size, upload finalized or unsupported file type"},
+        404: {"model": schemas.ErrorResponse, "description": "Unknown or expired upload"},
+        409: {"model": schemas.ErrorResponse, "description": "Wrong offset; the Upload-Offset header holds the expected one"},
+        413: {"model": schemas.ErrorResponse, "description": "Chunk larger than max_chunk_bytes"}
+    }
+)
+async def put_upload_chunk(upload_id: str, offset: int, request: Request) -> schemas.UploadStatus:
+    _get_upload(upload_id)
+    limit = chunked_uploads.UPLOAD_CHUNK_MAX_MB * 1024 * 1024
+    chunk = bytearray()
+    async for piece in request.stream():
+        chunk += piece
+        if len(chunk) > limit:
+            raise HTTPException(status_code=413, detail=f"Chunk too large (limit {chunked_uploads.UPLOAD_CHUNK_MAX_MB} MB).")
+    try:
+        state = await run_in_threadpool(chunked_uploads.upload_store.write_chunk, upload_id, offset, bytes(chunk))
+    except chunked_uploads.UploadOffsetMismatch as me:
+        raise HTTPException(status_code=409, detail=str(me), headers={"Upload-Offset": str(me.expected)})
+    except ValueError as ve:
+        logger.error(f"Rejected chunk of upload {upload_id}: {str(ve)}")
+        raise HTTPException(status_code=400, detail=str(ve))
+    return _upload_status(state)
+
+@router.post(
+    "/uploads/{upload_id}/finalize",
+    status_code=202,
+    response_model=schemas.ExtractionJobStatus,
+    summary="Verifies a chunked upload and starts its extraction job",
+    description="Returns the extraction job; poll /jobs/{job_id} or stream /jobs/{job_id}/events.",
+    responses={
+        400: {"model": schemas.ErrorResponse, "description": "Upload incomplete, hash mismatch or unsupported option"},
+        404: {"model": schemas.ErrorResponse, "description": "Unknown or expired upload"}
+    }
+)
+async def finalize_upload(upload_id: str, finalize: schemas.UploadFinalizeRequest) -> JSONResponse:
+    _get_upload(upload_id)
+    try:
+        # Options are checked before the upload is finalized, so a rejected request can be retried
+        file_processor.resolve_extraction_options(
+            finalize.tabular_mode,
+            html_parser=finalize.html_parser,
+            archive_mode=finalize.archive_mode,
+            profile=finalize.profile
+        )
+        state = await run_in_threadpool(chunked_uploads.upload_store.finalize, upload_id, finalize.sha256)
+    except ValueError as ve:
+        logger.error(f"Cannot finalize upload {upload_id}: {str(ve)}")
+        raise HTTPException(status_code=400, detail=str(ve))
+    job = extraction_jobs.start_stored_file_job(
+        chunked_uploads.upload_store.data_path(upload_id),
+        state.filename,
+        tabular_mode=finalize.tabular_mode,
+        html_parser=finalize.html_parser,
+        archive_mode=finalize.archive_mode,
+        profile=finalize.profile,
+        max_pdf_size_mb=chunked_uploads.UPLOAD_MAX_MB
+    )
+    return JSONResponse(status_code=202, content=job.snapshot())
+
+@router.delete(
+    "/uploads/{upload_id}",
+    status_code=204,
+    summary="Deletes a chunked upload",
+    responses={404: {"model": schemas.ErrorResponse, "description": "Unknown or expired upload"}}
+)
+async def delete_upload(upload_id: str) -> Response:
+    _get_upload(upload_id)
+    await run_in_threadpool(chunked_uploads.upload_store.delete, upload_id)
+    return Response(status_code=204)
+
+def _get_job(job_id: str) -> extraction_jobs.ExtractionJob:
+    job = extraction_jobs.job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return job
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=schemas.ExtractionJobStatus,
+    summary="Reports the progress or result of an extraction job",
+    responses={404: {"model": schemas.ErrorResponse, "description": "Unknown or expired job"}}
+)
+async def get_job(job_id: str) -> schemas.ExtractionJobStatus:
+    """Polling endpoint for jobs started by /process_file with mode='job'."""
+    return schemas.ExtractionJobStatus(**_get_job(job_id).snapshot())
+
+@router.get(
+    "/jobs/{job_id}/events",
+    summary="Streams the progress of an extraction job as server-sent events",
+    description=(
+        "Sends 'progress' events (status, stage, pages_done, pages_total and the text extracted "
+        "since the previous event) and ends with a 'done' or 'failed' event carrying the full job status."
+    ),
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        404: {"model": schemas.ErrorResponse, "description": "Unknown or expired job"}
+    }
+)
+async def stream_job_events(job_id: str) -> StreamingResponse:
+    """Server-sent events for jobs started by /process_file with mode='job'."""
+    job = _get_job(job_id)
+
+    async def events():
+        version = -1
+        chunk_index = 0
+        idle = 0.0
+        while True:
+            if job.version != version:
+                version = job.version
+                idle = 0.0
+                if job.finished:
+                    yield f"event: {job.status}\ndata: {json.dumps(job.snapshot(include_text=False), ensure_ascii=False)}\n\n"
+                    return
+                state = job.snapshot(include_text=False)
+                state["text"], chunk_index = job.text_since(chunk_index)
+                yield f"event: progress\ndata: {json.dumps(state, ensure_ascii=False)}\n\n"
+            elif idle >= JOB_EVENTS_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+            idle += JOB_EVENTS_POLL_SECONDS
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.post(
+    "/tables/{table_id}/query",
+    response_model=schemas.TableQueryResponse,
+    summary="Queries a table kept server-side",
+    description="Returns rows of a spreadsheet/CSV table loaded in summary mode, filtered by simple column conditions.",
+    responses={
+        400: {"model": schemas.ErrorResponse, "description": "Invalid query"},
+        404: {"model": schemas.ErrorResponse, "description": "Unknown or expired table"}
+    }
+)
+async def query_table(table_id: str, query: schemas.TableQueryRequest = Body(...)) -> schemas.TableQueryResponse:
+    """Query a table that was loaded by /process_file with tabular_mode='summary'."""
+    if tabular_profile.table_store.get(table_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired table: {table_id}")
+    try:
+        result = tabular_profile.query_table(
+            table_id,
+            columns=query.columns,
+            filters=[f.model_dump() for f in query.filters],
+            offset=query.offset,
+            limit=query.limit
+        )
+        return schemas.TableQueryResponse(**result)
+    except ValueError as ve:
+        logger.error(f"Invalid query for table {table_id}: {str(ve)}")
+        raise HTTPException(status_code=400, detail=str(ve))
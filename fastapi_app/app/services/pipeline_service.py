@@ -1,10 +1,15 @@
+import os
 import asyncio
 import json
 import logging
 import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 from ..utils.openrouter_client import call_openrouter_api_async
+from ..utils.document_digest import digest_cache, format_digest
+from ..utils.extractive_summary import fit_to_budget
+from ..utils.near_duplicates import DedupReport, deduplicate_documents
+from ..utils.text_compaction import compaction_cache
 from ..prompts import prompts
 from ..models import schemas
 from ..routers.admin import get_current_models, DEFAULT_SETTINGS
@@ -13,6 +18,9 @@ from ..routers.admin import get_current_models, DEFAULT_SETTINGS
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Constants (could be moved to config)
+DOCUMENTS_MAX_TOKENS = int(os.getenv("DOCUMENTS_MAX_TOKENS", "48000")) # Document tokens per perspective prompt; larger documents are summarized locally
+
 # Note: Model default values are centralized in admin.py DEFAULT_SETTINGS
 # to ensure consistency across the application and avoid duplication.
 
@@ -266,6 +274,49 @@ async def run_verification_synthesis_step(
     )
 
 
+def summarize_documents(documents: List[schemas.DocumentInput]) -> str:
+    """
+    Builds the analysis step's view of the documents from their digests.
+
+    Digests come with the documents from /process_file; documents sent without one
+    (e.g. pasted text) get theirs computed here and cached by content.
+    """
+    lines = [f"{len(documents)} document(s) attached:"]
+    for doc in documents:
+        digest = doc.digest.model_dump() if doc.digest is not None else digest_cache.get_or_compute(doc.content, doc.name)
+        lines.append(format_digest(doc.name, digest))
+    return "\n".join(lines)
+
+
+def prepare_documents_content(documents: List[schemas.DocumentInput]) -> Tuple[str, DedupReport]:
+    """
+    Builds the documents section of the perspective prompts: repeated page headers and
+    footers are removed (located by the documents' page spans), whitespace and boilerplate
+    lines are compacted (cached per document), repeated paragraphs are removed across all
+    documents, then oversized documents are summarized to fit DOCUMENTS_MAX_TOKENS.
+    CPU-bound, run off the event loop.
+    """
+    texts, report = deduplicate_documents(
+        [doc.name for doc in documents],
+        [doc.content for doc in documents],
+        spans=[doc.spans for doc in documents],
+        normalize=compaction_cache.compact
+    )
+    texts = fit_to_budget(texts, DOCUMENTS_MAX_TOKENS)
+    contents = [f"--- START Document: {doc.name} ---\n{text}\n--- END Document ---" for doc, text in zip(documents, texts)]
+    return "\n\n".join(contents), report
+
+
+def prepare_documents(documents: List[schemas.DocumentInput]) -> Tuple[str, str, DedupReport]:
+    """
+    Returns (digest summary for the analysis step, documents section for the perspectives,
+    deduplication report). Both parts may compute over the full texts, so the caller runs
+    this in one worker thread.
+    """
+    documents_content, report = prepare_documents_content(documents)
+    return summarize_documents(documents), documents_content, report
+
+
 async def run_ai_pipeline(request: schemas.ProcessQueryRequest, api_key: str) -> schemas.ProcessQueryResponse:
     """Orchestrates the entire AI pipeline using the provided API key."""
     start_time = datetime.datetime.now(datetime.timezone.utc)
@@ -274,14 +325,10 @@ async def run_ai_pipeline(request: schemas.ProcessQueryRequest, api_key: str) ->
     # Prepare document data
     documents_summary = "No additional documents provided."
     documents_content = "No additional documents provided."
+    dedup_report = None
     if request.documents:
-        # Logic for creating summary and full content can be added here
-        # (similar to the old Flask app)
-        # Simplified for now:
-        if request.documents:
-             documents_summary = f"{len(request.documents)} document(s) attached."
-             contents = [f"--- START Document: {doc.name} ---\n{doc.content}\n--- END Document ---" for doc in request.documents]
-             documents_content = "\n\n".join(contents)
+        # The analysis step sees digests only; the full content goes to the later steps
+        documents_summary, documents_content, dedup_report = await asyncio.to_thread(prepare_documents, request.documents)
 
 
     # Step 1: Analysis
@@ -321,5 +368,6 @@ async def run_ai_pipeline(request: schemas.ProcessQueryRequest, api_key: str) ->
         timestamp=start_time.isoformat(),
         analysis=analysis_result,
         perspectives=perspective_results,
-        verification_synthesis=verification_synthesis_result
+        verification_synthesis=verification_synthesis_result,
+        deduplication=schemas.DeduplicationReport(**dedup_report._asdict()) if dedup_report else None
     )
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+import logging
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .extraction_io import as_binary_stream
+from .extraction_pool import EXTRACTION_POOL_WORKERS, submit
+from .extraction_stream import TRUNCATED_NOTE_TITLE, TextFragment
+
+try:
+    import rarfile # RAR archives
+except ImportError:
+    rarfile = None
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+ARCHIVE_MAX_MEMBERS = 500 # Members (including nested ones) looked at per upload
+ARCHIVE_MAX_TOTAL_MB = 200 # Total uncompressed bytes read per upload
+ARCHIVE_MAX_MEMBER_MB = 50 # Uncompressed size limit of a single member
+ARCHIVE_MAX_RATIO = 100 # Members compressed more than this are treated as zip bombs
+ARCHIVE_MAX_DEPTH = 2 # Levels of archives inside archives that are opened
+ARCHIVE_MEMBER_MAX_CHARS = 20000 # Text kept per member
+
+ARCHIVE_MIME_TYPES = ('application/zip', 'application/x-rar-compressed', 'application/x-rar')
+
+# (member bytes, member name) -> MIME type, or None when the member type is not supported
+DetectMime = Callable[[bytes, str], Optional[str]]
+# (member bytes, MIME type) -> member text
+ExtractMember = Callable[[bytes, str], str]
+
+
+class ArchiveMember(NamedTuple):
+    path: str # Path including the enclosing archives, e.g. 'outer.zip/docs/a.pdf'
+    data: bytes
+    mime_type: str
+
+
+class ArchiveLimits:
+    """Zip-bomb budget shared by an archive and all archives nested in it."""
+
+    def __init__(
+        self,
+        max_members: int = ARCHIVE_MAX_MEMBERS,
+        max_total_bytes: int = ARCHIVE_MAX_TOTAL_MB * 1024 * 1024,
+        max_member_bytes: int = ARCHIVE_MAX_MEMBER_MB * 1024 * 1024,
+        max_ratio: float = ARCHIVE_MAX_RATIO,
+        max_depth: int = ARCHIVE_MAX_DEPTH
+    ):
+        self.max_members = max_members
+        self.max_total_bytes = max_total_bytes
+        self.max_member_bytes = max_member_bytes
+        self.max_ratio = max_ratio
+        self.max_depth = max_depth
+        self.members = 0
+        self.total_bytes = 0
+        self.exhausted: Optional[str] = None # Budget limit that stopped reading, for all enclosing archives too
+
+    def check_member(self, declared_size: int, compressed_size: int) -> Optional[str]:
+        """Returns why a member must be skipped, or None. Counts the member."""
+        if self.members >= self.max_members:
+            self.exhausted = "member limit reached"
+            return self.exhausted
+        self.members += 1
+        if declared_size > self.max_member_bytes:
+            return f"larger than {self.max_member_bytes // (1024 * 1024)} MB"
+        if compressed_size and declared_size / compressed_size > self.max_ratio:
+            return f"compression ratio above {self.max_ratio:g}"
+        if self.total_bytes + declared_size > self.max_total_bytes:
+            self.exhausted = "total size limit reached"
+            return self.exhausted
+        return None
+
+
+def _open_archive(data: bytes, mime_type: str) -> Any:
+    if 'rar' in mime_type.lower():
+        if not rarfile:
+            raise ValueError("rarfile library is not installed")
+        return rarfile.RarFile(as_binary_stream(data))
+    return zipfile.ZipFile(as_binary_stream(data))
+
+
+def list_archive(data: bytes, mime_type: str) -> List[str]:
+    """Returns the member names of a ZIP/RAR archive."""
+    with _open_archive(data, mime_type) as archive:
+        return archive.namelist()
+
+
+def _read_bounded(archive: Any, info: Any, limit: int) -> bytes:
+    """Reads a member, refusing to inflate more than its declared size (which may be forged)."""
+    with archive.open(info) as member:
+        data = member.read(limit + 1)
+    if len(data) > limit:
+        raise ValueError("uncompressed data exceeds the declared size")
+    return data
+
+
+def iter_archive_members(
+    data: bytes,
+    mime_type: str,
+    detect_mime: DetectMime,
+    limits: ArchiveLimits,
+    skipped: List[Tuple[str, str]],
+    prefix: str = '',
+    depth: int = 0
+) -> Iterator[ArchiveMember]:
+    """
+    Yields supported members of an archive, descending into nested archives.
+
+    Members that are unsupported or exceed the limits are recorded in `skipped` as
+    (path, reason). Once the member or total size budget is used up (limits.exhausted),
+    reading stops at every nesting level. Reading happens in the calling thread; only
+    extraction is parallel.
+    """
+    with _open_archive(data, mime_type) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            name = info.filename
+            path = prefix + name
+            reason = limits.check_member(info.file_size, info.compress_size)
+            if reason:
+                skipped.append((path, reason))
+                if limits.exhausted:
+                    return
+                continue
+            try:
+                member_data = _read_bounded(archive, info, info.file_size)
+            except Exception as e:
+                skipped.append((path, f"unreadable: {e}"))
+                continue
+            limits.total_bytes += len(member_data)
+
+            member_mime = detect_mime(member_data, name)
+            if member_mime in ARCHIVE_MIME_TYPES:
+                if depth + 1 > limits.max_depth:
+                    skipped.append((path, "nested too deeply"))
+                    continue
+                try:
+                    yield from iter_archive_members(
+                        member_data, member_mime, detect_mime, limits, skipped, path + '/', depth + 1
+                    )
+                except (zipfile.BadZipFile, ValueError) as e:
+                    skipped.append((path, f"unreadable archive: {e}"))
+                if limits.exhausted:
+                    return
+                continue
+            if member_mime is None:
+                skipped.append((path, "unsupported file type"))
+                continue
+            yield ArchiveMember(path, member_data, member_mime)
+
+
+def _extract_member(extract: ExtractMember, member: ArchiveMember) -> Tuple[str, Optional[str], Optional[str]]:
+    """Pool task: returns (path, text, error)."""
+    try:
+        return member.path, extract(member.data, member.mime_type), None
+    except Exception as e:
+        logger.info(f"Archive member {member.path} could not be extracted: {e}")
+        return member.path, None, str(e)
+
+
+def iter_extract_archive(
+    data: bytes,
+    mime_type: str,
+    detect_mime: DetectMime,
+    extract: ExtractMember,
+    limits: Optional[ArchiveLimits] = None,
+    window: Optional[int] = None
+) -> Iterator[TextFragment]:
+    """
+    Extracts the text of supported archive members in the extraction pool.
+
+    Yields the archive listing first, then one fragment per member in completion order
+    (unit 'member', title = member path), then a note on skipped members. The note is
+    titled TRUNCATED_NOTE_TITLE when a budget limit, possibly hit inside a nested
+    archive, left members unread. At most `window` members are in flight; closing the
+    generator cancels the rest.
+
+    Args:
+        data: Archive content
+        mime_type: Archive MIME type (ZIP or RAR)
+        detect_mime: Detects the MIME type of a member, None for unsupported members
+        extract: Extracts the text of a member, running in a pool worker
+        limits: Zip-bomb limits, shared with nested archives
+        window: Max members in flight (defaults to twice the pool size)
+    """
+    limits = limits or ArchiveLimits()
+    window = window or EXTRACTION_POOL_WORKERS * 2
+    names = list_archive(data, mime_type)
+    yield TextFragment("Archive contents:\n" + "\n".join(f"- {name}" for name in names), 'listing', 1)
+
+    skipped: List[Tuple[str, str]] = []
+    members = iter_archive_members(data, mime_type, detect_mime, limits, skipped)
+    pending: Dict[Future, str] = {}
+    index = 0
+    try:
+        exhausted = False
+        while not exhausted or pending:
+            while not exhausted and len(pending) < window:
+                member = next(members, None)
+                if member is None:
+                    exhausted = True
+                else:
+                    pending[submit(_extract_member, extract, member)] = member.path
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                path, text, error = future.result()
+                if error is not None:
+                    skipped.append((path, f"extraction failed: {error}"))
+                    continue
+                index += 1
+                yield TextFragment(f"=== {path} ===\n{text.strip()}", 'member', index, path)
+    finally:
+        for future in pending:
+            future.cancel()
+        members.close()
+
+    if skipped:
+        lines = [f"- {path}: {reason}" for path, reason in skipped]
+        if limits.exhausted:
+            lines.append(f"[Archive truncated: {limits.exhausted}, remaining members were not read]")
+        yield TextFragment(
+            "Skipped archive members:\n" + "\n".join(lines), 'note', 1,
+            TRUNCATED_NOTE_TITLE if limits.exhausted else None
+        )
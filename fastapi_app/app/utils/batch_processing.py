@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from . import file_processor
+from .extraction_profiles import BACKGROUND_EXTRACTION_PROFILE
+from .extraction_sandbox import ExtractionLimitExceeded
+from .malware_scan import MalwareScanError
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+BATCH_MAX_FILES = 50 # Files accepted per batch request
+BATCH_MAX_TOTAL_MB = 120 # Total base64 payload of a batch
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(min(8, (os.cpu_count() or 1) * 2)))) # Files processed at once
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_batch_pool() -> ThreadPoolExecutor:
+    """
+    Returns the pool running whole-file jobs of batch requests.
+
+    Kept apart from the extraction pool: a file job waits on chapter/member tasks in
+    the extraction pool, and waiting on a pool from inside the same pool can deadlock.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="batch")
+    return _pool
+
+
+def check_batch_size(files: List[Any]) -> None:
+    """
+    Rejects batches over the file count or total size limits.
+
+    Raises:
+        ValueError: If the batch is empty or exceeds a limit
+    """
+    if not files:
+        raise ValueError("No files in batch.")
+    if len(files) > BATCH_MAX_FILES:
+        raise ValueError(f"Too many files in batch: {len(files)} (limit {BATCH_MAX_FILES}).")
+    total = sum(len(item.file_data_base64) for item in files)
+    if total > BATCH_MAX_TOTAL_MB * 1024 * 1024:
+        raise ValueError(f"Batch too large: {total / (1024 * 1024):.1f} MB of base64 data (limit {BATCH_MAX_TOTAL_MB} MB).")
+
+
+def _process_item(item: Any) -> Dict[str, Any]:
+    """Batch pool task: processes one file, returning its result fields or an error."""
+    if len(item.file_data_base64) > file_processor.MAX_BASE64_SIZE_MB * 1024 * 1024:
+        return {"error": f"File too large (limit {file_processor.MAX_BASE64_SIZE_MB} MB of base64 data)."}
+    try:
+        result = file_processor.process_uploaded_file_sandboxed(
+            item.file_data_base64,
+            item.filename,
+            tabular_mode=item.tabular_mode,
+            html_parser=item.html_parser,
+            archive_mode=item.archive_mode,
+            profile=item.profile or BACKGROUND_EXTRACTION_PROFILE
+        )
+    except (ValueError, ExtractionLimitExceeded, MalwareScanError) as e:
+        return {"error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error processing batch file {item.filename}: {e}", exc_info=True)
+        return {"error": "Internal server error"}
+    return {
+        "content": result["text"],
+        "mime_type": result.get("mime_type"),
+        "tables": result.get("tables"),
+        "spans": result.get("spans"),
+        "digest": result.get("digest"),
+        "truncated": result.get("truncated", False),
+    }
+
+
+async def iter_batch_results(files: List[Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Processes the files of a batch concurrently and yields one result per file as it finishes.
+
+    Every result carries the file's position in the request ('index') and its 'filename',
+    plus either the extraction fields or 'error'. A failing file never fails the batch.
+    The event loop only awaits; extraction runs in the batch pool (and its sandbox jobs).
+
+    Args:
+        files: Request items with filename, file_data_base64 and the per-file options
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_batch_pool()
+
+    async def run(index: int, item: Any) -> Dict[str, Any]:
+        result = await loop.run_in_executor(pool, _process_item, item)
+        return {"index": index, "filename": item.filename, **result}
+
+    tasks = [asyncio.ensure_future(run(index, item)) for index, item in enumerate(files)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel() # Drops queued files when the client disconnects
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from .file_processor import ALLOWED_MIME_TYPES
+from .mime_detection import MIME_SNIFF_BYTES, detect_mime_type
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "tripplecheck_uploads"))
+UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "512")) # Max size of a chunked upload
+UPLOAD_CHUNK_MAX_MB = 16 # Max size of one chunk request, the only part held in memory
+UPLOAD_TTL_SECONDS = 24 * 3600 # Uploads untouched for this long are deleted
+UPLOAD_HASH_READ_BYTES = 1024 * 1024 # Block size when re-hashing a partial upload from disk
+
+UPLOAD_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+
+class UploadState(NamedTuple):
+    upload_id: str
+    filename: str
+    size: int # Declared total size in bytes
+    received: int # Bytes stored so far, the offset of the next chunk
+    mime_type: Optional[str] # Sniffed from the first chunk
+    sha256: Optional[str] # Set once the upload is finalized
+
+    @property
+    def complete(self) -> bool:
+        return self.received == self.size
+
+    def to_dict(self) -> Dict[str, Any]:
+        state = self._asdict()
+        state['complete'] = self.complete
+        return state
+
+
+class UploadOffsetMismatch(ValueError):
+    """A chunk was sent for an offset other than the next expected one."""
+
+    def __init__(self, offset: int, expected: int):
+        super().__init__(f"Chunk offset {offset} does not match the upload, resume at offset {expected}.")
+        self.expected = expected
+
+
+class UploadStore:
+    """
+    Chunked uploads stored on disk, one directory per upload (data + meta.json).
+
+    Chunks must arrive in order; the next offset is the size of the data file, so a
+    client whose connection dropped asks for it and resumes there. The SHA-256 is
+    updated as chunks arrive and only recomputed from disk when this process did not
+    see the previous chunk (restart, another worker) or a write failed midway.
+    """
+
+    def __init__(self, directory: str = UPLOAD_DIR, max_bytes: int = UPLOAD_MAX_MB * 1024 * 1024, ttl_seconds: float = UPLOAD_TTL_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._hashers: Dict[str, Tuple[int, Any]] = {} # upload id -> (bytes hashed, sha256 object)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, upload_id: str, name: str = '') -> str:
+        if not UPLOAD_ID_PATTERN.fullmatch(upload_id):
+            raise ValueError(f"Invalid upload id: {upload_id}")
+        return os.path.join(self.directory, upload_id, name)
+
+    def _upload_lock(self, upload_id: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def _write_meta(self, upload_id: str, meta: Dict[str, Any]) -> None:
+        path = self._path(upload_id, 'meta.json')
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, path)
+
+    def _read_meta(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(upload_id, 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def create(self, filename: str, size: int) -> UploadState:
+        """
+        Starts an upload of size bytes.
+
+        Raises:
+            ValueError: If the size is not positive or exceeds the upload limit
+        """
+        if size <= 0:
+            raise ValueError("Upload size must be positive.")
+        if size > self.max_bytes:
+            raise ValueError(f"Upload too large: {size} bytes (limit {self.max_bytes // (1024 * 1024)} MB).")
+        self.sweep()
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._path(upload_id))
+        open(self._path(upload_id, 'data'), 'wb').close()
+        self._write_meta(upload_id, {'filename': filename, 'size': size, 'mime_type': None, 'sha256': None})
+        return UploadState(upload_id, filename, size, 0, None, None)
+
+    def get(self, upload_id: str) -> Optional[UploadState]:
+        """Returns the state of an upload, or None if it is unknown or expired."""
+        if not UPLOAD_ID_PATTERN.fullmatch(upload_id):
+            return None
+        meta = self._read_meta(upload_id)
+        if meta is None:
+            return None
+        try:
+            received = os.path.getsize(self._path(upload_id, 'data'))
+        except FileNotFoundError:
+            return None
+        return UploadState(upload_id, meta['filename'], meta['size'], received, meta['mime_type'], meta['sha256'])
+
+    def data_path(self, upload_id: str) -> str:
+        return self._path(upload_id, 'data')
+
+    def _hasher_at(self, upload_id: str, offset: int) -> Any:
+        """SHA-256 object over the first offset bytes of the upload."""
+        hashed, hasher = self._hashers.get(upload_id, (None, None))
+        if hashed == offset:
+            return hasher
+        hasher = hashlib.sha256()
+        with open(self.data_path(upload_id), 'rb') as f:
+            for block in iter(lambda: f.read(UPLOAD_HASH_READ_BYTES), b''):
+                hasher.update(block)
+        return hasher
+
+    def write_chunk(self, upload_id: str, offset: int, data: bytes) -> UploadState:
+        """
+        Appends a chunk at offset, which must be the number of bytes received so far.
+
+        The first chunk is sniffed, so unsupported file types are refused before the
+        rest of a large upload is sent.
+
+        Raises:
+            UploadOffsetMismatch: If offset is not the next expected offset
+            ValueError: If the upload is unknown or finalized, the chunk overruns the
+                declared size, or the file type is not supported
+        """
+        with self._upload_lock(upload_id):
+            state = self.get(upload_id)
+            if state is None:
+                raise ValueError(f"Unknown or expired upload: {upload_id}")
+            if state.sha256:
+                raise ValueError("Upload is already finalized.")
+            if offset != state.received:
+                raise UploadOffsetMismatch(offset, state.received)
+            if offset + len(data) > state.size:
+                raise ValueError(f"Chunk overruns the declared upload size of {state.size} bytes.")
+
+            mime_type = state.mime_type
+            if offset == 0 and len(data) >= min(state.size, MIME_SNIFF_BYTES):
+                mime_type = detect_mime_type(data, state.filename)
+                if mime_type not in ALLOWED_MIME_TYPES:
+                    raise ValueError(f"Unsupported file type: {mime_type}")
+                meta = self._read_meta(upload_id)
+                meta['mime_type'] = mime_type
+                self._write_meta(upload_id, meta)
+
+            hasher = self._hasher_at(upload_id, offset)
+            self._hashers.pop(upload_id, None) # Stale if the write below fails midway
+            with open(self.data_path(upload_id), 'ab') as f:
+                f.write(data)
+            hasher.update(data)
+            self._hashers[upload_id] = (offset + len(data), hasher)
+            return state._replace(received=offset + len(data), mime_type=mime_type)
+
+    def finalize(self, upload_id: str, sha256: str) -> UploadState:
+        """
+        Completes an upload after checking its size and SHA-256 (hex). Finalizing again
+        with the same hash is allowed, e.g. to extract the file with other options.
+
+        Raises:
+            ValueError: If the upload is unknown, incomplete, or its hash does not match
+        """
+        with self._upload_lock(upload_id):
+            state = self.get(upload_id)
+            if state is None:
+                raise ValueError(f"Unknown or expired upload: {upload_id}")
+            expected = sha256.lower()
+            if state.sha256:
+                if state.sha256 != expected:
+                    raise ValueError("SHA-256 does not match the finalized upload.")
+                return state
+            if not state.complete:
+                raise ValueError(f"Upload incomplete: {state.received} of {state.size} bytes received.")
+            actual = self._hasher_at(upload_id, state.received).hexdigest()
+            self._hashers.pop(upload_id, None)
+            if actual != expected:
+                raise ValueError(f"SHA-256 mismatch: the upload hashes to {actual}.")
+            meta = self._read_meta(upload_id)
+            meta['sha256'] = actual
+            self._write_meta(upload_id, meta)
+            return state._replace(sha256=actual)
+
+    def delete(self, upload_id: str) -> bool:
+        """Removes an upload. Returns False if it did not exist."""
+        with self._upload_lock(upload_id):
+            self._hashers.pop(upload_id, None)
+            path = self._path(upload_id)
+            if not os.path.isdir(path):
+                return False
+            shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            self._locks.pop(upload_id, None)
+        return True
+
+    def sweep(self) -> int:
+        """Deletes uploads whose data was not written for ttl_seconds. Returns how many were removed."""
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if not UPLOAD_ID_PATTERN.fullmatch(name):
+                continue
+            try:
+                expired = os.path.getmtime(self._path(name, 'data')) < cutoff
+            except OSError:
+                # Half-created or half-deleted upload, judged by its directory
+                try:
+                    expired = os.path.getmtime(self._path(name)) < cutoff
+                except OSError:
+                    continue
+            if expired and self.delete(name):
+                removed += 1
+        if removed:
+            logger.info(f"Removed {removed} expired upload(s).")
+        return removed
+
+
+upload_store = UploadStore()
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+import os
+import io
+import re
+import json
+import math
+import logging
+import tempfile
+import threading
+import zipfile
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .extraction_io import as_binary_stream, as_buffer
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+TIMING_LOG_ENABLED = os.getenv("EXTRACTION_TIMING_LOG_ENABLED", "true").lower() in ("1", "true", "yes")
+TIMING_LOG_PATH = os.getenv("EXTRACTION_TIMING_LOG", os.path.join(tempfile.gettempdir(), "tripplecheck_extraction_timings.jsonl"))
+TIMING_LOG_MAX_SAMPLES = 5000 # The log is trimmed to its newest samples beyond this
+TIMING_MIN_SAMPLES = 8 # Samples of a file family needed before its fitted model replaces the defaults
+PDF_SAMPLE_PAGES = 16 # Pages inspected for a text layer; the rest is extrapolated
+SHEET_HEADER_BYTES = 4096 # Start of a worksheet XML read to find its <dimension>
+CHARS_PER_TOKEN = 4.0 # Typical for English with GPT-style tokenizers
+NON_ASCII_CHARS_PER_TOKEN = 2.0 # Accented and non-Latin characters split into more tokens
+INTERACTIVE_MAX_SECONDS = 5.0 # Jobs predicted to take longer go to the background lane
+
+# Default model per file family: (base seconds, seconds per unit, seconds per OCR unit, characters per unit)
+DEFAULT_COEFFICIENTS: Dict[str, Tuple[float, float, float, float]] = {
+    'pdf': (0.02, 0.005, 2.5, 2500),
+    'image': (0.05, 0.0, 0.6, 800),
+    'spreadsheet': (0.05, 0.00005, 0.0, 40),
+    'csv': (0.01, 0.00002, 0.0, 40),
+    'presentation': (0.05, 0.01, 0.0, 300),
+    'document': (0.03, 0.002, 0.0, 250),
+    'epub': (0.05, 0.003, 0.0, 300),
+    'html': (0.01, 0.002, 0.0, 300),
+    'xml': (0.01, 0.001, 0.0, 500),
+    'text': (0.001, 0.0002, 0.0, 1000),
+    'archive': (0.02, 0.1, 0.0, 2000),
+}
+
+FAMILY_BY_MIME = {
+    'application/pdf': 'pdf',
+    'image/jpeg': 'image',
+    'image/png': 'image',
+    'application/vnd.ms-excel': 'spreadsheet',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'spreadsheet',
+    'application/vnd.oasis.opendocument.spreadsheet': 'spreadsheet',
+    'text/csv': 'csv',
+    'application/vnd.ms-powerpoint': 'presentation',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'presentation',
+    'application/vnd.oasis.opendocument.presentation': 'presentation',
+    'application/msword': 'document',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'document',
+    'application/vnd.oasis.opendocument.text': 'document',
+    'application/rtf': 'document',
+    'application/epub+zip': 'epub',
+    'text/html': 'html',
+    'application/xhtml+xml': 'html',
+    'text/xml': 'xml',
+    'application/xml': 'xml',
+    'text/plain': 'text',
+    'text/markdown': 'text',
+    'application/zip': 'archive',
+    'application/x-rar-compressed': 'archive',
+    'application/x-rar': 'archive',
+}
+
+CONTENT_PARTS = ('word/document.xml', 'content.xml') # Body of DOCX and OpenDocument files
+DIMENSION_PATTERN = re.compile(rb'<dimension\s+ref="[A-Z]+\d+(?::[A-Z]+(\d+))?"')
+
+
+class UploadProfile(NamedTuple):
+    """
+    Cheap structural facts about an upload, read from its header or directory only.
+
+    Attributes:
+        family: File family used to pick the timing model ('pdf', 'spreadsheet', ...)
+        unit: What `units` counts ('page', 'megapixel', 'row', 'slide', 'kilobyte', 'member')
+        units: Size of the upload in units
+        ocr_units: Units that need OCR (pages without a text layer, image megapixels)
+        details: Format-specific facts (sheet dimensions, image size, sampled pages, ...)
+    """
+    family: str
+    unit: str
+    units: float
+    ocr_units: float
+    details: Dict[str, Any]
+
+    def scaled(self, fraction: float) -> 'UploadProfile':
+        """The part of the upload an extraction stopped by its character budget actually read."""
+        return self._replace(units=self.units * fraction, ocr_units=self.ocr_units * fraction)
+
+
+class CostEstimate(NamedTuple):
+    profile: UploadProfile
+    needs_ocr: bool
+    estimated_seconds: float
+    estimated_seconds_without_ocr: float
+    estimated_chars: int
+    estimated_tokens: int
+    lane: str # 'interactive' or 'background'
+    calibrated: bool # Whether the timing model was fitted on recorded timings
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximates the LLM token count of a text without a tokenizer."""
+    if not text:
+        return 0
+    non_ascii = len(text) - len(text.encode('ascii', errors='ignore'))
+    return math.ceil((len(text) - non_ascii) / CHARS_PER_TOKEN + non_ascii / NON_ASCII_CHARS_PER_TOKEN)
+
+
+def _kilobytes(size: int) -> float:
+    return round(size / 1024, 1)
+
+
+def _profile_pdf(data: bytes, ocr_available: bool) -> Tuple[str, float, float, Dict[str, Any]]:
+    import fitz # PyMuPDF only parses the xref and the sampled page resources here
+    with fitz.open(stream=as_buffer(data), filetype="pdf") as doc:
+        page_count = len(doc)
+        step = max(page_count / PDF_SAMPLE_PAGES, 1)
+        sampled = sorted({int(i * step) for i in range(min(page_count, PDF_SAMPLE_PAGES))})
+        # A page without fonts has no text layer; scans are images on such pages
+        without_text = [number + 1 for number in sampled if not doc.load_page(number).get_fonts()]
+    ratio = len(without_text) / len(sampled) if sampled else 0.0
+    ocr_pages = round(page_count * ratio) if ocr_available else 0
+    details = {'pages': page_count, 'sampled_pages': len(sampled), 'sampled_pages_without_text': without_text}
+    return 'page', page_count, ocr_pages, details
+
+
+def _profile_image(data: bytes, ocr_available: bool) -> Tuple[str, float, float, Dict[str, Any]]:
+    from PIL import Image # Image.open reads the header only; pixels are decoded lazily
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+    megapixels = round(width * height / 1_000_000, 2)
+    return 'megapixel', megapixels, megapixels if ocr_available else 0, {'width': width, 'height': height}
+
+
+def _profile_xlsx(archive: zipfile.ZipFile) -> Tuple[str, float, float, Dict[str, Any]]:
+    sheets = {}
+    for name in archive.namelist():
+        if name.startswith('xl/worksheets/') and name.endswith('.xml'):
+            with archive.open(name) as member:
+                match = DIMENSION_PATTERN.search(member.read(SHEET_HEADER_BYTES))
+            sheets[name.rsplit('/', 1)[-1][:-4]] = int(match.group(1) or 1) if match else None
+    rows = sum(count or 0 for count in sheets.values())
+    return 'row', rows, 0, {'sheet_rows': sheets}
+
+
+def _profile_zip_package(data: bytes, family: str) -> Tuple[str, float, float, Dict[str, Any]]:
+    with zipfile.ZipFile(as_binary_stream(data)) as archive:
+        infos = [info for info in archive.infolist() if not info.is_dir()]
+        if family == 'spreadsheet' and any(info.filename == 'xl/workbook.xml' for info in infos):
+            return _profile_xlsx(archive)
+        if family == 'presentation':
+            slides = [info for info in infos if re.fullmatch(r'ppt/slides/slide\d+\.xml', info.filename)]
+            if slides:
+                return 'slide', len(slides), 0, {'slides': len(slides)}
+        if family == 'archive':
+            total = sum(info.file_size for info in infos)
+            return 'member', len(infos), 0, {'members': len(infos), 'uncompressed_kb': _kilobytes(total)}
+        # Documents and books: size of the markup that will be converted (not styles or themes)
+        markup = sum(
+            info.file_size for info in infos
+            if info.filename in CONTENT_PARTS or info.filename.endswith(('.xhtml', '.html', '.htm'))
+        )
+        return 'kilobyte', _kilobytes(markup), 0, {'markup_kb': _kilobytes(markup)}
+
+
+def _profile_csv(data: bytes) -> Tuple[str, float, float, Dict[str, Any]]:
+    sample = bytes(data[:64 * 1024])
+    lines = sample.count(b'\n') or 1
+    rows = round(lines * len(data) / len(sample)) if sample else 0
+    return 'row', rows, 0, {'estimated_rows': rows}
+
+
+def inspect_upload(file_content: bytes, mime_type: str, ocr_available: bool = True) -> UploadProfile:
+    """
+    Profiles an upload from its header or directory without extracting it.
+
+    Args:
+        file_content: Upload content
+        mime_type: Detected MIME type
+        ocr_available: Whether OCR would run for pages/images without text
+
+    Raises:
+        ValueError: If the MIME type has no cost model
+    """
+    family = FAMILY_BY_MIME.get(mime_type)
+    if family is None:
+        raise ValueError(f"No cost model for file type: {mime_type}")
+    details: Dict[str, Any] = {}
+    try:
+        if family == 'pdf':
+            unit, units, ocr_units, details = _profile_pdf(file_content, ocr_available)
+        elif family == 'image':
+            unit, units, ocr_units, details = _profile_image(file_content, ocr_available)
+        elif family == 'csv':
+            unit, units, ocr_units, details = _profile_csv(file_content)
+        elif bytes(file_content[:2]) == b'PK':
+            unit, units, ocr_units, details = _profile_zip_package(file_content, family)
+        else:
+            unit, units, ocr_units = 'kilobyte', _kilobytes(len(file_content)), 0
+    except Exception as e:
+        # A header that cannot be read still gets a size-based estimate
+        logger.warning(f"Could not profile {mime_type} upload, estimating from its size: {e}")
+        unit, units, ocr_units = 'kilobyte', _kilobytes(len(file_content)), 0
+        details = {'profile_error': str(e)}
+    if unit == 'kilobyte' and family in ('pdf', 'image', 'spreadsheet', 'csv', 'presentation', 'archive'):
+        family = 'text' # Size-based fallback: the per-unit model of the family does not apply
+    details['size_kb'] = _kilobytes(len(file_content))
+    return UploadProfile(family, unit, units, ocr_units, details)
+
+
+class TimingModel:
+    """
+    Per-family linear model of extraction time and output size, fitted on recorded timings.
+
+    seconds = base + per_unit * (units - ocr_units) + per_ocr_unit * ocr_units, and
+    chars = chars_per_unit * units. Samples are appended to a JSON-lines log shared by
+    all workers (sandbox jobs record in their own process); the model is refitted when
+    the log changes. Until a family has TIMING_MIN_SAMPLES samples its defaults are used.
+    """
+
+    def __init__(self, path: Optional[str] = TIMING_LOG_PATH, max_samples: int = TIMING_LOG_MAX_SAMPLES):
+        self.path = path
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._fitted: Dict[str, Tuple[float, float, float, float]] = {}
+        self._log_state: Optional[Tuple[float, int]] = None # (mtime, size) of the log when last fitted
+
+    def record(self, profile: UploadProfile, seconds: float, chars: int) -> None:
+        """Appends one sample; a single short write, so concurrent workers do not interleave lines."""
+        if not self.path:
+            return
+        line = json.dumps({
+            'family': profile.family, 'units': profile.units, 'ocr_units': profile.ocr_units,
+            'seconds': round(seconds, 4), 'chars': chars,
+        }) + '\n'
+        try:
+            with open(self.path, 'a', encoding='utf-8') as log:
+                log.write(line)
+                oversized = log.tell() > self.max_samples * 2 * len(line)
+            if oversized:
+                self._trim()
+        except OSError as e:
+            logger.warning(f"Could not record extraction timing: {e}")
+
+    def _read_samples(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as log:
+                lines = log.readlines()[-self.max_samples:]
+        except FileNotFoundError:
+            return []
+        samples = []
+        for line in lines:
+            try:
+                samples.append(json.loads(line))
+            except ValueError:
+                continue # Torn line from a crashed writer
+        return samples
+
+    def _trim(self) -> None:
+        """Rewrites the log with its newest samples (temp file + rename)."""
+        with self._lock:
+            samples = self._read_samples()
+            directory = os.path.dirname(self.path) or '.'
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as log:
+                log.writelines(json.dumps(sample) + '\n' for sample in samples)
+            os.replace(temp_path, self.path)
+
+    def _refresh(self) -> None:
+        """Refits the per-family coefficients if the log changed since the last fit."""
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        state = (stat.st_mtime, stat.st_size)
+        if state == self._log_state:
+            return
+        with self._lock:
+            by_family: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for sample in self._read_samples():
+                if sample.get('family') in DEFAULT_COEFFICIENTS:
+                    by_family[sample['family']].append(sample)
+            self._fitted = {
+                family: self._fit(samples, DEFAULT_COEFFICIENTS[family])
+                for family, samples in by_family.items() if len(samples) >= TIMING_MIN_SAMPLES
+            }
+            self._log_state = state
+
+    @staticmethod
+    def _fit(samples: List[Dict[str, Any]], defaults: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
+        import numpy as np
+        features = np.array([[1.0, s['units'] - s['ocr_units'], s['ocr_units']] for s in samples])
+        seconds = np.array([s['seconds'] for s in samples])
+        # Features that never vary (e.g. no OCR pages recorded) keep their default coefficient
+        fixed = [column for column in (1, 2) if not features[:, column].any()]
+        target = seconds - sum(features[:, column] * defaults[column] for column in fixed)
+        free = [column for column in range(3) if column not in fixed]
+        solution, *_ = np.linalg.lstsq(features[:, free], target, rcond=None)
+        coefficients = list(defaults[:3])
+        for column, value in zip(free, solution):
+            coefficients[column] = max(float(value), 0.0)
+        total_units = sum(s['units'] for s in samples)
+        chars_per_unit = sum(s['chars'] for s in samples) / total_units if total_units else defaults[3]
+        return coefficients[0], coefficients[1], coefficients[2], chars_per_unit
+
+    def coefficients(self, family: str) -> Tuple[Tuple[float, float, float, float], bool]:
+        """Returns the family's coefficients and whether they were fitted on recorded timings."""
+        self._refresh()
+        if family in self._fitted:
+            return self._fitted[family], True
+        return DEFAULT_COEFFICIENTS[family], False
+
+    def predict(self, profile: UploadProfile, max_chars: Optional[int] = None) -> CostEstimate:
+        """
+        Predicts extraction time, characters and tokens for a profiled upload.
+
+        Args:
+            profile: Result of inspect_upload
+            max_chars: Character budget of the extraction, caps the predicted output and time
+        """
+        (base, per_unit, per_ocr_unit, chars_per_unit), calibrated = self.coefficients(profile.family)
+        chars = int(chars_per_unit * profile.units)
+        read = profile
+        if max_chars is not None and chars > max_chars:
+            # Extraction stops at the budget, so only the units that fill it are read (and OCRed)
+            read = profile.scaled(max_chars / chars)
+            chars = max_chars
+        seconds_without_ocr = base + per_unit * (read.units - read.ocr_units)
+        seconds = seconds_without_ocr + per_ocr_unit * read.ocr_units
+        return CostEstimate(
+            profile=profile,
+            needs_ocr=profile.ocr_units > 0,
+            estimated_seconds=round(seconds, 2),
+            estimated_seconds_without_ocr=round(seconds_without_ocr, 2),
+            estimated_chars=chars,
+            estimated_tokens=math.ceil(chars / CHARS_PER_TOKEN),
+            lane='interactive' if seconds <= INTERACTIVE_MAX_SECONDS else 'background',
+            calibrated=calibrated,
+        )
+
+
+timing_model = TimingModel(TIMING_LOG_PATH if TIMING_LOG_ENABLED else None)
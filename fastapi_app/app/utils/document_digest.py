@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import re
+import logging
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .bounded_cache import BoundedLRU, text_key
+from .cost_estimation import estimate_tokens
+from .extraction_stream import TextFragment
+from .structured_text import StructuredText
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+DIGEST_KEY_TERMS = 12 # Key terms listed per document
+DIGEST_OUTLINE_MAX = 20 # Outline entries listed per document
+DIGEST_TITLE_MAX_CHARS = 120 # A first line longer than this is not taken as the title
+DIGEST_LANGUAGE_SAMPLE_CHARS = 20000 # Prefix of the text used to guess the language
+DIGEST_MIN_TERM_CHARS = 4 # Shorter words are not key terms
+DIGEST_CACHE_MAX_ENTRIES = 256 # Digests computed for documents sent without one
+
+# Frequent function words per language (ISO 639-1); the language with most hits wins
+STOPWORDS: Dict[str, frozenset] = {
+    'en': frozenset('the and of to in is that for it with as was on are be by this not or from at which have an but they his her their were has been will would there can all more also its into than other these some'.split()),
+    'pl': frozenset('i w na z się nie do to że jest o jak po co ale od za tak przez dla przy być jego są jej które który która oraz lub tylko może było także już ich tym tego'.split()),
+    'de': frozenset('der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als auch es an werden aus er hat dass sie nach wird bei einer um am sind noch wie einem über so zum'.split()),
+    'fr': frozenset('le la les de des et en un une du est que qui dans pour pas sur au plus par ne se ce il sont avec mais ou comme aux elle cette ont été être fait nous vous leur'.split()),
+    'es': frozenset('el la de que y en los del se las por un para con no una su al lo como más pero sus le ya o este sí porque esta entre cuando muy sin sobre también'.split()),
+}
+ALL_STOPWORDS = frozenset().union(*STOPWORDS.values())
+WORD_PATTERN = re.compile(r"[^\W\d_]+(?:['’-][^\W\d_]+)*")
+
+OUTLINE_UNITS = ('heading', 'chapter', 'sheet', 'slide') # Span kinds whose titles form the outline
+
+
+class DocumentDigest(NamedTuple):
+    """
+    Compact description of a document for prompts that cannot take its full text.
+
+    Attributes:
+        title: Document title (first heading or chapter, else the first short line)
+        outline: Heading, chapter, sheet or slide titles in reading order
+        key_terms: Most frequent content words
+        chars: Length of the text in characters
+        words: Number of words
+        estimated_tokens: Approximate LLM token count of the text
+        language: Guessed ISO 639-1 language code, or None
+        units: Number of pages, slides, sheets, ... by kind
+    """
+    title: Optional[str]
+    outline: List[str]
+    key_terms: List[str]
+    chars: int
+    words: int
+    estimated_tokens: int
+    language: Optional[str]
+    units: Dict[str, int]
+
+
+def guess_language(words: List[str]) -> Optional[str]:
+    """Guesses the language from the share of each language's function words, None if too few match."""
+    hits = Counter()
+    for word in words:
+        for language, stopwords in STOPWORDS.items():
+            if word in stopwords:
+                hits[language] += 1
+    if not hits:
+        return None
+    language, count = hits.most_common(1)[0]
+    return language if count >= 3 and count >= 0.05 * len(words) else None
+
+
+def _first_line(text: str) -> Optional[str]:
+    for line in text.splitlines():
+        line = line.strip().strip('#').strip()
+        if line:
+            return line if len(line) <= DIGEST_TITLE_MAX_CHARS else None
+    return None
+
+
+def compute_document_digest(structured: StructuredText, filename: str = '') -> DocumentDigest:
+    """
+    Computes the digest of an extracted document in one pass over its words.
+
+    Args:
+        structured: Extracted text with its unit spans (see structured_text)
+        filename: Used as the title when the text has none
+    """
+    text = structured.text
+    outline: List[str] = []
+    units: Counter = Counter()
+    title = None
+    for span in structured:
+        if span.unit != 'heading':
+            units[span.unit] += 1
+        if span.unit in OUTLINE_UNITS and span.title and len(outline) < DIGEST_OUTLINE_MAX:
+            outline.append(span.title)
+            if title is None and span.unit in ('heading', 'chapter'):
+                title = span.title
+
+    words = [word.lower() for word in WORD_PATTERN.findall(text)]
+    sample_words = words
+    if len(text) > DIGEST_LANGUAGE_SAMPLE_CHARS:
+        sample_words = [word.lower() for word in WORD_PATTERN.findall(text[:DIGEST_LANGUAGE_SAMPLE_CHARS])]
+    terms = Counter(word for word in words if len(word) >= DIGEST_MIN_TERM_CHARS and word not in ALL_STOPWORDS)
+
+    return DocumentDigest(
+        title=title or _first_line(text) or filename or None,
+        outline=outline,
+        key_terms=[term for term, _ in terms.most_common(DIGEST_KEY_TERMS)],
+        chars=len(text),
+        words=len(words),
+        estimated_tokens=estimate_tokens(text),
+        language=guess_language(sample_words),
+        units=dict(units),
+    )
+
+
+def format_digest(name: str, digest: Dict[str, Any]) -> str:
+    """Renders a digest (as a dict) as a few prompt lines."""
+    size = f"{digest.get('words', 0)} words, ~{digest.get('estimated_tokens', 0)} tokens"
+    units = ', '.join(f"{count} {unit}(s)" for unit, count in (digest.get('units') or {}).items() if unit != 'document')
+    lines = [f"- {name}: \"{digest.get('title') or name}\" ({size}{', ' + units if units else ''}, language: {digest.get('language') or 'unknown'})"]
+    if digest.get('outline'):
+        lines.append(f"  Outline: {' | '.join(digest['outline'])}")
+    if digest.get('key_terms'):
+        lines.append(f"  Key terms: {', '.join(digest['key_terms'])}")
+    return '\n'.join(lines)
+
+
+class DigestCache:
+    """Bounded LRU of digests keyed by the SHA-256 of the document text."""
+
+    def __init__(self, max_entries: int = DIGEST_CACHE_MAX_ENTRIES):
+        self._entries: BoundedLRU[Dict[str, Any]] = BoundedLRU(max_entries)
+
+    def get_or_compute(self, text: str, name: str = '') -> Dict[str, Any]:
+        """Digest of a plain text (Markdown headings form its outline), computed once per distinct text."""
+        return self._entries.get_or_compute(
+            text_key(text),
+            lambda: compute_document_digest(StructuredText.from_fragments([TextFragment(text)]), name)._asdict()
+        )
+
+
+digest_cache = DigestCache()
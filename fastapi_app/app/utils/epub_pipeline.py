@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+import copy
+import logging
+import posixpath
+import re
+import threading
+import zipfile
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import unquote
+
+from defusedxml import ElementTree as safe_ET
+
+from .extraction_io import as_binary_stream
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+EPUB_MAX_CHAPTERS = 2000 # Spine entries processed per book
+EPUB_MAX_CHAPTER_MB = 20 # Uncompressed size limit of a single chapter
+EPUB_MAX_TOTAL_MB = 200 # Uncompressed size of all chapters read from one book
+
+CHAPTER_MEDIA_TYPES = ('application/xhtml+xml', 'text/html')
+MARKDOWN_HEADING_RE = re.compile(r'^#{1,3}[ ]+(.+?)[ #]*$', re.MULTILINE) # h1-h3 as written by html2text
+
+NS = {
+    'container': 'urn:oasis:names:tc:opendocument:xmlns:container',
+    'opf': 'http://www.idpf.org/2007/opf',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'ncx': 'http://www.daisy.org/z3986/2005/ncx/',
+}
+
+
+class EpubPackage(NamedTuple):
+    """
+    Package document of an EPUB; chapter contents are read later by iter_epub_chapters.
+
+    Attributes:
+        metadata: Dublin Core title, creator and language values
+        toc: Table of contents entries, nested entries indented
+        chapters: Zip paths of the spine documents in reading order
+    """
+    metadata: Dict[str, List[str]]
+    toc: List[str]
+    chapters: List[str]
+
+
+def _resolve(base_dir: str, href: str) -> str:
+    return posixpath.normpath(posixpath.join(base_dir, unquote(href.split('#', 1)[0])))
+
+
+def _open_epub(content: bytes) -> zipfile.ZipFile:
+    try:
+        return zipfile.ZipFile(as_binary_stream(content))
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a valid EPUB (zip) file: {e}") from e
+
+
+def _ncx_toc(content: bytes) -> List[str]:
+    entries = []
+
+    def walk(parent: Any, depth: int) -> None:
+        for point in parent.findall('ncx:navPoint', NS):
+            label = point.findtext('ncx:navLabel/ncx:text', default='', namespaces=NS).strip()
+            if label:
+                entries.append(f"{'  ' * depth}- {label}")
+            walk(point, depth + 1)
+
+    nav_map = safe_ET.fromstring(content).find('ncx:navMap', NS)
+    if nav_map is not None:
+        walk(nav_map, 0)
+    return entries
+
+
+def _nav_toc(content: bytes) -> List[str]:
+    from lxml import html as lxml_html # Only needed for EPUB 3 books without an NCX
+    root = lxml_html.document_fromstring(content)
+    entries = []
+    for nav in root.iter('nav'):
+        for anchor in nav.iter('a'):
+            depth = sum(1 for ancestor in anchor.iterancestors('ol', 'ul')) - 1
+            label = ' '.join(anchor.text_content().split())
+            if label:
+                entries.append(f"{'  ' * max(depth, 0)}- {label}")
+        break # The first <nav> is the table of contents
+    return entries
+
+
+def read_epub_package(content: bytes) -> EpubPackage:
+    """
+    Reads the OPF package of an EPUB: metadata, table of contents and the spine.
+    Chapter contents are not inflated here.
+
+    Raises:
+        ValueError: If the content is not a valid EPUB
+    """
+    with _open_epub(content) as archive:
+        try:
+            container = safe_ET.fromstring(archive.read('META-INF/container.xml'))
+            rootfile = container.find('.//container:rootfile', NS)
+            opf_path = rootfile.get('full-path')
+            opf = safe_ET.fromstring(archive.read(opf_path))
+        except (KeyError, AttributeError, safe_ET.ParseError) as e:
+            raise ValueError(f"EPUB package document not found or invalid: {e}") from e
+        base_dir = posixpath.dirname(opf_path)
+
+        metadata_el = opf.find('opf:metadata', NS)
+        metadata = {
+            name: [el.text.strip() for el in metadata_el.findall(f'dc:{name}', NS) if el.text]
+            for name in ('title', 'creator', 'language')
+        } if metadata_el is not None else {'title': [], 'creator': [], 'language': []}
+
+        manifest = {}
+        nav_path = None
+        for item in opf.iterfind('opf:manifest/opf:item', NS):
+            path = _resolve(base_dir, item.get('href', ''))
+            manifest[item.get('id')] = (path, item.get('media-type', ''))
+            if 'nav' in (item.get('properties') or '').split():
+                nav_path = path
+
+        spine = opf.find('opf:spine', NS)
+        chapters = []
+        toc: List[str] = []
+        if spine is not None:
+            for itemref in spine.findall('opf:itemref', NS)[:EPUB_MAX_CHAPTERS]:
+                path, media_type = manifest.get(itemref.get('idref'), (None, None))
+                if path and media_type in CHAPTER_MEDIA_TYPES and path in archive.NameToInfo:
+                    chapters.append(path)
+
+            ncx_path = manifest.get(spine.get('toc'), (None, None))[0]
+            try:
+                if ncx_path and ncx_path in archive.NameToInfo:
+                    toc = _ncx_toc(archive.read(ncx_path))
+                elif nav_path and nav_path in archive.NameToInfo:
+                    toc = _nav_toc(archive.read(nav_path))
+            except Exception as e:
+                logger.warning(f"Could not read EPUB table of contents: {e}")
+
+    return EpubPackage(metadata, toc, chapters)
+
+
+def iter_epub_chapters(
+    content: bytes,
+    chapters: List[str],
+    max_total_bytes: int = EPUB_MAX_TOTAL_MB * 1024 * 1024
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yields (path, content) of the given spine documents, inflating each one only when
+    the consumer asks for it, so at most one chapter is held in memory at a time.
+
+    Raises:
+        ValueError: If the content is not a valid zip, or a chapter or all chapters
+            together exceed the size limits (checked before inflating)
+    """
+    total_bytes = 0
+    with _open_epub(content) as archive:
+        for path in chapters:
+            info = archive.getinfo(path)
+            if info.file_size > EPUB_MAX_CHAPTER_MB * 1024 * 1024:
+                raise ValueError(f"EPUB member too large: {path} ({info.file_size} bytes)")
+            total_bytes += info.file_size
+            if total_bytes > max_total_bytes:
+                raise ValueError(f"EPUB chapters exceed {max_total_bytes // (1024 * 1024)} MB in total")
+            yield path, archive.read(info)
+
+
+class _ConverterState(threading.local):
+    """One html2text converter per worker thread, restored to its initial state before each chapter."""
+
+    def __init__(self):
+        self.converter = None
+        self.initial_state: Dict[str, Any] = {}
+
+
+_converters = _ConverterState()
+
+
+def chapter_to_markdown(html_content: bytes) -> str:
+    """Converts chapter markup to Markdown with the calling thread's html2text converter."""
+    import html2text
+    if _converters.converter is None:
+        converter = html2text.HTML2Text()
+        converter.ignore_links = False
+        converter.ignore_emphasis = False
+        _converters.converter = converter
+        _converters.initial_state = copy.copy(converter.__dict__)
+    converter = _converters.converter
+    # html2text keeps nesting state (lists, blockquotes) after unbalanced markup; start every chapter clean
+    converter.__dict__.update({key: copy.copy(value) for key, value in _converters.initial_state.items()})
+    converter.reset()
+    return converter.handle(html_content.decode('utf-8', errors='replace'))
+
+
+def markdown_heading(markdown: str) -> Optional[str]:
+    """First h1-h3 heading of chapter_to_markdown() output, so the chapter is not parsed a second time for it."""
+    match = MARKDOWN_HEADING_RE.search(markdown)
+    return match.group(1).strip() if match else None
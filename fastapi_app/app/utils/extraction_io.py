@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import os
+import io
+import mmap
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, Union
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+BinaryData = Union[bytes, bytearray, memoryview]
+
+
+def _default_scratch_root() -> str:
+    """Prefers the RAM-backed /dev/shm over the (overlay) temp directory."""
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return tempfile.gettempdir()
+
+# Constants (could be moved to config)
+SCRATCH_DIR = os.getenv("EXTRACTION_SCRATCH_DIR") or os.path.join(_default_scratch_root(), "tripplecheck_scratch")
+SCRATCH_QUOTA_MB = int(os.getenv("EXTRACTION_SCRATCH_QUOTA_MB", "256")) # Max scratch bytes in use by this process
+
+_scratch_lock = threading.Lock()
+_scratch_in_use = 0
+
+
+def as_binary_stream(data: BinaryData) -> io.BytesIO:
+    """Wraps uploaded bytes (or a memoryview over them) in a seekable file-like object for parsers."""
+    if isinstance(data, io.BytesIO):
+        data.seek(0)
+        return data
+    return io.BytesIO(data)
+
+
+def as_buffer(data: BinaryData) -> Union[bytes, memoryview]:
+    """Bytes or a view over them that PyMuPDF opens without copying (e.g. a mapped stored file)."""
+    return data if isinstance(data, (bytes, memoryview)) else memoryview(data)
+
+
+def map_file(path: str) -> mmap.mmap:
+    """Maps a stored file read-only, so it can be hashed or streamed without a copy in memory."""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def scratch_bytes_in_use() -> int:
+    """Returns the number of scratch bytes currently reserved by this process."""
+    return _scratch_in_use
+
+
+def _reserve(size: int) -> None:
+    global _scratch_in_use
+    quota = SCRATCH_QUOTA_MB * 1024 * 1024
+    with _scratch_lock:
+        if _scratch_in_use + size > quota:
+            raise RuntimeError(
+                f"Extraction scratch space quota exceeded ({SCRATCH_QUOTA_MB} MB). Please retry later."
+            )
+        _scratch_in_use += size
+
+
+def _release(size: int) -> None:
+    global _scratch_in_use
+    with _scratch_lock:
+        _scratch_in_use = max(_scratch_in_use - size, 0)
+
+
+@contextmanager
+def scratch_file(data: Optional[BinaryData] = None, suffix: str = "", reserve_bytes: int = 0) -> Iterator[str]:
+    """
+    Provides a file path in the RAM-backed scratch directory for libraries that only accept paths.
+
+    Args:
+        data: Optional content written to the file before it is handed out
+        suffix: File name suffix (some libraries dispatch on the extension)
+        reserve_bytes: Quota to reserve in addition to len(data), e.g. for output files
+
+    The file is always deleted on exit, including when the caller raises.
+    """
+    size = (len(data) if data is not None else 0) + reserve_bytes
+    _reserve(size)
+    path = None
+    try:
+        os.makedirs(SCRATCH_DIR, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=SCRATCH_DIR)
+        with os.fdopen(fd, "wb") as f:
+            if data is not None:
+                f.write(data)
+        yield path
+    finally:
+        if path and os.path.exists(path):
+            try:
+                os.unlink(path)
+            except OSError:
+                logger.warning(f"Could not delete scratch file: {path}")
+        _release(size)
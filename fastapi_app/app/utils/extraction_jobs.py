@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import file_processor
+from .batch_processing import get_batch_pool
+from .extraction_profiles import BACKGROUND_EXTRACTION_PROFILE
+from .extraction_sandbox import ExtractionLimitExceeded
+from .malware_scan import MalwareScanError
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+JOB_STORE_MAX_JOBS = 200 # Jobs kept in memory, the oldest finished ones are evicted first
+JOB_TTL_SECONDS = 3600 # Finished jobs are dropped after this long
+JOB_PARTIAL_TEXT_CHARS = 20000 # Partial text kept while a job runs
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class ExtractionJob:
+    """
+    State of one background extraction, updated from the worker thread and read by
+    the polling and SSE endpoints. `version` increases on every change.
+    """
+
+    def __init__(self, filename: str):
+        self.job_id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = 'queued'
+        self.stage: Optional[str] = None
+        self.pages_done = 0
+        self.pages_total: Optional[int] = None
+        self.text_chunks: List[str] = [] # Partial text, one chunk per progress report
+        self.text_chars = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.error_status: Optional[int] = None # HTTP status /process_file would have answered
+        self.version = 0
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def _touch(self) -> None:
+        self.version += 1
+        self.updated_at = time.monotonic()
+
+    def update(self, progress: Dict[str, Any]) -> None:
+        """Applies a progress update ({'stage', 'done', 'total', 'text'})."""
+        with self._lock:
+            self.status = 'running'
+            self.stage = progress.get('stage', self.stage)
+            self.pages_done = progress.get('done', self.pages_done)
+            self.pages_total = progress.get('total', self.pages_total)
+            text = progress.get('text')
+            if text and self.text_chars < JOB_PARTIAL_TEXT_CHARS:
+                text = text[:JOB_PARTIAL_TEXT_CHARS - self.text_chars]
+                self.text_chunks.append(text)
+                self.text_chars += len(text)
+            self._touch()
+
+    def finish(self, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self.status = 'done'
+            self.stage = None
+            self.result = result
+            self.text_chunks = [] # The result carries the full text
+            self.text_chars = 0
+            self._touch()
+
+    def fail(self, error: str, status_code: int) -> None:
+        with self._lock:
+            self.status = 'failed'
+            self.error = error
+            self.error_status = status_code
+            self._touch()
+
+    def text_since(self, chunk_index: int) -> Tuple[str, int]:
+        """Partial text added after the given chunk index, and the new index."""
+        with self._lock:
+            return ''.join(self.text_chunks[chunk_index:]), len(self.text_chunks)
+
+    def snapshot(self, include_text: bool = True) -> Dict[str, Any]:
+        """Job state as a JSON-ready dict (schemas.ExtractionJobStatus)."""
+        with self._lock:
+            state = {
+                'job_id': self.job_id,
+                'filename': self.filename,
+                'status': self.status,
+                'stage': self.stage,
+                'pages_done': self.pages_done,
+                'pages_total': self.pages_total,
+                'error': self.error,
+            }
+            if include_text and self.text_chunks:
+                state['partial_text'] = ''.join(self.text_chunks)
+            if self.result is not None:
+                state['result'] = {
+                    'content': self.result['text'],
+                    'tables': self.result.get('tables'),
+                    'spans': self.result.get('spans'),
+                    'digest': self.result.get('digest'),
+                }
+            return state
+
+
+class JobStore:
+    """Bounded in-memory store of extraction jobs."""
+
+    def __init__(self, max_jobs: int = JOB_STORE_MAX_JOBS, ttl_seconds: float = JOB_TTL_SECONDS):
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self._jobs: "OrderedDict[str, ExtractionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, job: ExtractionJob) -> None:
+        with self._lock:
+            self._evict()
+            self._jobs[job.job_id] = job
+
+    def get(self, job_id: str) -> Optional[ExtractionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and now - job.updated_at > self.ttl_seconds]:
+            del self._jobs[job_id]
+        while len(self._jobs) >= self.max_jobs:
+            oldest = next((job_id for job_id, job in self._jobs.items() if job.finished), None)
+            if oldest is None:
+                break # Never drop running jobs; the batch pool bounds how many there are
+            del self._jobs[oldest]
+
+
+job_store = JobStore()
+
+
+def _run_job(job: ExtractionJob, process: Callable[..., Dict[str, Any]], args: Tuple, kwargs: Dict[str, Any]) -> None:
+    """Batch pool task: runs the sandboxed extraction, feeding its progress into the job."""
+    job.update({})
+    try:
+        job.finish(process(*args, progress=job.update, **kwargs))
+    except ExtractionLimitExceeded as e:
+        job.fail(str(e), 422)
+    except MalwareScanError as e:
+        job.fail(str(e), 503)
+    except ValueError as e:
+        job.fail(str(e), 400)
+    except Exception as e:
+        logger.error(f"Extraction job {job.job_id} for {job.filename} failed: {e}", exc_info=True)
+        job.fail("Internal server error", 500)
+
+
+def _check_options(options: Dict[str, Any]) -> None:
+    checked = {name: options[name] for name in ('tabular_mode', 'max_chars', 'html_parser', 'archive_mode', 'profile') if name in options}
+    file_processor.resolve_extraction_options(**checked)
+
+
+def start_extraction_job(file_content_base64: str, filename: str, **options) -> ExtractionJob:
+    """
+    Queues process_uploaded_file_data for an upload and returns its job at once.
+
+    Args:
+        file_content_base64: Base64 encoded file content
+        filename: Original file name
+        **options: Further process_uploaded_file_data arguments (tabular_mode, html_parser, profile, ...);
+            the profile defaults to BACKGROUND_EXTRACTION_PROFILE
+
+    Raises:
+        ValueError: If an option has an unsupported value (checked before the job is queued)
+    """
+    options['profile'] = options.get('profile') or BACKGROUND_EXTRACTION_PROFILE
+    _check_options(options)
+    job = ExtractionJob(filename)
+    job_store.add(job)
+    get_batch_pool().submit(_run_job, job, file_processor.process_uploaded_file_sandboxed, (file_content_base64, filename), options)
+    return job
+
+
+def start_stored_file_job(path: str, filename: str, **options) -> ExtractionJob:
+    """Like start_extraction_job, for a file stored on disk (a finalized chunked upload)."""
+    options['profile'] = options.get('profile') or BACKGROUND_EXTRACTION_PROFILE
+    _check_options(options)
+    job = ExtractionJob(filename)
+    job_store.add(job)
+    get_batch_pool().submit(_run_job, job, file_processor.process_stored_file_sandboxed, (path, filename), options)
+    return job
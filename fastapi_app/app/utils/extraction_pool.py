@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import os
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, Optional, TypeVar
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+EXTRACTION_POOL_WORKERS = int(os.getenv("EXTRACTION_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+_worker_state = threading.local()
+
+
+def get_extraction_pool() -> ThreadPoolExecutor:
+    """
+    Returns the process-wide pool for CPU-heavy extraction sub-tasks (chapters, archive members).
+
+    Only submit leaf tasks that never wait on the pool themselves, otherwise a
+    saturated pool deadlocks.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=EXTRACTION_POOL_WORKERS, thread_name_prefix="extract")
+    return _pool
+
+
+def in_extraction_worker() -> bool:
+    """Whether the calling thread is running a task submitted through submit()."""
+    return getattr(_worker_state, "active", False)
+
+
+def _run_in_worker(func: Callable[..., R], *args) -> R:
+    _worker_state.active = True
+    try:
+        return func(*args)
+    finally:
+        _worker_state.active = False
+
+
+def submit(func: Callable[..., R], *args) -> "Future[R]":
+    """Submits a task to the extraction pool, marking it so nested helpers run inline instead of waiting on the pool."""
+    return get_extraction_pool().submit(_run_in_worker, func, *args)
+
+
+def map_ordered(func: Callable[[T], R], items: Iterable[T], window: Optional[int] = None) -> Iterator[R]:
+    """
+    Applies func to items in the extraction pool and yields results in input order.
+
+    At most `window` tasks are in flight, so memory stays bounded and a consumer that
+    stops early (or closes the generator) leaves the remaining items unprocessed.
+    Exceptions raised by func are re-raised in the consumer. Called from a pool task
+    (e.g. an EPUB inside an archive) it runs inline, since waiting on the pool from
+    inside the pool can deadlock.
+
+    Args:
+        func: Function applied to each item
+        items: Items, consumed lazily
+        window: Max tasks in flight (defaults to twice the pool size)
+    """
+    if in_extraction_worker():
+        for item in items:
+            yield func(item)
+        return
+
+    window = window or EXTRACTION_POOL_WORKERS * 2
+    pending: Deque[Future] = deque()
+    iterator = iter(items)
+    try:
+        for item in iterator:
+            pending.append(submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Receives progress updates: {'stage', 'done', 'total', 'text'}, each key only when known
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+_state = threading.local()
+
+
+@contextmanager
+def progress_reporting(callback: Optional[ProgressCallback]) -> Iterator[None]:
+    """Routes report_progress() calls made by this thread to callback for the duration of the block."""
+    previous = getattr(_state, 'callback', None)
+    _state.callback = callback
+    try:
+        yield
+    finally:
+        _state.callback = previous
+
+
+def report_progress(
+    stage: Optional[str] = None,
+    done: Optional[int] = None,
+    total: Optional[int] = None,
+    text: Optional[str] = None
+) -> None:
+    """
+    Reports extraction progress to the callback installed for this thread, if any.
+
+    Costs one attribute lookup when nobody listens, so extractors can call it per page.
+
+    Args:
+        stage: Current stage ('text_layer', 'ocr', 'postprocess')
+        done: Units (pages) processed so far
+        total: Total units, when known
+        text: Text extracted since the previous report
+    """
+    callback = getattr(_state, 'callback', None)
+    if callback is None:
+        return
+    update = {key: value for key, value in (('stage', stage), ('done', done), ('total', total), ('text', text)) if value is not None}
+    try:
+        callback(update)
+    except Exception as e:
+        logger.warning(f"Progress callback failed: {e}") # Progress is best effort, never fail the extraction
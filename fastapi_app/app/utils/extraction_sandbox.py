@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .extraction_progress import ProgressCallback, progress_reporting
+
+try:
+    import resource # POSIX only
+except ImportError:
+    resource = None
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+SANDBOX_ENABLED = os.getenv("EXTRACTION_SANDBOX", "true").lower() in ("1", "true", "yes")
+SANDBOX_MEMORY_MB = int(os.getenv("EXTRACTION_SANDBOX_MEMORY_MB", "1536")) # Address space limit of a job
+SANDBOX_CPU_SECONDS = int(os.getenv("EXTRACTION_SANDBOX_CPU_SECONDS", "60")) # CPU time limit of a job
+SANDBOX_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_SANDBOX_TIMEOUT_SECONDS", "90")) # Wall-clock deadline of a job
+SANDBOX_MAX_JOBS = int(os.getenv("EXTRACTION_SANDBOX_MAX_JOBS", str(os.cpu_count() or 1))) # Jobs running at once
+# Imported once by the fork server, so each job starts in milliseconds instead of re-importing them
+SANDBOX_PRELOAD_MODULES = [f'{__package__}.file_processor', 'fitz', 'numpy', 'lxml.etree', 'openpyxl', 'pptx']
+
+
+class ExtractionLimitExceeded(RuntimeError):
+    """An extraction job was killed for exceeding its memory, CPU time or wall-clock limit."""
+
+    def __init__(self, limit: str, detail: str):
+        super().__init__(f"Extraction exceeded its {limit} limit: {detail}")
+        self.limit = limit
+
+
+class SandboxLimits:
+    """Resource limits of one sandboxed job."""
+
+    def __init__(
+        self,
+        memory_mb: int = SANDBOX_MEMORY_MB,
+        cpu_seconds: int = SANDBOX_CPU_SECONDS,
+        timeout_seconds: float = SANDBOX_TIMEOUT_SECONDS
+    ):
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.timeout_seconds = timeout_seconds
+
+
+_context = None
+_context_lock = threading.Lock()
+_job_slots = threading.BoundedSemaphore(SANDBOX_MAX_JOBS)
+
+
+def _get_context() -> Any:
+    """
+    Multiprocessing context for jobs.
+
+    A fork server is used: forking the (multi-threaded) uvicorn worker directly is
+    unsafe, and spawning a fresh interpreter per job costs hundreds of milliseconds.
+    """
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                if 'forkserver' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('forkserver')
+                    context.set_forkserver_preload(SANDBOX_PRELOAD_MODULES)
+                else:
+                    context = multiprocessing.get_context('spawn')
+                _context = context
+    return _context
+
+
+def _apply_limits(limits: SandboxLimits) -> None:
+    """Sets rlimits in the job process (inherited by tools it starts, e.g. tesseract)."""
+    if resource is None:
+        return
+    if limits.memory_mb:
+        memory = limits.memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    if limits.cpu_seconds:
+        # SIGXCPU at the soft limit, SIGKILL at the hard limit if it is ignored
+        resource.setrlimit(resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 5))
+
+
+def _run_job(connection: Any, limits: SandboxLimits, report: bool, func: Callable[..., Any], args: Tuple, kwargs: dict) -> None:
+    """
+    Job process entry point: sends ('progress', update) messages when report is set,
+    then ('ok', result) or ('error', (kind, message)).
+    """
+    def send_progress(update: Dict[str, Any]) -> None:
+        connection.send(('progress', update))
+
+    try:
+        _apply_limits(limits)
+        with progress_reporting(send_progress if report else None):
+            outcome = ('ok', func(*args, **kwargs))
+    except MemoryError:
+        outcome = ('error', ('memory', f"more than {limits.memory_mb} MB requested"))
+    except ValueError as e:
+        outcome = ('error', ('value', str(e)))
+    except Exception as e:
+        outcome = ('error', ('runtime', f"{type(e).__name__}: {e}"))
+    try:
+        connection.send(outcome)
+    except MemoryError:
+        connection.send(('error', ('memory', "result too large to send")))
+    finally:
+        connection.close()
+
+
+def _describe_exit(exitcode: Optional[int], limits: SandboxLimits) -> RuntimeError:
+    """Maps the exit code of a job that died without a result to the limit it most likely hit."""
+    logger.warning(f"Sandboxed extraction job died with exit code {exitcode}.")
+    if exitcode == -signal.SIGXCPU:
+        return ExtractionLimitExceeded('CPU time', f"more than {limits.cpu_seconds} s of CPU")
+    if exitcode == -signal.SIGKILL:
+        return ExtractionLimitExceeded('resource', "job process killed (CPU hard limit or out of memory)")
+    if exitcode is not None and exitcode < 0:
+        return ExtractionLimitExceeded('resource', f"job process killed by signal {-exitcode}")
+    return RuntimeError(f"Extraction job process died (exit code {exitcode})")
+
+
+def run_sandboxed(
+    func: Callable[..., Any],
+    *args,
+    limits: Optional[SandboxLimits] = None,
+    progress: Optional[ProgressCallback] = None,
+    **kwargs
+) -> Any:
+    """
+    Runs func(*args, **kwargs) in a child process with memory, CPU and wall-clock limits.
+
+    The job process is killed once a limit is exceeded; the calling worker only sees an
+    exception. func, its arguments and its result must be picklable, and func must be
+    importable by module path (a module-level function).
+
+    Args:
+        func: Job function
+        limits: Limits of this job (defaults from the environment)
+        progress: Called in this thread with the job's report_progress() updates
+
+    Raises:
+        ExtractionLimitExceeded: If the job hit a limit or its process was killed
+        ValueError: If the job raised ValueError (invalid input), re-raised as is
+        RuntimeError: If the job raised any other exception or its process exited without a result
+    """
+    limits = limits or SandboxLimits()
+    context = _get_context()
+    with _job_slots:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_run_job, args=(sender, limits, progress is not None, func, args, kwargs), daemon=True
+        )
+        process.start()
+        sender.close() # The parent keeps only the receiving end, so a dead child shows up as EOF
+        deadline = time.monotonic() + limits.timeout_seconds
+        try:
+            while True:
+                if not receiver.poll(max(deadline - time.monotonic(), 0)):
+                    process.kill()
+                    logger.warning(f"Sandboxed extraction job killed after {limits.timeout_seconds:g} s.")
+                    raise ExtractionLimitExceeded('wall-clock', f"not finished within {limits.timeout_seconds:g} s")
+                try:
+                    status, payload = receiver.recv()
+                except EOFError:
+                    process.join()
+                    raise _describe_exit(process.exitcode, limits)
+                if status != 'progress':
+                    break
+                try:
+                    progress(payload)
+                except Exception as e:
+                    logger.warning(f"Progress callback failed: {e}")
+        finally:
+            receiver.close()
+            if process.is_alive():
+                process.join(1)
+                if process.is_alive():
+                    process.kill()
+            process.join()
+
+    if status == 'ok':
+        return payload
+    kind, message = payload
+    if kind == 'memory':
+        raise ExtractionLimitExceeded('memory', message)
+    if kind == 'value':
+        raise ValueError(message)
+    raise RuntimeError(message)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import logging
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+
+TRUNCATED_NOTE_TITLE = 'truncated' # Title of 'note' fragments reporting that a limit cut the document short
+
+
+class TextFragment(NamedTuple):
+    """
+    One unit of extracted text as yielded by the iter_extract_text_from_* generators.
+
+    Attributes:
+        text: Extracted text of the unit
+        unit: Kind of document unit ('page', 'slide', 'sheet', 'chapter', 'metadata', 'toc', 'document', ...)
+        index: 1-based position of the unit within its kind
+        title: Optional unit title (sheet name, chapter heading)
+    """
+    text: str
+    unit: str = 'document'
+    index: int = 1
+    title: Optional[str] = None
+
+
+def consume_fragments(fragments: Iterator[TextFragment], max_chars: Optional[int] = None) -> Tuple[List[TextFragment], bool]:
+    """
+    Pulls fragments from an extractor until the character budget is reached.
+
+    When the budget is reached the generator is closed, which runs its cleanup
+    (closing documents, deleting scratch files) and stops the underlying parser
+    before it touches the remaining pages.
+
+    Args:
+        fragments: Fragment iterator returned by an iter_extract_text_from_* function
+        max_chars: Character budget, None for no limit
+
+    Returns:
+        Tuple[List[TextFragment], bool]: Collected fragments (the last one cut at the budget)
+        and whether the document was truncated
+    """
+    collected: List[TextFragment] = []
+    total = 0
+    truncated = False
+    try:
+        for fragment in fragments:
+            if max_chars is not None and total + len(fragment.text) > max_chars:
+                remaining = max_chars - total
+                if remaining > 0:
+                    collected.append(fragment._replace(text=fragment.text[:remaining]))
+                truncated = True
+                break
+            collected.append(fragment)
+            total += len(fragment.text)
+    finally:
+        close = getattr(fragments, 'close', None)
+        if close:
+            close()
+    if truncated:
+        logger.info(f"Extraction stopped at the {max_chars} character budget after {len(collected)} fragment(s).")
+    return collected, truncated
+
+
+def join_fragments(fragments: Iterator[TextFragment], separator: str = '\n', max_chars: Optional[int] = None) -> str:
+    """Collects fragments (within an optional budget) into one string."""
+    collected, _ = consume_fragments(fragments, max_chars)
+    return separator.join(fragment.text for fragment in collected)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import re
+import math
+import logging
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .bounded_cache import BoundedLRU, text_key
+from .cost_estimation import NON_ASCII_CHARS_PER_TOKEN, estimate_tokens
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+SUMMARY_BLOCK_SENTENCES = 1500 # Sentences ranked together; longer texts are ranked block by block (the similarity matrix is quadratic)
+SUMMARY_MAX_TERMS = 4096 # Vocabulary size of the TF-IDF vectors (most frequent terms in at least two sentences)
+SUMMARY_DAMPING = 0.85 # TextRank damping factor
+SUMMARY_MAX_ITERATIONS = 100 # Power iterations of the ranking
+SUMMARY_TOLERANCE = 1e-6 # Ranking converged when scores move less than this (L1)
+SUMMARY_MIN_SENTENCE_WORDS = 3 # Shorter sentences (headings, list bullets) are kept as ranked context only
+SUMMARY_CACHE_MAX_ENTRIES = 64 # Summaries kept per (document hash, target size)
+SUMMARY_GAP_MARKER = '[…]' # Placed where sentences were left out
+
+PARAGRAPH_PATTERN = re.compile(r'\n\s*\n')
+SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?…。])["\'”’)\]]*\s+')
+TERM_PATTERN = re.compile(r"[^\W\d_]{2,}")
+ABBREVIATIONS = frozenset('mr mrs ms dr prof st no vs etc e.g i.e fig cf al approx inc ltd jr sr np tj dz ust str'.split())
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Splits text into sentences: paragraphs and lines are always split, and sentence-ending
+    punctuation splits unless it ends an abbreviation or the next word starts lowercase.
+    """
+    sentences = []
+    for paragraph in PARAGRAPH_PATTERN.split(text):
+        for line in paragraph.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            current = ''
+            for piece in SENTENCE_END_PATTERN.split(line):
+                if not piece:
+                    continue
+                if current:
+                    last_word = current.rsplit(None, 1)[-1].rstrip('.').lower()
+                    if last_word in ABBREVIATIONS or len(last_word) == 1 or not piece[0].isupper() and not piece[0].isdigit():
+                        current = f"{current} {piece}"
+                        continue
+                    sentences.append(current)
+                current = piece
+            if current:
+                sentences.append(current)
+    return sentences
+
+
+def _tfidf_matrix(sentences: List[str]) -> "np.ndarray":
+    """Rows are L2-normalized TF-IDF vectors of the sentences, so their dot products are cosine similarities."""
+    tokenized = [[term.lower() for term in TERM_PATTERN.findall(sentence)] for sentence in sentences]
+    document_frequency: Dict[str, int] = {}
+    for terms in tokenized:
+        for term in set(terms):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    # Terms found in one sentence only cannot link two sentences
+    shared = sorted((term for term, count in document_frequency.items() if count > 1), key=document_frequency.get, reverse=True)
+    vocabulary = {term: column for column, term in enumerate(shared[:SUMMARY_MAX_TERMS])}
+
+    matrix = np.zeros((len(sentences), max(len(vocabulary), 1)), dtype=np.float32)
+    rows, columns = [], []
+    for row, terms in enumerate(tokenized):
+        for term in terms:
+            column = vocabulary.get(term)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+    np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1.0)
+
+    idf = np.zeros(matrix.shape[1], dtype=np.float32)
+    for term, column in vocabulary.items():
+        idf[column] = math.log(len(sentences) / document_frequency[term]) + 1.0
+    matrix = np.log1p(matrix) * idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def textrank_scores(sentences: List[str]) -> "np.ndarray":
+    """
+    Ranks sentences by TextRank: PageRank over the graph of their TF-IDF cosine similarities.
+
+    Raises:
+        ValueError: If NumPy is not installed
+    """
+    if np is None:
+        raise ValueError("NumPy is not installed for extractive summaries.")
+    count = len(sentences)
+    if count <= 2:
+        return np.full(count, 1.0 / max(count, 1))
+
+    vectors = _tfidf_matrix(sentences)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    weights = similarity.sum(axis=1)
+    # Sentences sharing no term with any other link to all of them evenly
+    transition = np.divide(similarity, weights[:, None], out=np.full_like(similarity, 1.0 / count), where=weights[:, None] > 0)
+
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(SUMMARY_MAX_ITERATIONS):
+        updated = (1.0 - SUMMARY_DAMPING) / count + SUMMARY_DAMPING * (scores @ transition)
+        converged = np.abs(updated - scores).sum() < SUMMARY_TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def _select(sentences: List[str], tokens: List[int], budget: int) -> List[int]:
+    """Positions of the best ranked sentences that fit the token budget."""
+    scores = textrank_scores(sentences)
+    for position, sentence in enumerate(sentences):
+        if len(sentence.split()) < SUMMARY_MIN_SENTENCE_WORDS:
+            scores[position] = -1.0
+    chosen = []
+    used = 0
+    for position in np.argsort(-scores, kind='stable'):
+        if scores[position] < 0:
+            break
+        if used + tokens[position] <= budget:
+            chosen.append(int(position))
+            used += tokens[position]
+    return chosen
+
+
+def summarize_text(text: str, max_tokens: int) -> str:
+    """
+    Shrinks text to about max_tokens by keeping its most central sentences in their
+    original order, with a gap marker where sentences were left out. Text within the
+    budget is returned unchanged.
+
+    Long texts are ranked in blocks of SUMMARY_BLOCK_SENTENCES, each getting a share of
+    the budget proportional to its length, so time and memory stay bounded.
+
+    Raises:
+        ValueError: If NumPy is not installed
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = split_sentences(text)
+    tokens = [estimate_tokens(sentence) + 1 for sentence in sentences]
+    total = sum(tokens) or 1
+
+    chosen: List[int] = []
+    for start in range(0, len(sentences), SUMMARY_BLOCK_SENTENCES):
+        end = start + SUMMARY_BLOCK_SENTENCES
+        budget = max_tokens * sum(tokens[start:end]) // total
+        chosen.extend(start + position for position in _select(sentences[start:end], tokens[start:end], budget))
+
+    parts = []
+    previous = -1
+    for position in sorted(chosen):
+        if position != previous + 1:
+            parts.append(SUMMARY_GAP_MARKER)
+        parts.append(sentences[position])
+        previous = position
+    if previous != len(sentences) - 1:
+        parts.append(SUMMARY_GAP_MARKER)
+    if len(parts) == 1:
+        # No complete sentence fits, e.g. text without punctuation or line breaks
+        return text[:int(max_tokens * NON_ASCII_CHARS_PER_TOKEN)] + f" {SUMMARY_GAP_MARKER}"
+    return ' '.join(parts)
+
+
+class SummaryCache:
+    """Bounded LRU of summaries keyed by the SHA-256 of the text and the target size."""
+
+    def __init__(self, max_entries: int = SUMMARY_CACHE_MAX_ENTRIES):
+        self._entries: BoundedLRU[str] = BoundedLRU(max_entries)
+
+    def summarize(self, text: str, max_tokens: int) -> str:
+        """summarize_text(), computed once per distinct text and size."""
+        return self._entries.get_or_compute((text_key(text), max_tokens), lambda: summarize_text(text, max_tokens))
+
+
+summary_cache = SummaryCache()
+
+
+def fit_to_budget(texts: List[str], max_tokens: int, cache: Optional[SummaryCache] = None) -> List[str]:
+    """
+    Shrinks texts so together they fit max_tokens. Texts smaller than an even share are
+    kept whole and the rest of the budget is split evenly among the larger ones, which
+    are summarized down to their share.
+    """
+    cache = cache or summary_cache
+    sizes = [estimate_tokens(text) for text in texts]
+    if sum(sizes) <= max_tokens:
+        return list(texts)
+    remaining = max_tokens
+    oversized = sorted(range(len(texts)), key=sizes.__getitem__)
+    while oversized:
+        even_share = remaining // len(oversized)
+        if sizes[oversized[0]] > even_share:
+            break
+        position = oversized.pop(0)
+        remaining -= sizes[position]
+    share = {position: remaining // len(oversized) for position in oversized}
+    for position in oversized:
+        logger.info(f"Summarizing document {position} from ~{sizes[position]} to ~{share[position]} tokens.")
+    return [cache.summarize(text, share[position]) if position in share else text for position, text in enumerate(texts)]
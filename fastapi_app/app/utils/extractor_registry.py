@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import importlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+_import_lock = threading.Lock()
+_MISSING = object()
+
+
+class LazyImport:
+    """
+    Optional dependency that is imported on first use instead of at module import time.
+
+    Behaves like the module (or module attribute) it stands for: attribute access and
+    calls are forwarded, and truth testing reports whether the library is installed,
+    so existing `if not fitz:` checks keep working. Attributes are looked up on every
+    access, which keeps `unittest.mock.patch('fitz.open')` style patches effective.
+
+    Args:
+        module: Dotted module name, e.g. 'fitz' or 'odf.opendocument'
+        attribute: Optional attribute of the module to stand for, e.g. 'load'
+    """
+
+    def __init__(self, module: str, attribute: Optional[str] = None):
+        self._module_name = module
+        self._attribute = attribute
+        self._module: Any = _MISSING
+
+    def _load_module(self) -> Any:
+        if self._module is _MISSING:
+            with _import_lock:
+                if self._module is _MISSING:
+                    try:
+                        self._module = importlib.import_module(self._module_name)
+                        logger.debug(f"Lazily imported {self._module_name}")
+                    except ImportError:
+                        self._module = None
+                    except Exception as e:
+                        # Some libraries fail on import when system dependencies are missing
+                        logger.warning(f"{self._module_name} is installed, but could not be imported: {e}")
+                        self._module = None
+        return self._module
+
+    def resolve(self) -> Any:
+        """Returns the module or attribute, or None if the library is not installed."""
+        module = self._load_module()
+        if module is None or self._attribute is None:
+            return module
+        return getattr(module, self._attribute, None)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether an import has been attempted."""
+        return self._module is not _MISSING
+
+    def __bool__(self) -> bool:
+        return self.resolve() is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('__'):
+            raise AttributeError(name)
+        target = self.resolve()
+        if target is None:
+            raise ImportError(f"Optional dependency '{self._module_name}' is not installed.")
+        return getattr(target, name)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        target = self.resolve()
+        if target is None:
+            raise ImportError(f"Optional dependency '{self._module_name}' is not installed.")
+        return target(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        name = f"{self._module_name}.{self._attribute}" if self._attribute else self._module_name
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyImport {name} ({state})>"
+
+
+# Extractor signature: (file_content, mime_type, max_chars, options) -> fragment iterator
+Extractor = Callable[[bytes, str, Optional[int], Dict[str, Any]], Iterator[Any]]
+
+
+class ExtractorPlugin:
+    """
+    Text extractor for a family of MIME types.
+
+    Args:
+        name: Short plugin name used in logs
+        mime_types: Exact MIME types handled by the plugin
+        extract: Callable returning a fragment iterator
+        mime_prefixes: MIME type prefixes handled by the plugin (e.g. 'image/')
+        requires: Lazy dependencies the plugin needs, used to report availability
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mime_types: Sequence[str],
+        extract: Extractor,
+        mime_prefixes: Sequence[str] = (),
+        requires: Sequence[LazyImport] = ()
+    ):
+        self.name = name
+        self.mime_types = tuple(mime_types)
+        self.mime_prefixes = tuple(mime_prefixes)
+        self.extract = extract
+        self.requires = tuple(requires)
+
+    def is_available(self) -> bool:
+        """Imports the plugin dependencies and reports whether all of them are installed."""
+        return all(self.requires)
+
+
+class ExtractorRegistry:
+    """Registry of extractor plugins keyed by MIME type (exact match first, then prefix)."""
+
+    def __init__(self):
+        self._by_mime: Dict[str, ExtractorPlugin] = {}
+        self._by_prefix: List[ExtractorPlugin] = []
+
+    def register(
+        self,
+        name: str,
+        mime_types: Sequence[str] = (),
+        mime_prefixes: Sequence[str] = (),
+        requires: Sequence[LazyImport] = ()
+    ) -> Callable[[Extractor], Extractor]:
+        """Decorator registering an extractor function for the given MIME types."""
+        def decorator(extract: Extractor) -> Extractor:
+            plugin = ExtractorPlugin(name, mime_types, extract, mime_prefixes, requires)
+            for mime_type in plugin.mime_types:
+                if mime_type in self._by_mime:
+                    logger.warning(f"Extractor '{name}' replaces '{self._by_mime[mime_type].name}' for {mime_type}")
+                self._by_mime[mime_type] = plugin
+            if plugin.mime_prefixes:
+                self._by_prefix.append(plugin)
+            return extract
+        return decorator
+
+    def get(self, mime_type: str) -> Optional[ExtractorPlugin]:
+        """Returns the plugin handling the MIME type, or None."""
+        plugin = self._by_mime.get(mime_type)
+        if plugin is not None:
+            return plugin
+        for plugin in self._by_prefix:
+            if mime_type.startswith(plugin.mime_prefixes):
+                return plugin
+        return None
+
+    def plugins(self) -> List[ExtractorPlugin]:
+        """Returns all registered plugins in registration order."""
+        seen = []
+        for plugin in list(self._by_mime.values()) + self._by_prefix:
+            if plugin not in seen:
+                seen.append(plugin)
+        return seen
+
+
+extractor_registry = ExtractorRegistry()
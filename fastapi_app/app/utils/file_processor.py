@@ -1,117 +1,73 @@
 # -*- coding: utf-8 -*-
 import os
 import base64
-import tempfile
+import csv
+import json
 import traceback
 import io
 import logging
-import magic
 import hashlib
-# import clamd  # Commented out - optional virus scanning
-from typing import Tuple, Optional, Dict, Any
+import time
+import zipfile
+from functools import partial
+from typing import Tuple, Optional, Dict, Any, Callable, Iterable, Iterator, List
 from pathlib import Path
 
-# File processing dependencies
-try:
-    import fitz  # type: ignore # PyMuPDF
-except ImportError:
-    fitz = None
-
-try:
-    import ocrmypdf # type: ignore
-    # Check if Tesseract is available for ocrmypdf
-    # ocrmypdf.check() # Can raise exception if Tesseract is missing
-except ImportError:
-    ocrmypdf = None
-except Exception as ocr_check_e:
-     logging.warning(f"ocrmypdf is installed, but there was a problem checking dependencies (e.g., Tesseract): {ocr_check_e}")
-     ocrmypdf = None # Treat as unavailable if system dependencies are not met
-
-try:
-    from PIL import Image
-    import pytesseract
-except ImportError:
-    Image = None
-    pytesseract = None # Handle missing libraries
-
-try:
-    import markdown
-    from bs4 import BeautifulSoup
-except ImportError:
-    markdown = None
-    BeautifulSoup = None # Handle missing libraries
-
-try:
-    import openpyxl  # Excel .xlsx
-except ImportError:
-    openpyxl = None
-
-try:
-    import xlrd  # Excel .xls
-except ImportError:
-    xlrd = None
-
-try:
-    from pptx import Presentation  # PowerPoint
-except ImportError:
-    Presentation = None
-
-try:
-    from striprtf.striprtf import rtf_to_text  # RTF
-except ImportError:
-    rtf_to_text = None
-
-try:
-    import rarfile  # RAR archives
-except ImportError:
-    rarfile = None
-
-try:
-    from odf import text, teletype
-    from odf.opendocument import load
-except ImportError:
-    text = None
-    teletype = None
-    load = None
-
-try:
-    from defusedxml import ElementTree as safe_ET
-    import xml.dom.minidom
-    from lxml import etree
-except ImportError:
-    safe_ET = None
-    etree = None
-
-try:
-    from ebooklib import epub
-    from ebooklib.utils import debug
-except ImportError:
-    epub = None
-
-try:
-    import html2text
-    from readability import Document
-    import html5lib
-except ImportError:
-    html2text = None
-    Document = None
-
-try:
-    import xmltodict
-    import cssselect
-except ImportError:
-    xmltodict = None
-    cssselect = None
+from .ocr_cache import get_ocr_cache
+from .extraction_io import as_binary_stream, as_buffer, map_file, scratch_file
+from .extraction_pool import map_ordered
+from .extraction_stream import TRUNCATED_NOTE_TITLE, TextFragment, consume_fragments, join_fragments
+from .extractor_registry import LazyImport, extractor_registry
+from .text_encoding import decode_text, open_text_stream
+from .mime_detection import detect_mime_type
+from .structured_text import StructuredText
+from .extraction_sandbox import SANDBOX_ENABLED, run_sandboxed
+from .extraction_progress import ProgressCallback, progress_reporting, report_progress
+from .cost_estimation import UploadProfile, inspect_upload, timing_model
+from .extraction_profiles import ExtractionProfile, get_extraction_profile
+from .malware_scan import get_malware_scanner
+from .document_digest import compute_document_digest
+
+# File processing dependencies, imported on first use to keep worker start-up fast
+fitz = LazyImport('fitz') # PyMuPDF
+ocrmypdf = LazyImport('ocrmypdf')
+Image = LazyImport('PIL.Image')
+pytesseract = LazyImport('pytesseract')
+markdown = LazyImport('markdown')
+BeautifulSoup = LazyImport('bs4', 'BeautifulSoup')
+openpyxl = LazyImport('openpyxl') # Excel .xlsx
+xlrd = LazyImport('xlrd') # Excel .xls
+Presentation = LazyImport('pptx', 'Presentation') # PowerPoint
+rtf_to_text = LazyImport('striprtf.striprtf', 'rtf_to_text') # RTF
+text = LazyImport('odf.text')
+teletype = LazyImport('odf.teletype')
+load = LazyImport('odf.opendocument', 'load')
+safe_ET = LazyImport('defusedxml.ElementTree')
+etree = LazyImport('lxml.etree')
+html2text = LazyImport('html2text')
+Document = LazyImport('readability', 'Document')
+xmltodict = LazyImport('xmltodict')
+cssselect = LazyImport('cssselect')
+
+# Internal modules depending on NumPy
+image_preprocessing = LazyImport(f'{__package__}.image_preprocessing')
+html_extraction = LazyImport(f'{__package__}.html_extraction')
+epub_pipeline = LazyImport(f'{__package__}.epub_pipeline')
+xml_stream = LazyImport(f'{__package__}.xml_stream')
+archive_extraction = LazyImport(f'{__package__}.archive_extraction')
+tabular_profile = LazyImport(f'{__package__}.tabular_profile')
 
 # Logger configuration
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Constants (could be moved to config)
-MAX_DOCUMENT_CHARS = 4000 # Max characters returned from a file
+MAX_DOCUMENT_CHARS = 50000 # Max characters returned from a file, extraction stops once reached
 MAX_PDF_SIZE_MB = 10  # Max PDF file size in MB
 MAX_IMAGE_SIZE_MB = 10 # Max Image file size in MB
 MAX_BASE64_SIZE_MB = 15 # Max size for base64 encoded data (~11MB binary)
+OCR_LANGUAGES = 'eng+pol' # Tesseract languages used for OCR
+PDF_OCR_DPI = 300 # Resolution used when rasterizing PDF pages for OCR (image_preprocessing.OCR_TARGET_DPI)
 
 ALLOWED_MIME_TYPES = [
     'text/plain',
@@ -141,17 +97,33 @@ ALLOWED_MIME_TYPES = [
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
+# Spreadsheet/CSV budgets: extraction stops once any of them is reached
+MAX_SPREADSHEET_ROWS = 10000 # Max non-empty rows across all sheets
+MAX_SPREADSHEET_COLUMNS = 100 # Columns beyond this are dropped from every row
+MAX_SPREADSHEET_CHARS = 200000 # Max characters of tabular text
+CSV_SNIFF_BYTES = 64 * 1024 # Sample used to detect the CSV dialect
+
+TABULAR_MIME_TYPES = [
+    'application/vnd.ms-excel',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'text/csv',
+]
+TABULAR_MODES = ('rows', 'summary') # 'rows' dumps cell text, 'summary' sends a statistical profile
+HTML_PARSERS = ('lxml', 'html5lib') # 'lxml' is fast and strips boilerplate, 'html5lib' parses like a browser
+DEFAULT_HTML_PARSER = 'lxml'
+ARCHIVE_MODES = ('list', 'extract') # 'list' returns member names, 'extract' also extracts supported members
+
 # --- File Processing Functions ---
 
-def _run_ocr_on_pdf(input_pdf_path: str, output_pdf_path: str) -> bool:
-    """Runs OCR on a PDF file using ocrmypdf."""
+def _run_ocr_on_pdf(input_pdf_path: str, output_pdf_path: str, languages: Optional[str] = None) -> bool:
+    """Runs OCR on a PDF file using ocrmypdf (languages defaults to OCR_LANGUAGES)."""
     if not ocrmypdf:
         logger.warning("ocrmypdf library is not available. Skipping OCR for PDF.")
         return False
     try:
         logger.info(f"Running OCR on PDF file: {input_pdf_path}")
-        # Use English and Polish languages, force OCR
-        result = ocrmypdf.ocr(input_pdf_path, output_pdf_path, language='eng+pol', force_ocr=True, progress_bar=False)
+        # Force OCR: this only runs when no page had a usable text layer
+        result = ocrmypdf.ocr(input_pdf_path, output_pdf_path, language=languages or OCR_LANGUAGES, force_ocr=True, progress_bar=False)
         if result == 0: # ocrmypdf returns 0 on success
              logger.info(f"OCR completed successfully for: {input_pdf_path}")
              return True
@@ -166,90 +138,151 @@ def _run_ocr_on_pdf(input_pdf_path: str, output_pdf_path: str) -> bool:
         logger.error(f"Error during OCR on PDF {input_pdf_path}: {ocr_e}", exc_info=True)
         return False # Return False to attempt extraction without OCR
 
-def safe_extract_text_from_pdf(pdf_data: bytes) -> str:
-    """Safely extracts text from PDF data using PyMuPDF, with OCR fallback."""
+def _ocr_image(image: "Image.Image", preprocessing_options: Optional[Dict[str, Any]] = None, languages: Optional[str] = None) -> str:
+    """Runs Tesseract on a PIL image after OCR pre-processing, reusing cached results for identical pages."""
+    languages = languages or OCR_LANGUAGES
+    try:
+        image = image_preprocessing.preprocess_image_for_ocr(image, preprocessing_options)
+    except Exception as prep_e:
+        # Pre-processing is an optimization, OCR the original image if it fails
+        logger.warning(f"OCR pre-processing failed, using the original image: {prep_e}")
+
+    cache = get_ocr_cache()
+    cache_key = None
+    if cache:
+        try:
+            cache_key = cache.make_key(image, languages)
+            cached_text = cache.get(cache_key)
+            if cached_text is not None:
+                logger.info("OCR cache hit, skipping Tesseract.")
+                return cached_text
+        except Exception as cache_e:
+            logger.warning(f"OCR cache lookup failed: {cache_e}")
+            cache_key = None
+
+    text = pytesseract.image_to_string(image, lang=languages)
+    if cache and cache_key:
+        cache.put(cache_key, text)
+    return text
+
+def _ocr_pdf_page(page: Any, preprocessing_options: Optional[Dict[str, Any]] = None, languages: Optional[str] = None) -> str:
+    """Rasterizes a PyMuPDF page and runs OCR on it. Raises ValueError if Tesseract is missing."""
+    try:
+        pixmap = page.get_pixmap(dpi=PDF_OCR_DPI, colorspace=fitz.csGRAY, alpha=False)
+        image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+        image.info['dpi'] = (PDF_OCR_DPI, PDF_OCR_DPI)
+        return _ocr_image(image, preprocessing_options, languages)
+    except pytesseract.TesseractNotFoundError:
+        logger.error("Tesseract OCR is not installed or not found in PATH.")
+        raise ValueError("OCR engine (Tesseract) not found for PDF processing.")
+
+def _iter_ocrmypdf_pages(pdf_data: bytes, languages: Optional[str] = None, max_pages: Optional[int] = None) -> Iterator[TextFragment]:
+    """Runs ocrmypdf over the whole document and yields the text of the OCR-processed pages."""
+    try:
+        # ocrmypdf drives Tesseract through files, so give it RAM-backed scratch paths
+        with scratch_file(pdf_data, suffix=".pdf") as temp_input_path, \
+             scratch_file(suffix=".pdf", reserve_bytes=len(pdf_data)) as temp_output_path:
+            # Run OCR
+            ocr_success = _run_ocr_on_pdf(temp_input_path, temp_output_path, languages)
+            if not ocr_success or os.path.getsize(temp_output_path) == 0:
+                # If OCR fails, still return empty text but log the error
+                logger.error(f"OCR failed or output file is empty: {temp_output_path}")
+                return
+
+            # Read text from the OCR-processed file using PyMuPDF
+            with fitz.open(temp_output_path) as doc_ocr:
+                for page_num in range(min(len(doc_ocr), max_pages or len(doc_ocr))):
+                    page_text = doc_ocr.load_page(page_num).get_text("text")
+                    if page_text.strip():
+                        yield TextFragment(page_text.strip(), 'page', page_num + 1)
+    except ValueError:
+        raise
+    except Exception as ocr_pipeline_e:
+        # If OCR fails, still return empty text but log the error
+        logger.error(f"Error in OCR pipeline for PDF: {ocr_pipeline_e}", exc_info=True)
+
+def iter_extract_text_from_pdf(
+    pdf_data: bytes,
+    preprocessing_options: Optional[Dict[str, Any]] = None,
+    ocr: bool = True,
+    ocr_languages: Optional[str] = None,
+    max_pages: Optional[int] = None,
+    max_size_mb: Optional[int] = None
+) -> Iterator[TextFragment]:
+    """
+    Yields the text of each PDF page using PyMuPDF, with OCR fallback.
+
+    Pages without a text layer are rasterized and OCRed individually when pytesseract
+    is available; otherwise ocrmypdf processes the whole document if no page had text.
+
+    Args:
+        pdf_data: PDF content in bytes
+        preprocessing_options: OCR pre-processing options (see image_preprocessing)
+        ocr: False to read text layers only and skip pages without one
+        ocr_languages: Tesseract languages, defaults to OCR_LANGUAGES
+        max_pages: Read at most this many pages; a note fragment marks the pages left out
+        max_size_mb: Size limit of the PDF, defaults to MAX_PDF_SIZE_MB
+    """
     if not fitz:
         # fitz is a core dependency, so RuntimeError is appropriate here
         raise RuntimeError("Required library PyMuPDF (fitz) is not installed.")
 
-    text = ""
-    temp_input_path = None
-    temp_output_path = None
-
     try:
         # Check file size
         file_size_mb = len(pdf_data) / (1024 * 1024)
-        if file_size_mb > MAX_PDF_SIZE_MB:
-            raise ValueError(f"PDF file is too large. Maximum size is {MAX_PDF_SIZE_MB} MB.")
+        max_size_mb = max_size_mb or MAX_PDF_SIZE_MB
+        if file_size_mb > max_size_mb:
+            raise ValueError(f"PDF file is too large. Maximum size is {max_size_mb} MB.")
+
+        page_ocr_available = ocr and bool(Image and pytesseract)
+        pages_with_text = 0
+        page_count = 0
+        pages_read = 0
+        document_opened = False
 
-        # 1. Try text extraction using PyMuPDF
+        # 1. Extract the text layer page by page, OCR pages that have none
         try:
-            with fitz.open(stream=pdf_data, filetype="pdf") as doc:
-                for page_num in range(len(doc)):
+            with fitz.open(stream=as_buffer(pdf_data), filetype="pdf") as doc:
+                document_opened = True
+                page_count = len(doc)
+                pages_read = min(page_count, max_pages or page_count)
+                report_progress('text_layer', 0, pages_read)
+                for page_num in range(pages_read):
                     page = doc.load_page(page_num)
                     page_text = page.get_text("text") # Extract plain text
-                    if page_text:
-                        text += page_text + "\n\n"
-            logger.info(f"PyMuPDF: Extracted {len(text)} characters of text.")
+                    stage = 'text_layer'
+                    if not page_text.strip() and page_ocr_available:
+                        logger.info(f"Page {page_num + 1} has no text layer. Running OCR...")
+                        stage = 'ocr'
+                        report_progress(stage, page_num, pages_read)
+                        page_text = _ocr_pdf_page(page, preprocessing_options, ocr_languages)
+                    report_progress(stage, page_num + 1, pages_read)
+                    if page_text.strip():
+                        pages_with_text += 1
+                        yield TextFragment(page_text.strip(), 'page', page_num + 1)
+            logger.info(f"PyMuPDF: Extracted text from {pages_with_text} page(s).")
+        except ValueError:
+            raise
         except Exception as fitz_e:
-             logger.warning(f"Error during text extraction by PyMuPDF: {fitz_e}. Attempting OCR...")
-             text = "" # Reset text if PyMuPDF failed
-
-        # 2. If text is empty or insufficient, try OCR
-        if not text.strip():
+            logger.warning(f"Error during text extraction by PyMuPDF: {fitz_e}. Attempting OCR...")
+            document_opened = False
+
+        # 2. If no page yielded text and page-wise OCR could not run, OCR the whole file
+        if pages_with_text == 0 and not ocr:
+            logger.info("PDF has no text layer and OCR is disabled.")
+            yield TextFragment("[No text layer found; OCR is disabled by the extraction profile]", 'note', 1)
+        elif pages_with_text == 0 and not (document_opened and page_ocr_available):
             if ocrmypdf:
                 logger.warning("Text extracted by PyMuPDF is empty/insufficient. Attempting OCR with ocrmypdf...")
-                try:
-                    # Write data to temporary input file
-                    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_in:
-                        temp_in.write(pdf_data)
-                        temp_input_path = temp_in.name
-
-                    # Create path for temporary output file
-                    temp_output_fd, temp_output_path = tempfile.mkstemp(suffix=".pdf")
-                    os.close(temp_output_fd) # Close file descriptor
-
-                    # Run OCR
-                    ocr_success = _run_ocr_on_pdf(temp_input_path, temp_output_path)
-
-                    if ocr_success and os.path.exists(temp_output_path):
-                        # Read text from the OCR-processed file using PyMuPDF
-                        text = "" # Reset text
-                        with fitz.open(temp_output_path) as doc_ocr:
-                            for page_num in range(len(doc_ocr)):
-                                page = doc_ocr.load_page(page_num)
-                                page_text = page.get_text("text")
-                                if page_text:
-                                    text += page_text + "\n\n"
-                        logger.info(f"OCR: Extracted {len(text)} characters after OCR.")
-                    else:
-                         logger.error(f"OCR failed or output file does not exist: {temp_output_path}")
-                         # If OCR fails, still return empty text but log the error
-                         text = ""
-
-                except Exception as ocr_pipeline_e:
-                     logger.error(f"Error in OCR pipeline for PDF: {ocr_pipeline_e}", exc_info=True)
-                     # If OCR fails, still return empty text but log the error
-                     text = ""
-                finally:
-                     # Clean up temporary files
-                     if temp_input_path and os.path.exists(temp_input_path):
-                         try: os.unlink(temp_input_path)
-                         except OSError: logger.warning(f"Could not delete temporary file: {temp_input_path}")
-                     if temp_output_path and os.path.exists(temp_output_path):
-                         try: os.unlink(temp_output_path)
-                         except OSError: logger.warning(f"Could not delete temporary file: {temp_output_path}")
-            else: # if ocrmypdf is not available
-                 # If ocrmypdf is not available and text is empty, raise an error
-                 logger.warning("Text extracted by PyMuPDF is empty, and ocrmypdf is not available for OCR fallback.")
-                 raise ValueError("Could not extract text from PDF. OCR library (ocrmypdf) is not available.")
-
-        # Final check if we have any text (after attempting OCR or if OCR wasn't needed/available)
-        if not text.strip():
-             logger.warning("Failed to extract meaningful text from PDF using PyMuPDF and OCR (if attempted).")
-             # Return empty string if nothing found. Error is raised above if OCR was needed but unavailable.
+                report_progress('ocr')
+                yield from _iter_ocrmypdf_pages(pdf_data, ocr_languages, max_pages)
+            elif not page_ocr_available:
+                # If no OCR library is available and text is empty, raise an error
+                logger.warning("Text extracted by PyMuPDF is empty, and no OCR library is available for OCR fallback.")
+                raise ValueError("Could not extract text from PDF. OCR libraries (pytesseract, ocrmypdf) are not available.")
 
-        return text.strip()
+        if pages_read < page_count:
+            yield TextFragment(f"[Page limit: read {pages_read} of {page_count} pages]", 'note', 1)
 
     except (ValueError, RuntimeError) as e: # Catch specific errors first
         logger.error(f"Error processing PDF: {e}", exc_info=True)
@@ -259,36 +292,40 @@ def safe_extract_text_from_pdf(pdf_data: bytes) -> str:
         logger.error(f"Unexpected error processing PDF: {e}", exc_info=True)
         raise RuntimeError(f"Unexpected server error processing PDF: {e}") from e
 
+def safe_extract_text_from_pdf(pdf_data: bytes, preprocessing_options: Optional[Dict[str, Any]] = None) -> str:
+    """Safely extracts text from PDF data using PyMuPDF, with OCR fallback."""
+    text = join_fragments(iter_extract_text_from_pdf(pdf_data, preprocessing_options), '\n\n')
+    if not text:
+        logger.warning("Failed to extract meaningful text from PDF using PyMuPDF and OCR (if attempted).")
+    return text
+
 
-def safe_extract_text_from_image(image_data: bytes) -> str:
+def iter_extract_text_from_image(
+    image_data: bytes,
+    preprocessing_options: Optional[Dict[str, Any]] = None,
+    ocr_languages: Optional[str] = None
+) -> Iterator[TextFragment]:
+    """Yields the OCR text of an image as a single fragment."""
+    report_progress('ocr', 0, 1)
+    text = safe_extract_text_from_image(image_data, preprocessing_options, ocr_languages)
+    report_progress('ocr', 1, 1)
+    if text.strip():
+        yield TextFragment(text, 'image', 1)
+
+def safe_extract_text_from_image(image_data: bytes, preprocessing_options: Optional[Dict[str, Any]] = None, ocr_languages: Optional[str] = None) -> str:
     """Safely extracts text from image data using OCR. Raises ValueError on OCR/dependency errors."""
     if not Image or not pytesseract:
         # Change to ValueError
         raise ValueError("Image processing libraries (Pillow, pytesseract) are not installed.")
 
     text = ""
-    suffix = '.png' # Default
-    temp_path = None
 
     try:
-        # Check image format to use correct extension for temporary file
-        try:
-            img_check = Image.open(io.BytesIO(image_data))
-            if img_check.format:
-                suffix = f'.{img_check.format.lower()}'
-        except Exception:
-            logger.warning("Could not determine image format, using default .png")
-
-        # Write data to temporary file
-        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
-            temp_file.write(image_data)
-            temp_path = temp_file.name
-
-        # Perform OCR
-        image = Image.open(temp_path)
+        # Perform OCR on the decoded image, pre-processing happens in memory
+        image = Image.open(io.BytesIO(image_data))
         # Ensure Tesseract path is set (can be done globally)
         # if os.getenv('TESSERACT_CMD'): pytesseract.pytesseract.tesseract_cmd = os.getenv('TESSERACT_CMD')
-        text = pytesseract.image_to_string(image, lang='eng+pol') # Added Polish
+        text = _ocr_image(image, preprocessing_options, ocr_languages)
         logger.info(f"Successfully performed OCR for image (size: {len(image_data)} B).")
 
     except pytesseract.TesseractNotFoundError:
@@ -299,13 +336,6 @@ def safe_extract_text_from_image(image_data: bytes) -> str:
         logger.error(f"Error during image OCR processing: {e}", exc_info=True)
         # Raise as ValueError for consistency
         raise ValueError(f"Error during image OCR processing: {e}") from e
-    finally:
-        # Delete temporary file
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-            except OSError as unlink_e:
-                logger.warning(f"Could not delete temporary OCR file: {temp_path}. Error: {unlink_e}")
     return text
 
 def safe_extract_text_from_markdown(md_data: bytes) -> str:
@@ -314,7 +344,7 @@ def safe_extract_text_from_markdown(md_data: bytes) -> str:
          # Change to ValueError
          raise ValueError("Markdown processing libraries (Markdown, beautifulsoup4) are not installed.")
     try:
-        md_text = md_data.decode('utf-8') # Assume UTF-8 for Markdown
+        md_text = decode_text(md_data).text
         html = markdown.markdown(md_text)
         # Use html.parser as the parser, it's built-in
         soup = BeautifulSoup(html, 'html.parser')
@@ -324,33 +354,39 @@ def safe_extract_text_from_markdown(md_data: bytes) -> str:
         logger.error(f"Error processing Markdown file: {e}", exc_info=True)
         raise ValueError(f"Error processing Markdown file: {e}") from e
 
-def safe_extract_text_from_txt(txt_data: bytes) -> str:
-    """Safely reads text from TXT data. Raises ValueError on errors."""
-    encodings_to_try = ['utf-8', 'latin-1', 'cp1250', 'cp1252'] # List of encodings to try
-    for encoding in encodings_to_try:
-        try:
-            return txt_data.decode(encoding)
-        except UnicodeDecodeError:
-            continue # Try next encoding
-        except Exception as e:
-             logger.error(f"Unexpected error decoding TXT as {encoding}: {e}", exc_info=True)
-             raise ValueError(f"Error reading text file: {e}") from e # Raise error if not UnicodeDecodeError
+def safe_extract_text_from_txt(txt_data: bytes, max_chars: Optional[int] = None) -> str:
+    """
+    Safely reads text from TXT data. Raises ValueError on errors.
 
-    # If no encoding worked
-    logger.error("Could not decode text file using standard encodings.")
-    raise ValueError(f"Could not decode text file (tried: {', '.join(encodings_to_try)}).")
+    The encoding is detected from a bounded prefix (BOM, UTF-8 validity, Central/Western
+    European code page heuristics) and the data is decoded once, incrementally.
+    With max_chars, decoding stops shortly after that many characters.
+    """
+    try:
+        decoded = decode_text(txt_data, max_chars=max_chars)
+    except (UnicodeDecodeError, LookupError) as e:
+        logger.error(f"Could not decode text file: {e}", exc_info=True)
+        raise ValueError(f"Could not decode text file: {e}") from e
+    logger.debug(f"Text file decoded as {decoded.encoding}.")
+    return decoded.text
 
 def validate_file_type_and_scan(filename: str, content: str) -> Tuple[bool, str, str]:
     """
     Validate file type and scan content with enhanced processing options.
+
+    The content is scanned with clamd when malware scanning is enabled (see malware_scan).
     """
     try:
         decoded_content = base64.b64decode(content)
-        mime_type = magic.from_buffer(decoded_content, mime=True)
+        mime_type = detect_mime_type(decoded_content, filename)
 
         if mime_type not in ALLOWED_MIME_TYPES:
             raise ValueError(f"Unsupported file type: {mime_type}")
 
+        scanner = get_malware_scanner()
+        if scanner:
+            scanner.check(decoded_content)
+
         # Process content based on MIME type with default options
         if mime_type in ['text/html', 'application/xhtml+xml']:
             processed_content = safe_extract_text_from_html(decoded_content)
@@ -370,8 +406,109 @@ def validate_file_type_and_scan(filename: str, content: str) -> Tuple[bool, str,
         logging.error(f"Processing error: {str(e)}")
         raise RuntimeError(f"Failed to process file: {str(e)}")
 
-def safe_extract_text_from_excel(excel_data: bytes, mime_type: str) -> str:
-    """Safely extracts text from Excel files (.xlsx and .xls)."""
+def _resolve_table_limits(limits: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """Merges caller limits over the default spreadsheet budgets."""
+    resolved = {
+        'max_rows': MAX_SPREADSHEET_ROWS,
+        'max_columns': MAX_SPREADSHEET_COLUMNS,
+        'max_chars': MAX_SPREADSHEET_CHARS,
+    }
+    if limits:
+        resolved.update({key: value for key, value in limits.items() if value is not None})
+    return resolved
+
+def _append_table_rows(
+    sheet_name: str,
+    rows: Iterable[Iterable[Any]],
+    limits: Dict[str, int],
+    state: Dict[str, Any],
+    lines: List[str]
+) -> bool:
+    """
+    Appends rows of one sheet as ' | ' separated text until a budget is reached.
+
+    Args:
+        sheet_name: Sheet name used in the header line and truncation notes
+        rows: Iterable of row value sequences (consumed lazily)
+        limits: Resolved budgets (max_rows, max_columns, max_chars)
+        state: Running totals shared across sheets ('rows', 'chars', 'truncated')
+        lines: Output lines
+
+    Returns:
+        bool: True if a budget was exhausted and no further sheets should be read
+    """
+    header = f"Sheet: {sheet_name}"
+    lines.append(header)
+    state['chars'] += len(header) + 1
+    columns_truncated = False
+
+    for row_number, row in enumerate(rows, 1):
+        values = list(row)
+        if len(values) > limits['max_columns']:
+            values = values[:limits['max_columns']]
+            columns_truncated = True
+        row_text = ' | '.join('' if value is None else str(value) for value in values)
+        if not row_text.strip(' |'):
+            continue
+
+        reason = None
+        if state['rows'] >= limits['max_rows']:
+            reason = 'row limit'
+        elif state['chars'] + len(row_text) + 1 > limits['max_chars']:
+            reason = 'character limit'
+        if reason:
+            state['truncated'].append({'sheet': sheet_name, 'row': row_number, 'reason': reason})
+            lines.append(f"[Truncated: sheet '{sheet_name}' at row {row_number} ({reason})]")
+            return True
+
+        lines.append(row_text)
+        state['rows'] += 1
+        state['chars'] += len(row_text) + 1
+
+    if columns_truncated:
+        state['truncated'].append({'sheet': sheet_name, 'row': None, 'reason': 'column limit'})
+        lines.append(f"[Truncated: sheet '{sheet_name}' columns beyond {limits['max_columns']} omitted]")
+    return False
+
+def _table_truncation_note(state: Dict[str, Any], skipped_sheets: List[str]) -> Optional[str]:
+    """Logs what was truncated and returns a note for skipped sheets, if any."""
+    if state['truncated'] or skipped_sheets:
+        logger.info(f"Tabular extraction truncated: {state['truncated']}, skipped sheets: {skipped_sheets}")
+    if skipped_sheets:
+        return f"[Not extracted: sheets {', '.join(repr(name) for name in skipped_sheets)} (budget reached)]"
+    return None
+
+def _iter_spreadsheet_sheets(excel_data: bytes, mime_type: str) -> Iterator[Tuple[str, Iterator[Iterable[Any]]]]:
+    """
+    Yields (sheet name, lazy row iterator) pairs of a workbook.
+
+    Rows of a sheet are only parsed if the caller consumes its iterator before
+    advancing to the next sheet. The workbook is closed when the generator is closed.
+    """
+    if 'openxmlformats' in mime_type:
+        # Process .xlsx in read-only mode: rows are parsed lazily from the XML stream
+        workbook = openpyxl.load_workbook(as_binary_stream(excel_data), read_only=True, data_only=True)
+        try:
+            for sheet in workbook.sheetnames:
+                yield sheet, workbook[sheet].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    else:
+        # Process .xls, loading one sheet at a time
+        workbook = xlrd.open_workbook(file_contents=bytes(excel_data), on_demand=True)
+        try:
+            for sheet_idx in range(workbook.nsheets):
+                sheet = workbook.sheet_by_index(sheet_idx)
+                rows = (
+                    [cell.value if cell.value != '' else None for cell in sheet.row(row_idx)]
+                    for row_idx in range(sheet.nrows)
+                )
+                yield sheet.name, rows
+                workbook.unload_sheet(sheet_idx)
+        finally:
+            workbook.release_resources()
+
+def _check_excel_dependencies(mime_type: str) -> None:
     if mime_type == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet':
         if not openpyxl:
             raise ValueError("openpyxl library is not installed for .xlsx processing")
@@ -379,81 +516,134 @@ def safe_extract_text_from_excel(excel_data: bytes, mime_type: str) -> str:
         if not xlrd:
             raise ValueError("xlrd library is not installed for .xls processing")
 
-    text = []
-    temp_path = None
+def iter_extract_text_from_excel(excel_data: bytes, mime_type: str, limits: Optional[Dict[str, int]] = None) -> Iterator[TextFragment]:
+    """
+    Yields the text of each Excel sheet (.xlsx and .xls), streaming rows until a budget is reached.
+
+    Args:
+        excel_data: Workbook content in bytes
+        mime_type: MIME type of the workbook
+        limits: Optional budgets overriding the defaults: max_rows, max_columns, max_chars
+    """
+    _check_excel_dependencies(mime_type)
+
+    limits = _resolve_table_limits(limits)
+    state = {'rows': 0, 'chars': 0, 'truncated': []}
+    skipped_sheets = []
 
     try:
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx' if 'openxmlformats' in mime_type else '.xls') as temp:
-            temp.write(excel_data)
-            temp_path = temp.name
-
-        if 'openxmlformats' in mime_type:
-            # Process .xlsx
-            workbook = openpyxl.load_workbook(temp_path, data_only=True)
-            for sheet in workbook.sheetnames:
-                ws = workbook[sheet]
-                text.append(f"Sheet: {sheet}")
-                for row in ws.iter_rows():
-                    row_text = ' | '.join(str(cell.value) if cell.value is not None else '' for cell in row)
-                    if row_text.strip():
-                        text.append(row_text)
-        else:
-            # Process .xls
-            workbook = xlrd.open_workbook(temp_path)
-            for sheet_idx in range(workbook.nsheets):
-                sheet = workbook.sheet_by_index(sheet_idx)
-                text.append(f"Sheet: {sheet.name}")
-                for row_idx in range(sheet.nrows):
-                    row_text = ' | '.join(str(cell.value) if cell.value else '' for cell in sheet.row(row_idx))
-                    if row_text.strip():
-                        text.append(row_text)
+        sheets = _iter_spreadsheet_sheets(excel_data, mime_type)
+        try:
+            exhausted = False
+            for sheet_index, (sheet_name, rows) in enumerate(sheets, 1):
+                if exhausted:
+                    skipped_sheets.append(sheet_name)
+                    continue
+                lines = []
+                exhausted = _append_table_rows(sheet_name, rows, limits, state, lines)
+                yield TextFragment('\n'.join(lines), 'sheet', sheet_index, sheet_name)
+        finally:
+            sheets.close()
 
-        return '\n'.join(text)
+        note = _table_truncation_note(state, skipped_sheets)
+        if note:
+            yield TextFragment(note, 'note', 1)
 
     except Exception as e:
         logger.error(f"Error processing Excel file: {e}", exc_info=True)
         raise ValueError(f"Error processing Excel file: {e}")
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-            except OSError:
-                pass
 
-def safe_extract_text_from_powerpoint(pptx_data: bytes) -> str:
-    """Safely extracts text from PowerPoint files (.pptx)."""
-    if not Presentation:
-        raise ValueError("python-pptx library is not installed")
+def safe_extract_text_from_excel(excel_data: bytes, mime_type: str, limits: Optional[Dict[str, int]] = None) -> str:
+    """Safely extracts text from Excel files (.xlsx and .xls), see iter_extract_text_from_excel."""
+    return join_fragments(iter_extract_text_from_excel(excel_data, mime_type, limits), '\n')
 
-    text = []
-    temp_path = None
+def _iter_csv_rows(csv_data: bytes) -> Iterator[List[str]]:
+    """Detects the encoding and dialect of CSV data and returns a row reader decoding lazily."""
+    stream = open_text_stream(csv_data, newline='')
+    sample = stream.read(CSV_SNIFF_BYTES)
+    stream.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+    except csv.Error:
+        dialect = csv.excel # Fall back to plain comma separated values
+    return csv.reader(stream, dialect)
+
+def iter_extract_text_from_csv(csv_data: bytes, limits: Optional[Dict[str, int]] = None) -> Iterator[TextFragment]:
+    """Yields the text of a CSV file with the same budgets as spreadsheets. Raises ValueError on errors."""
+    limits = _resolve_table_limits(limits)
+    state = {'rows': 0, 'chars': 0, 'truncated': []}
+    lines = []
+
+    rows = _iter_csv_rows(csv_data)
+    try:
+        _append_table_rows('CSV', rows, limits, state, lines)
+        _table_truncation_note(state, [])
+    except Exception as e:
+        logger.error(f"Error processing CSV file: {e}", exc_info=True)
+        raise ValueError(f"Error processing CSV file: {e}")
+    yield TextFragment('\n'.join(lines), 'sheet', 1, 'CSV')
+
+def safe_extract_text_from_csv(csv_data: bytes, limits: Optional[Dict[str, int]] = None) -> str:
+    """Safely extracts text from CSV files with the same budgets as spreadsheets. Raises ValueError on errors."""
+    return join_fragments(iter_extract_text_from_csv(csv_data, limits))
+
+def summarize_tabular_data(file_content: bytes, mime_type: str) -> Tuple[str, List[str]]:
+    """
+    Loads a spreadsheet or CSV into NumPy tables and returns a compact statistical profile.
 
+    The full tables stay queryable server-side through tabular_profile.query_table().
+
+    Returns:
+        Tuple[str, List[str]]: Profile text for the LLM and the ids of the stored tables
+    """
+    source_digest = hashlib.sha256(file_content).hexdigest()
+    if mime_type == 'text/csv':
+        sheets = iter([('CSV', _iter_csv_rows(file_content))])
+    else:
+        _check_excel_dependencies(mime_type)
+        sheets = _iter_spreadsheet_sheets(file_content, mime_type)
+
+    profiles = []
+    table_ids = []
     try:
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pptx') as temp:
-            temp.write(pptx_data)
-            temp_path = temp.name
+        for sheet_name, rows in sheets:
+            table = tabular_profile.load_table(sheet_name, rows)
+            if table is None:
+                continue
+            table_ids.append(tabular_profile.table_store.add(table, source_digest))
+            profiles.append(tabular_profile.render_profile(table))
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error summarizing tabular file: {e}", exc_info=True)
+        raise ValueError(f"Error summarizing tabular file: {e}")
+
+    if not profiles:
+        return "No tabular data found.", []
+    return '\n\n'.join(profiles), table_ids
 
-        prs = Presentation(temp_path)
+def iter_extract_text_from_powerpoint(pptx_data: bytes) -> Iterator[TextFragment]:
+    """Yields the text of each slide of a PowerPoint file (.pptx)."""
+    if not Presentation:
+        raise ValueError("python-pptx library is not installed")
+
+    try:
+        prs = Presentation(as_binary_stream(pptx_data))
         
         for slide_number, slide in enumerate(prs.slides, 1):
-            text.append(f"\nSlide {slide_number}:")
+            text = [f"Slide {slide_number}:"]
             for shape in slide.shapes:
                 if hasattr(shape, "text") and shape.text.strip():
                     text.append(shape.text.strip())
-
-        return '\n'.join(text)
+            yield TextFragment('\n'.join(text), 'slide', slide_number)
 
     except Exception as e:
         logger.error(f"Error processing PowerPoint file: {e}", exc_info=True)
         raise ValueError(f"Error processing PowerPoint file: {e}")
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-            except OSError:
-                pass
+
+def safe_extract_text_from_powerpoint(pptx_data: bytes) -> str:
+    """Safely extracts text from PowerPoint files (.pptx)."""
+    return join_fragments(iter_extract_text_from_powerpoint(pptx_data), '\n\n')
 
 def safe_extract_text_from_rtf(rtf_data: bytes) -> str:
     """Safely extracts text from RTF files."""
@@ -468,27 +658,62 @@ def safe_extract_text_from_rtf(rtf_data: bytes) -> str:
         logger.error(f"Error processing RTF file: {e}", exc_info=True)
         raise ValueError(f"Error processing RTF file: {e}")
 
-def safe_extract_text_from_archive(archive_data: bytes, mime_type: str) -> str:
-    """Safely extracts file listing from ZIP/RAR archives."""
-    temp_path = None
+def _detect_archive_member(data: bytes, name: str) -> Optional[str]:
+    """MIME type of an archive member if it is allowed and has an extractor, else None."""
+    mime_type = detect_mime_type(data, name)
+    if mime_type not in ALLOWED_MIME_TYPES:
+        return None
+    if mime_type in archive_extraction.ARCHIVE_MIME_TYPES or extractor_registry.get(mime_type):
+        return mime_type
+    return None
+
+def _extract_archive_member(data: bytes, mime_type: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """Extracts one archive member through the regular extractors, within the per-member budget."""
+    max_chars = archive_extraction.ARCHIVE_MEMBER_MAX_CHARS
+    fragments, truncated = consume_fragments(iter_extract_fragments(data, mime_type, max_chars, options), max_chars)
+    text = '\n\n'.join(fragment.text for fragment in fragments)
+    if truncated:
+        text += f"\n[Truncated at {max_chars} characters]"
+    return text
+
+def iter_extract_text_from_archive(archive_data: bytes, mime_type: str, options: Optional[Dict[str, Any]] = None) -> Iterator[TextFragment]:
+    """
+    Yields the listing of a ZIP/RAR archive, then the text of its supported members as they complete.
+
+    Members (including those of nested archives) are extracted in parallel in the extraction
+    pool, within the zip-bomb limits of archive_extraction.ArchiveLimits.
+
+    Args:
+        archive_data: Archive content in bytes
+        mime_type: MIME type of the archive
+        options: Per-request extraction options passed to the member extractors
+    """
     try:
-        # Save to temporary file
-        suffix = '.rar' if 'rar' in mime_type.lower() else '.zip'
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp:
-            temp.write(archive_data)
-            temp_path = temp.name
+        yield from archive_extraction.iter_extract_archive(
+            archive_data,
+            mime_type,
+            _detect_archive_member,
+            partial(_extract_archive_member, options=options)
+        )
+    except Exception as e:
+        logger.error(f"Error processing archive file: {e}", exc_info=True)
+        raise ValueError(f"Error processing archive file: {e}")
 
-        file_list = []
-        
-        if 'rar' in mime_type.lower():
-            if not rarfile:
-                raise ValueError("rarfile library is not installed")
-            with rarfile.RarFile(temp_path) as rf:
-                file_list = rf.namelist()
-        else:
-            import zipfile
-            with zipfile.ZipFile(temp_path) as zf:
-                file_list = zf.namelist()
+def safe_extract_text_from_archive(archive_data: bytes, mime_type: str, mode: str = 'list') -> str:
+    """
+    Safely extracts text from ZIP/RAR archives.
+
+    Args:
+        archive_data: Archive content in bytes
+        mime_type: MIME type of the archive
+        mode: 'list' for the file listing only, 'extract' to also extract supported members
+    """
+    if mode not in ARCHIVE_MODES:
+        raise ValueError(f"Unsupported archive mode: {mode}")
+    if mode == 'extract':
+        return join_fragments(iter_extract_text_from_archive(archive_data, mime_type), '\n\n')
+    try:
+        file_list = archive_extraction.list_archive(archive_data, mime_type)
 
         # Format file listing
         text = "Archive contents:\n" + "\n".join(f"- {name}" for name in file_list)
@@ -497,37 +722,18 @@ def safe_extract_text_from_archive(archive_data: bytes, mime_type: str) -> str:
     except Exception as e:
         logger.error(f"Error processing archive file: {e}", exc_info=True)
         raise ValueError(f"Error processing archive file: {e}")
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-            except OSError:
-                pass
 
 def safe_extract_text_from_opendocument(odf_data: bytes, mime_type: str) -> str:
     """Safely extracts text from OpenDocument files (ODT, ODS, ODP)."""
     if not all([text, teletype, load]):
         raise ValueError("odfpy library is not installed")
 
-    temp_path = None
     try:
-        # Save to temporary file with appropriate extension
-        ext_map = {
-            'application/vnd.oasis.opendocument.text': '.odt',
-            'application/vnd.oasis.opendocument.spreadsheet': '.ods',
-            'application/vnd.oasis.opendocument.presentation': '.odp'
-        }
-        suffix = ext_map.get(mime_type, '.odt')
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp:
-            temp.write(odf_data)
-            temp_path = temp.name
-
-        doc = load(temp_path)
+        doc = load(as_binary_stream(odf_data))
         
         if mime_type == 'application/vnd.oasis.opendocument.text':
             # Process text document (ODT)
-            return teletype.extractText(doc)
+            return teletype.extractText(doc.text)
             
         elif mime_type == 'application/vnd.oasis.opendocument.spreadsheet':
             # Process spreadsheet (ODS)
@@ -551,12 +757,6 @@ def safe_extract_text_from_opendocument(odf_data: bytes, mime_type: str) -> str:
     except Exception as e:
         logger.error(f"Error processing OpenDocument file: {e}", exc_info=True)
         raise ValueError(f"Error processing OpenDocument file: {e}")
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-            except OSError:
-                pass
 
 def format_extracted_text(text: str, format_type: str = 'default') -> str:
     """
@@ -647,6 +847,8 @@ def safe_extract_text_from_html(content: bytes, formatting_options: Optional[Dic
             - preserve_tables: bool - maintain table structure
             - extract_article: bool - extract main article content
             - output_format: str - 'text' or 'markdown'
+            - parser: str - 'lxml' (default, fast) or 'html5lib'; lxml falls back to html5lib on malformed markup
+            - strip_boilerplate: bool - drop navigation, headers/footers, ads and forms (lxml parser, default True)
     """
     try:
         if not formatting_options:
@@ -658,12 +860,14 @@ def safe_extract_text_from_html(content: bytes, formatting_options: Optional[Dic
                 'extract_article': False,
                 'output_format': 'text'
             }
+        parser = formatting_options.get('parser') or DEFAULT_HTML_PARSER
+        if parser not in HTML_PARSERS:
+            raise ValueError(f"Unsupported HTML parser: {parser}")
 
-        html_content = content.decode('utf-8')
-
+        html_bytes = content
         if formatting_options.get('extract_article'):
-            doc = Document(html_content)
-            html_content = doc.summary()
+            doc = Document(content.decode('utf-8'))
+            html_bytes = doc.summary().encode('utf-8')
 
         if formatting_options.get('output_format') == 'markdown':
             h2t = html2text.HTML2Text()
@@ -671,24 +875,70 @@ def safe_extract_text_from_html(content: bytes, formatting_options: Optional[Dic
             h2t.ignore_images = not formatting_options.get('preserve_images')
             h2t.ignore_tables = not formatting_options.get('preserve_tables')
             h2t.ignore_emphasis = False
-            return h2t.handle(html_content)
-        else:
-            soup = BeautifulSoup(html_content, 'html5lib')
-            if not formatting_options.get('preserve_links'):
-                for a in soup.find_all('a'):
-                    a.replace_with(a.text)
-            if not formatting_options.get('preserve_images'):
-                for img in soup.find_all('img'):
-                    img.decompose()
-            return soup.get_text(separator='\n\n')
+            return h2t.handle(html_bytes.decode('utf-8'))
+
+        if parser == 'lxml' and html_extraction:
+            try:
+                return html_extraction.extract_text(html_bytes, formatting_options.get('strip_boilerplate', True))
+            except ValueError as e:
+                logger.info(f"Falling back to html5lib: {e}")
+
+        soup = BeautifulSoup(html_bytes.decode('utf-8'), 'html5lib')
+        if not formatting_options.get('preserve_links'):
+            for a in soup.find_all('a'):
+                a.replace_with(a.text)
+        if not formatting_options.get('preserve_images'):
+            for img in soup.find_all('img'):
+                img.decompose()
+        return soup.get_text(separator='\n\n')
 
     except Exception as e:
         logging.error(f"Error extracting text from HTML: {str(e)}")
         raise RuntimeError(f"Failed to process HTML content: {str(e)}")
 
-def safe_extract_text_from_epub(content: bytes, formatting_options: Optional[Dict[str, Any]] = None) -> str:
+def _parse_chapter(content: bytes, parser: str) -> Tuple[Optional[str], Optional[Any]]:
+    """Parses an EPUB chapter once, returning its heading and the lxml tree (None when html5lib was used)."""
+    if parser == 'lxml' and html_extraction:
+        try:
+            root = html_extraction.parse_html(content)
+            return html_extraction.find_heading(root), root
+        except ValueError as e:
+            logger.info(f"Falling back to html5lib for EPUB chapter: {e}")
+    soup = BeautifulSoup(content, 'html5lib')
+    heading = soup.find(['h1', 'h2', 'h3'])
+    return (heading.text if heading else None), soup
+
+def _convert_epub_chapter(chapter: Tuple[str, bytes], formatting_options: Dict[str, Any]) -> Tuple[Optional[str], str]:
     """
-    Extract text from EPUB content with formatting options.
+    Converts one EPUB chapter to text in an extraction pool worker. Returns (heading, text).
+
+    The markup is parsed once: by html2text when formatting is preserved (the heading is
+    read from its Markdown), otherwise by the HTML engine, whose tree supplies both.
+    """
+    _, content = chapter
+    parser = formatting_options.get('parser') or DEFAULT_HTML_PARSER
+    if formatting_options.get('preserve_formatting'):
+        body = epub_pipeline.chapter_to_markdown(content)
+        chapter_heading = epub_pipeline.markdown_heading(body)
+    else:
+        chapter_heading, tree = _parse_chapter(content, parser)
+        if hasattr(tree, 'get_text'): # html5lib fallback
+            body = tree.get_text(separator='\n\n')
+        else:
+            body = html_extraction.html_to_text(tree)
+    if not formatting_options.get('preserve_chapters'):
+        return None, body
+    result = [f"\n## {chapter_heading}\n"] if chapter_heading else []
+    result.append(body)
+    return chapter_heading, '\n'.join(result)
+
+def iter_extract_text_from_epub(content: bytes, formatting_options: Optional[Dict[str, Any]] = None) -> Iterator[TextFragment]:
+    """
+    Yields EPUB text chapter by chapter, after optional metadata and table of contents fragments.
+
+    The package document is read first. Chapters are inflated lazily in spine order and
+    converted concurrently in the extraction pool, at most a window of them in flight, and
+    yielded in reading order. Closing the generator early stops reading and conversion.
     
     Args:
         content: EPUB content in bytes
@@ -697,6 +947,7 @@ def safe_extract_text_from_epub(content: bytes, formatting_options: Optional[Dic
             - preserve_formatting: bool - keep basic formatting
             - extract_metadata: bool - include book metadata
             - include_toc: bool - include table of contents
+            - parser: str - 'lxml' (default) or 'html5lib' for chapter markup
     """
     try:
         if not formatting_options:
@@ -707,51 +958,34 @@ def safe_extract_text_from_epub(content: bytes, formatting_options: Optional[Dic
                 'include_toc': True
             }
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.epub') as temp_file:
-            temp_file.write(content)
-            temp_file.flush()
-            
-            book = epub.read_epub(temp_file.name)
-            
-            result = []
-            
-            if formatting_options.get('extract_metadata'):
-                metadata = {
-                    'title': book.get_metadata('DC', 'title'),
-                    'creator': book.get_metadata('DC', 'creator'),
-                    'language': book.get_metadata('DC', 'language')
-                }
-                result.append(f"Metadata:\n{json.dumps(metadata, indent=2)}\n")
-
-            if formatting_options.get('include_toc'):
-                toc = book.toc
-                result.append("Table of Contents:")
-                for item in toc:
-                    result.append(f"- {item.title}")
-                result.append("")
-
-            for item in book.get_items_of_type(ebooklib.ITEM_DOCUMENT):
-                if formatting_options.get('preserve_chapters'):
-                    soup = BeautifulSoup(item.content, 'html5lib')
-                    chapter_title = soup.find(['h1', 'h2', 'h3'])
-                    if chapter_title:
-                        result.append(f"\n## {chapter_title.text}\n")
-                
-                if formatting_options.get('preserve_formatting'):
-                    h2t = html2text.HTML2Text()
-                    h2t.ignore_links = False
-                    h2t.ignore_emphasis = False
-                    result.append(h2t.handle(item.content.decode('utf-8')))
-                else:
-                    soup = BeautifulSoup(item.content, 'html5lib')
-                    result.append(soup.get_text(separator='\n\n'))
+        package = epub_pipeline.read_epub_package(content)
+    except Exception as e:
+        logging.error(f"Error extracting text from EPUB: {str(e)}")
+        raise RuntimeError(f"Failed to process EPUB content: {str(e)}")
+
+    if formatting_options.get('extract_metadata'):
+        yield TextFragment(f"Metadata:\n{json.dumps(package.metadata, indent=2, ensure_ascii=False)}\n", 'metadata', 1)
 
-            os.unlink(temp_file.name)
-            return '\n'.join(result)
+    if formatting_options.get('include_toc'):
+        toc = ["Table of Contents:"] + package.toc + [""]
+        yield TextFragment('\n'.join(toc), 'toc', 1)
 
+    # The zip is read in this thread as map_ordered pulls items; workers only convert markup
+    sources = epub_pipeline.iter_epub_chapters(content, package.chapters)
+    chapters = map_ordered(partial(_convert_epub_chapter, formatting_options=formatting_options), sources)
+    try:
+        for chapter_number, (chapter_heading, chapter_text) in enumerate(chapters, 1):
+            yield TextFragment(chapter_text, 'chapter', chapter_number, chapter_heading)
     except Exception as e:
         logging.error(f"Error extracting text from EPUB: {str(e)}")
         raise RuntimeError(f"Failed to process EPUB content: {str(e)}")
+    finally:
+        chapters.close()
+        sources.close()
+
+def safe_extract_text_from_epub(content: bytes, formatting_options: Optional[Dict[str, Any]] = None) -> str:
+    """Extract text from EPUB content with formatting options, see iter_extract_text_from_epub."""
+    return join_fragments(iter_extract_text_from_epub(content, formatting_options), '\n')
 
 def process_xml_with_xslt(xml_content: bytes, xslt_content: bytes) -> str:
     """
@@ -771,6 +1005,28 @@ def process_xml_with_xslt(xml_content: bytes, xslt_content: bytes) -> str:
         logging.error(f"Error processing XML with XSLT: {str(e)}")
         raise RuntimeError(f"Failed to transform XML with XSLT: {str(e)}")
 
+def iter_extract_text_from_xml(content: bytes, processing_options: Optional[Dict[str, Any]] = None) -> Iterator[TextFragment]:
+    """
+    Streams XML records with iterparse, see xml_stream.iter_xml_records.
+
+    Args:
+        content: XML content in bytes
+        processing_options: Dictionary with the streaming options record_tags, record_path and max_chars
+    """
+    processing_options = processing_options or {}
+    try:
+        yield from xml_stream.iter_xml_records(
+            content,
+            tags=processing_options.get('record_tags'),
+            path=processing_options.get('record_path'),
+            max_chars=processing_options.get('max_chars')
+        )
+    except ValueError:
+        raise
+    except Exception as e:
+        logging.error(f"Error streaming XML content: {str(e)}")
+        raise RuntimeError(f"Failed to process XML content: {str(e)}")
+
 def safe_extract_text_from_xml(content: bytes, processing_options: Optional[Dict[str, Any]] = None) -> str:
     """
     Extract and format text from XML with advanced processing options.
@@ -783,6 +1039,10 @@ def safe_extract_text_from_xml(content: bytes, processing_options: Optional[Dict
             - convert_to_json: bool - convert to JSON format
             - css_selector: str - use CSS selector instead of XPath
             - xslt_transform: bytes - XSLT stylesheet content
+            - streaming: bool - stream records with iterparse instead of building the tree
+            - record_tags: List[str] - tag names of records to extract (streaming mode)
+            - record_path: str - slash-separated path of records, e.g. '/catalog/book' (streaming mode)
+            - max_chars: int - stop parsing after this many characters (streaming mode)
     """
     try:
         if not processing_options:
@@ -791,6 +1051,9 @@ def safe_extract_text_from_xml(content: bytes, processing_options: Optional[Dict
                 'convert_to_json': False
             }
 
+        if processing_options.get('streaming'):
+            return join_fragments(iter_extract_text_from_xml(content, processing_options), '\n\n')
+
         if processing_options.get('xslt_transform'):
             return process_xml_with_xslt(content, processing_options['xslt_transform'])
 
@@ -822,53 +1085,431 @@ def safe_extract_text_from_xml(content: bytes, processing_options: Optional[Dict
         logging.error(f"Error processing XML content: {str(e)}")
         raise RuntimeError(f"Failed to process XML content: {str(e)}")
 
-def process_uploaded_file_data(file_content_base64: str, filename: str) -> dict:
-    """Process uploaded file data and return extracted information"""
+def _single_fragment(extract, *args) -> Iterator[TextFragment]:
+    """Wraps a whole-document extractor so it only runs when the fragment is pulled."""
+    yield TextFragment(extract(*args))
+
+def _iter_reporting_text(fragments: Iterator[TextFragment]) -> Iterator[TextFragment]:
+    """Passes fragments through, reporting their text as partial progress; closing it closes the extractor."""
     try:
-        # Decode base64 content
-        file_content = base64.b64decode(file_content_base64)
-        
-        # Validate file type and scan for viruses
-        is_valid, mime_type, _ = validate_file_type_and_scan(filename, file_content_base64)
-        if not is_valid:
-            raise ValueError(f"Invalid file type: {mime_type}")
+        for fragment in fragments:
+            report_progress(text=fragment.text)
+            yield fragment
+    finally:
+        close = getattr(fragments, 'close', None)
+        if close:
+            close()
+
+def _options_profile(options: Dict[str, Any]) -> ExtractionProfile:
+    return options.get('profile') or get_extraction_profile()
+
+def _table_limits(max_chars: Optional[int]) -> Optional[Dict[str, int]]:
+    return {'max_chars': min(MAX_SPREADSHEET_CHARS, max_chars)} if max_chars is not None else None
+
+# Extractor plugins. Registration is cheap: libraries are imported when a plugin first runs.
+@extractor_registry.register('pdf', ['application/pdf'], requires=[fitz])
+def _extract_pdf(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    profile = _options_profile(options)
+    return iter_extract_text_from_pdf(
+        file_content, profile.ocr_preprocessing, profile.ocr, profile.ocr_languages, profile.max_pages, options.get('max_pdf_size_mb')
+    )
+
+@extractor_registry.register('image', mime_prefixes=['image/'], requires=[Image, pytesseract])
+def _extract_image(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    profile = _options_profile(options)
+    if not profile.ocr:
+        raise ValueError(f"Images need OCR, which the '{profile.name}' extraction profile disables.")
+    return iter_extract_text_from_image(file_content, profile.ocr_preprocessing, profile.ocr_languages)
+
+@extractor_registry.register('csv', ['text/csv'])
+def _extract_csv(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    return iter_extract_text_from_csv(file_content, _table_limits(max_chars))
+
+@extractor_registry.register('text', ['text/plain'])
+def _extract_txt(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    return _single_fragment(safe_extract_text_from_txt, file_content, max_chars)
+
+@extractor_registry.register('markdown', ['text/markdown'], requires=[markdown, BeautifulSoup])
+def _extract_markdown(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    return _single_fragment(safe_extract_text_from_markdown, file_content)
+
+# One extractor, registered per format: .xlsx needs only openpyxl and .xls only xlrd
+@extractor_registry.register('xls', ['application/vnd.ms-excel'], requires=[xlrd])
+@extractor_registry.register('xlsx', ['application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'], requires=[openpyxl])
+def _extract_excel(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    return iter_extract_text_from_excel(file_content, mime_type, _table_limits(max_chars))
+
+@extractor_registry.register(
+    'powerpoint',
+    ['application/vnd.ms-powerpoint', 'application/vnd.openxmlformats-officedocument.presentationml.presentation'],
+    requires=[Presentation]
+)
+def _extract_powerpoint(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    return iter_extract_text_from_powerpoint(file_content)
+
+@extractor_registry.register('rtf', ['application/rtf'], requires=[rtf_to_text])
+def _extract_rtf(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    return _single_fragment(safe_extract_text_from_rtf, file_content)
+
+@extractor_registry.register('archive', ['application/zip', 'application/x-rar-compressed', 'application/x-rar'])
+def _extract_archive(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    if options.get('archive_mode', 'list') == 'extract':
+        return iter_extract_text_from_archive(file_content, mime_type, options)
+    return _single_fragment(safe_extract_text_from_archive, file_content, mime_type)
+
+@extractor_registry.register('opendocument', mime_prefixes=['application/vnd.oasis.opendocument'], requires=[load, teletype])
+def _extract_opendocument(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    return _single_fragment(safe_extract_text_from_opendocument, file_content, mime_type)
+
+@extractor_registry.register('xml', ['text/xml', 'application/xml'], requires=[safe_ET, etree])
+def _extract_xml(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    if len(file_content) > xml_stream.XML_STREAM_THRESHOLD_BYTES:
+        # The budget is enforced by the consumer, which closes the generator and stops parsing
+        return iter_extract_text_from_xml(file_content)
+    return _single_fragment(safe_extract_text_from_xml, file_content)
+
+@extractor_registry.register('html', ['text/html', 'application/xhtml+xml'], requires=[BeautifulSoup, html2text])
+def _extract_html(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    return _single_fragment(safe_extract_text_from_html, file_content, {
+        'preserve_links': True,
+        'preserve_lists': True,
+        'preserve_tables': True,
+        'output_format': 'text',
+        'parser': options.get('html_parser'),
+    })
+
+@extractor_registry.register('epub', ['application/epub+zip'], requires=[safe_ET, html2text])
+def _extract_epub(file_content: bytes, mime_type: str, max_chars: Optional[int], options: Dict[str, Any]) -> Iterator[TextFragment]:
+    profile = _options_profile(options)
+    return iter_extract_text_from_epub(file_content, {
+        'preserve_chapters': True,
+        'preserve_formatting': True,
+        'extract_metadata': profile.epub_metadata,
+        'include_toc': profile.epub_toc,
+        'parser': options.get('html_parser'),
+    })
+
+def iter_extract_fragments(
+    file_content: bytes,
+    mime_type: str,
+    max_chars: Optional[int] = None,
+    options: Optional[Dict[str, Any]] = None
+) -> Iterator[TextFragment]:
+    """
+    Returns a lazy fragment iterator from the extractor plugin registered for the file type.
+
+    Paged formats (PDF, spreadsheets, presentations, EPUB) yield one fragment per unit,
+    so a consumer that stops early also stops the parser. Other formats yield the whole
+    document as one fragment.
+
+    Args:
+        file_content: Raw file content
+        mime_type: Detected MIME type
+        max_chars: Character budget, also passed to extractors that enforce budgets themselves
+        options: Per-request extraction options ('html_parser', 'archive_mode', 'profile', 'max_pdf_size_mb')
+    """
+    plugin = extractor_registry.get(mime_type)
+    if plugin is None:
+        raise ValueError(f"Unsupported file type: {mime_type}")
+    return plugin.extract(file_content, mime_type, max_chars, options or {})
+
+def _ocr_available(profile: ExtractionProfile) -> bool:
+    return profile.ocr and bool(Image and pytesseract)
+
+def _inspect_for_timing(file_content: bytes, mime_type: str, profile: ExtractionProfile) -> Optional[UploadProfile]:
+    """Profiles an upload for the cost model, None if timings are not recorded or it cannot be profiled."""
+    if not timing_model.path:
+        return None
+    try:
+        return inspect_upload(file_content, mime_type, _ocr_available(profile))
+    except Exception as e:
+        logger.debug(f"Extraction timing not recorded: {e}")
+        return None
+
+def _record_timing(
+    upload_profile: Optional[UploadProfile],
+    fragments: List[TextFragment],
+    truncated: bool,
+    seconds: float,
+    chars: int
+) -> None:
+    """
+    Feeds an extraction into the cost model; never fails the request.
+
+    A run stopped by its character budget is recorded with the size it actually read:
+    the pages (or slides) up to its last fragment, otherwise the share of the expected
+    output it produced.
+    """
+    if upload_profile is None:
+        return
+    try:
+        if truncated:
+            last = next((fragment for fragment in reversed(fragments) if fragment.unit != 'note'), None)
+            if last is not None and last.unit == upload_profile.unit and upload_profile.units:
+                fraction = last.index / upload_profile.units
+            else:
+                expected = timing_model.predict(upload_profile).estimated_chars
+                fraction = chars / expected if expected else 1.0
+            upload_profile = upload_profile.scaled(min(fraction, 1.0))
+        timing_model.record(upload_profile, seconds, chars)
+    except Exception as e:
+        logger.debug(f"Extraction timing not recorded: {e}")
+
+def estimate_upload_cost(
+    file_content_base64: str,
+    filename: str,
+    max_chars: Optional[int] = MAX_DOCUMENT_CHARS,
+    profile: Optional[str] = None
+) -> dict:
+    """
+    Predicts extraction time, OCR need and output tokens of an upload from its header.
+
+    Only the structure of the file is read (page resources, image header, sheet
+    dimensions, zip directory); nothing is extracted.
+
+    Args:
+        profile: Extraction profile the upload would be processed with (no OCR under 'fast')
+
+    Raises:
+        ValueError: If the file type or profile is not supported
+    """
+    extraction_profile = get_extraction_profile(profile)
+    file_content = base64.b64decode(file_content_base64)
+    mime_type = detect_mime_type(file_content, filename)
+    if mime_type not in ALLOWED_MIME_TYPES:
+        raise ValueError(f"Unsupported file type: {mime_type}")
+    estimate = timing_model.predict(inspect_upload(file_content, mime_type, _ocr_available(extraction_profile)), max_chars)
+    result = estimate._asdict()
+    result.update(estimate.profile._asdict())
+    del result["profile"]
+    result.update({"filename": filename, "mime_type": mime_type})
+    return result
+
+def resolve_extraction_options(
+    tabular_mode: str = 'rows',
+    max_chars: Optional[int] = MAX_DOCUMENT_CHARS,
+    html_parser: Optional[str] = None,
+    archive_mode: str = 'list',
+    profile: Optional[str] = None
+) -> Tuple[ExtractionProfile, str]:
+    """
+    Validates the options of process_file_content, e.g. before a job is queued.
+
+    Returns:
+        Tuple[ExtractionProfile, str]: The extraction profile and the HTML parser to use
+
+    Raises:
+        ValueError: If an option has an unsupported value
+    """
+    extraction_profile = get_extraction_profile(profile)
+    html_parser = html_parser or extraction_profile.html_parser
+    if tabular_mode not in TABULAR_MODES:
+        raise ValueError(f"Unsupported tabular mode: {tabular_mode}")
+    if max_chars is not None and max_chars <= 0:
+        raise ValueError(f"Character budget must be positive: {max_chars}")
+    if html_parser not in HTML_PARSERS:
+        raise ValueError(f"Unsupported HTML parser: {html_parser}")
+    if archive_mode not in ARCHIVE_MODES:
+        raise ValueError(f"Unsupported archive mode: {archive_mode}")
+    return extraction_profile, html_parser
+
+def process_file_content(
+    file_content: bytes,
+    filename: str,
+    tabular_mode: str = 'rows',
+    max_chars: Optional[int] = MAX_DOCUMENT_CHARS,
+    html_parser: Optional[str] = None,
+    archive_mode: str = 'list',
+    profile: Optional[str] = None,
+    max_pdf_size_mb: Optional[int] = None,
+    upload_profile: Optional[UploadProfile] = None
+) -> dict:
+    """
+    Extracts the text of a file.
+
+    Args:
+        file_content: File content
+        filename: Original file name
+        tabular_mode: 'rows' to extract spreadsheet/CSV cells as text, 'summary' to return
+            a statistical profile and keep the full table queryable server-side
+        max_chars: Character budget of the extracted text, None for no limit. Paged formats
+            stop parsing (and OCR) as soon as it is reached.
+        html_parser: HTML engine for HTML and EPUB files, one of HTML_PARSERS; defaults to the profile's
+        archive_mode: 'list' for the ZIP/RAR listing only (default), 'extract' to also extract supported members
+        profile: Extraction profile name ('fast', 'balanced', 'thorough'), see extraction_profiles;
+            defaults to DEFAULT_EXTRACTION_PROFILE
+        max_pdf_size_mb: PDF size limit, defaults to MAX_PDF_SIZE_MB (raised for chunked uploads)
+        upload_profile: inspect_upload result the caller already has (e.g. from an estimate), recorded
+            with the extraction time; the upload is inspected here otherwise
+    """
+    extraction_profile, html_parser = resolve_extraction_options(tabular_mode, max_chars, html_parser, archive_mode, profile)
+    try:
+        # Validate file type (detection only, the content is extracted once below)
+        mime_type = detect_mime_type(file_content, filename)
+        if mime_type not in ALLOWED_MIME_TYPES:
+            raise ValueError(f"Unsupported file type: {mime_type}")
             
         # Process file based on type
-        extracted_text = ""
-        
-        if mime_type == 'application/pdf':
-            extracted_text = safe_extract_text_from_pdf(file_content)
-        elif mime_type.startswith('image/'):
-            extracted_text = safe_extract_text_from_image(file_content)
-        elif mime_type == 'text/plain':
-            extracted_text = safe_extract_text_from_txt(file_content)
-        elif mime_type == 'text/markdown':
-            extracted_text = safe_extract_text_from_markdown(file_content)
-        elif mime_type in ['application/vnd.ms-excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet']:
-            extracted_text = safe_extract_text_from_excel(file_content, mime_type)
-        elif mime_type in ['application/vnd.ms-powerpoint', 'application/vnd.openxmlformats-officedocument.presentationml.presentation']:
-            extracted_text = safe_extract_text_from_powerpoint(file_content)
-        elif mime_type == 'application/rtf':
-            extracted_text = safe_extract_text_from_rtf(file_content)
-        elif mime_type in ['application/zip', 'application/x-rar-compressed', 'application/x-rar']:
-            extracted_text = safe_extract_text_from_archive(file_content, mime_type)
-        elif mime_type.startswith('application/vnd.oasis.opendocument'):
-            extracted_text = safe_extract_text_from_opendocument(file_content, mime_type)
-        elif mime_type in ['text/xml', 'application/xml']:
-            extracted_text = safe_extract_text_from_xml(file_content)
-        elif mime_type in ['text/html', 'application/xhtml+xml']:
-            extracted_text = safe_extract_text_from_html(file_content)
-        elif mime_type == 'application/epub+zip':
-            extracted_text = safe_extract_text_from_epub(file_content)
+        table_ids = []
+        truncated = False
+        spans = None
+
+        if tabular_mode == 'summary' and mime_type in TABULAR_MIME_TYPES:
+            extracted_text, table_ids = summarize_tabular_data(file_content, mime_type)
+            structured = StructuredText(extracted_text)
         else:
-            raise ValueError(f"Unsupported file type: {mime_type}")
+            upload_profile = upload_profile or _inspect_for_timing(file_content, mime_type, extraction_profile)
+            started = time.perf_counter()
+            options = {
+                'html_parser': html_parser,
+                'archive_mode': archive_mode,
+                'profile': extraction_profile,
+                'max_pdf_size_mb': max_pdf_size_mb,
+            }
+            fragments, truncated = consume_fragments(
+                _iter_reporting_text(iter_extract_fragments(file_content, mime_type, max_chars, options)),
+                max_chars
+            )
+            report_progress('postprocess')
+            if extraction_profile.text_format:
+                fragments = [
+                    fragment._replace(text=format_extracted_text(fragment.text, extraction_profile.text_format))
+                    for fragment in fragments
+                ]
+            structured = StructuredText.from_fragments(fragments, '\n\n')
+            extracted_text = structured.text
+            spans = structured.spans_to_dict()
+            _record_timing(upload_profile, fragments, truncated, time.perf_counter() - started, len(extracted_text))
+            if truncated:
+                last = fragments[-1] if fragments else None
+                position = f" in {last.unit} {last.index}" if last and last.unit != 'document' else ""
+                extracted_text += f"\n\n[Truncated: extraction stopped at {max_chars} characters{position}]"
+            # Extractors report limits of their own (e.g. an archive's zip-bomb budget) with a note
+            truncated = truncated or any(
+                fragment.unit == 'note' and fragment.title == TRUNCATED_NOTE_TITLE for fragment in fragments
+            )
             
-        return {
+        result = {
             "text": extracted_text,
             "mime_type": mime_type,
-            "filename": filename
+            "filename": filename,
+            "digest": compute_document_digest(structured, filename)._asdict()
         }
+        if table_ids:
+            result["tables"] = table_ids
+        if spans is not None:
+            result["spans"] = spans
+        if truncated:
+            result["truncated"] = True
+        return result
             
     except Exception as e:
         logger.error(f"Error processing file {filename}: {str(e)}")
         raise
+
+def process_uploaded_file_data(
+    file_content_base64: str,
+    filename: str,
+    tabular_mode: str = 'rows',
+    max_chars: Optional[int] = MAX_DOCUMENT_CHARS,
+    html_parser: Optional[str] = None,
+    archive_mode: str = 'list',
+    profile: Optional[str] = None
+) -> dict:
+    """
+    Process uploaded file data and return extracted information.
+
+    Args:
+        file_content_base64: Base64 encoded file content
+        filename: Original file name
+        Further arguments: see process_file_content
+    """
+    try:
+        file_content = base64.b64decode(file_content_base64)
+    except Exception as e:
+        logger.error(f"Error processing file {filename}: {str(e)}")
+        raise
+    return process_file_content(file_content, filename, tabular_mode, max_chars, html_parser, archive_mode, profile)
+
+def process_stored_file(path: str, filename: str, *args, **kwargs) -> dict:
+    """
+    Like process_uploaded_file_data, for a file stored on disk (e.g. a chunked upload).
+
+    PDFs (whose size cap is raised for chunked uploads) are parsed from a read-only
+    mapping of the file, so an upload near UPLOAD_MAX_MB is not copied onto the
+    sandbox's limited heap; other formats are read into memory as before.
+    """
+    content = map_file(path)
+    if detect_mime_type(content, filename) != 'application/pdf':
+        content.close()
+        content = Path(path).read_bytes()
+    return process_file_content(content, filename, *args, **kwargs)
+
+def _process_in_sandbox(process: Callable[..., dict], *args, **kwargs) -> dict:
+    """Sandbox job: runs process and ships the tables it stored (summary mode) back with the result."""
+    result = process(*args, **kwargs)
+    if result.get("tables"):
+        result["_tables"] = [tabular_profile.table_store.get(table_id) for table_id in result["tables"]]
+    return result
+
+def _run_extraction(
+    process: Callable[..., dict],
+    load_content: Callable[[], bytes],
+    args: Tuple,
+    kwargs: Dict[str, Any],
+    progress: Optional[ProgressCallback]
+) -> dict:
+    """Runs process sandboxed (or in-process) while the malware scanner checks load_content()."""
+    scanner = get_malware_scanner()
+    scan = scanner.start_check(load_content) if scanner else None
+    try:
+        if SANDBOX_ENABLED:
+            result = run_sandboxed(_process_in_sandbox, process, *args, progress=progress, **kwargs)
+        else:
+            with progress_reporting(progress):
+                result = process(*args, **kwargs)
+    except Exception:
+        if scan:
+            scan.cancel()
+        raise
+    if scan:
+        scan.result() # Raises MalwareDetected or MalwareScanError
+    for table in result.pop("_tables", []):
+        if table is not None:
+            tabular_profile.table_store.put(table)
+    return result
+
+def process_uploaded_file_sandboxed(
+    file_content_base64: str,
+    filename: str,
+    *args,
+    progress: Optional[ProgressCallback] = None,
+    **kwargs
+) -> dict:
+    """
+    Runs process_uploaded_file_data in a subprocess with memory, CPU and wall-clock limits
+    (see extraction_sandbox), so a hostile or unlucky file cannot pin or crash the worker.
+
+    Takes the same arguments. Tables loaded in summary mode are registered in this
+    process so they stay queryable. Runs in-process when EXTRACTION_SANDBOX is disabled.
+    When malware scanning is enabled, the clamd scan runs concurrently with the extraction
+    and the result is only returned for clean files.
+
+    Args:
+        progress: Receives progress updates (stage, pages done/total, partial text) while the job runs
+
+    Raises:
+        ExtractionLimitExceeded: If the job was killed for exceeding a limit
+        MalwareDetected: If clamd reports the file as infected
+    """
+    return _run_extraction(
+        process_uploaded_file_data,
+        partial(base64.b64decode, file_content_base64),
+        (file_content_base64, filename) + args,
+        kwargs,
+        progress
+    )
+
+def process_stored_file_sandboxed(path: str, filename: str, *args, progress: Optional[ProgressCallback] = None, **kwargs) -> dict:
+    """Like process_uploaded_file_sandboxed for a file on disk; only its path is sent to the sandbox."""
+    return _run_extraction(process_stored_file, partial(map_file, path), (path, filename) + args, kwargs, progress)
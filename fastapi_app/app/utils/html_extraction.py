@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+from typing import Any, List, Optional
+
+try:
+    from lxml import etree
+    import lxml.html
+except ImportError:
+    etree = None
+
+from .text_encoding import BOMS, decode_text
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+# Elements whose content never belongs to the main text
+BOILERPLATE_TAGS = frozenset({
+    'script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe', 'object', 'embed',
+    'nav', 'header', 'footer', 'aside', 'form', 'button', 'select', 'menu', 'dialog',
+})
+# class/id tokens marking navigation, ads and other page furniture. A token counts when it is
+# one of these words, or when every -/_ separated part of it is one of these or a layout word
+# ("cookie-banner", "sidebar_left"); "has-sidebar" or "post-comments" on a content wrapper do not
+BOILERPLATE_ATTR_TOKENS = frozenset({
+    'cookie', 'cookies', 'consent', 'banner', 'advert', 'ad', 'ads', 'sponsor', 'promo', 'sidebar', 'navbar',
+    'menu', 'breadcrumb', 'breadcrumbs', 'share', 'social', 'popup', 'modal', 'newsletter', 'subscribe',
+    'comments', 'related', 'footer', 'header',
+})
+LAYOUT_ATTR_PARTS = frozenset({'bar', 'box', 'wrap', 'wrapper', 'container', 'top', 'bottom', 'left', 'right', 'site', 'page', 'widget', 'area', 'links'})
+ATTR_PART_SEPARATOR_RE = re.compile(r'[-_]+')
+# Containers of the main content, never dropped together with their ancestors
+CONTENT_TAGS = ('main', 'article')
+STRIP_MIN_KEPT_RATIO = 0.1 # If stripping keeps less of the text than this, the page is extracted unstripped
+BOILERPLATE_ROLES = frozenset({'navigation', 'banner', 'contentinfo', 'complementary', 'search', 'dialog'})
+
+# Elements that start a new line in the extracted text
+BLOCK_TAGS = frozenset({
+    'address', 'article', 'blockquote', 'body', 'br', 'caption', 'dd', 'div', 'dl', 'dt', 'figcaption',
+    'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'li', 'main', 'ol', 'p', 'pre', 'section',
+    'table', 'td', 'th', 'tr', 'ul',
+})
+HEADING_TAGS = ('h1', 'h2', 'h3')
+CHARSET_SNIFF_BYTES = 4096 # Prefix searched for a <meta charset> declaration
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*[\w.:-]+', re.IGNORECASE)
+XML_DECLARATION_RE = re.compile(r'^\s*<\?xml[^>]*\?>')
+WHITESPACE_RE = re.compile(r'[ \t\r\f\v\u00a0]+')
+
+
+def parse_html(content: bytes) -> Any:
+    """
+    Parses HTML bytes with lxml's (libxml2) HTML parser.
+
+    With a BOM or a <meta charset> declaration libxml2 decodes the bytes itself. Without
+    one it would assume Latin-1, so the encoding is detected like for plain text uploads
+    (UTF-8, else the best Central/Western European code page) and the decoded text is parsed.
+
+    Raises:
+        ValueError: If lxml is not installed or the markup cannot be parsed
+    """
+    if etree is None:
+        raise ValueError("lxml is not installed for HTML extraction.")
+    try:
+        parser = lxml.html.HTMLParser(remove_comments=True, remove_pis=True, default_doctype=False)
+        prefix = bytes(content[:CHARSET_SNIFF_BYTES])
+        if any(prefix.startswith(bom) for bom, _ in BOMS) or META_CHARSET_RE.search(prefix):
+            return lxml.html.document_fromstring(content, parser=parser)
+        # lxml refuses str input carrying an encoding declaration
+        markup = XML_DECLARATION_RE.sub('', decode_text(content).text, count=1)
+        return lxml.html.document_fromstring(markup, parser=parser)
+    except (etree.ParserError, etree.XMLSyntaxError, ValueError) as e:
+        raise ValueError(f"lxml could not parse the HTML: {e}") from e
+
+
+_ATTRIBUTE_CANDIDATES = etree.XPath('.//*[@class or @id or @role or @hidden or @aria-hidden]') if etree is not None else None
+
+
+def _is_boilerplate(element: Any) -> bool:
+    if element.tag in BOILERPLATE_TAGS:
+        # <header>/<footer> inside an <article> usually carry the title and byline
+        if element.tag in ('header', 'footer') and any(a.tag == 'article' for a in element.iterancestors()):
+            return False
+        return True
+    if element.get('hidden') is not None or element.get('aria-hidden') == 'true':
+        return True
+    if element.get('role') in BOILERPLATE_ROLES:
+        return True
+    tokens = f"{element.get('class', '')} {element.get('id', '')}".lower().split()
+    return any(_is_boilerplate_token(token) for token in tokens)
+
+
+def _is_boilerplate_token(token: str) -> bool:
+    if token in BOILERPLATE_ATTR_TOKENS:
+        return True
+    parts = [part for part in ATTR_PART_SEPARATOR_RE.split(token) if part]
+    return (
+        any(part in BOILERPLATE_ATTR_TOKENS for part in parts)
+        and all(part in BOILERPLATE_ATTR_TOKENS or part in LAYOUT_ATTR_PARTS for part in parts)
+    )
+
+
+def _holds_content(element: Any) -> bool:
+    """Whether the element is or contains the main content (<main>, <article>, role=main)."""
+    if element.tag in CONTENT_TAGS or element.get('role') == 'main':
+        return True
+    return any(True for _ in element.iter(*CONTENT_TAGS)) or bool(element.xpath('.//*[@role="main"]'))
+
+
+def strip_boilerplate(root: Any) -> int:
+    """
+    Removes navigation, scripts, ads and similar page furniture in place. Main content
+    containers are never removed, and an <h1> inside removed furniture (typically the
+    page title in a <header>) is kept in its place. Returns the number of removed subtrees.
+    """
+    body = root.find('body')
+    scope = body if body is not None else root
+    # Let libxml2 preselect candidates, then collect before dropping: modifying the tree while iterating it skips elements
+    candidates = list(scope.iter(*BOILERPLATE_TAGS)) + _ATTRIBUTE_CANDIDATES(scope)
+    doomed = [el for el in dict.fromkeys(candidates) if _is_boilerplate(el) and not _holds_content(el)]
+    doomed_set = set(doomed)
+    removed = 0
+    for element in doomed:
+        if not any(ancestor in doomed_set for ancestor in element.iterancestors()):
+            for heading in list(element.iter('h1')):
+                heading.tail = None
+                element.addprevious(heading)
+            element.drop_tree() # Keeps the tail text
+            removed += 1
+    return removed
+
+
+def _drop_non_text(root: Any) -> None:
+    for element in list(root.iter('head', 'script', 'style', 'template')):
+        element.drop_tree()
+
+
+def html_to_text(root: Any) -> str:
+    """Renders a parsed tree as plain text with one line per block element."""
+    _drop_non_text(root)
+
+    parts: List[str] = []
+    for event, element in etree.iterwalk(root, events=('start', 'end')):
+        if not isinstance(element.tag, str):
+            continue
+        if event == 'start':
+            if element.tag in BLOCK_TAGS:
+                parts.append('\n')
+            if element.text:
+                parts.append(element.text)
+        else:
+            if element.tag in BLOCK_TAGS:
+                parts.append('\n')
+            if element.tail:
+                parts.append(element.tail)
+
+    lines = (WHITESPACE_RE.sub(' ', line).strip() for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def find_heading(root: Any) -> Optional[str]:
+    """Returns the text of the first h1-h3 heading, if any."""
+    for element in root.iter(*HEADING_TAGS):
+        heading = WHITESPACE_RE.sub(' ', element.text_content()).strip()
+        if heading:
+            return heading
+    return None
+
+
+def extract_text(content: bytes, remove_boilerplate: bool = True) -> str:
+    """
+    Fast HTML to text extraction on lxml.
+
+    Args:
+        content: HTML content in bytes
+        remove_boilerplate: Drop navigation, headers/footers, ads, scripts and forms; if that
+            would leave less than STRIP_MIN_KEPT_RATIO of the text, the page is kept whole
+
+    Raises:
+        ValueError: If the markup cannot be parsed (callers fall back to html5lib)
+    """
+    root = parse_html(content)
+    if remove_boilerplate:
+        _drop_non_text(root)
+        before = len(root.text_content().split())
+        removed = strip_boilerplate(root)
+        after = len(root.text_content().split())
+        logger.debug(f"Removed {removed} boilerplate elements from HTML.")
+        if before and after < STRIP_MIN_KEPT_RATIO * before:
+            logger.info(f"Boilerplate stripping kept {after} of {before} words, extracting the page unstripped.")
+            root = parse_html(content)
+    return html_to_text(root)
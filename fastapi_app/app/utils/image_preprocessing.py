@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+import logging
+import math
+from typing import Optional, Dict, Any, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+OCR_TARGET_DPI = 300 # Tesseract is tuned for ~300 DPI input
+OCR_MAX_PIXELS = 6_000_000 # Larger images are downscaled before OCR (12 MP phone photos -> 6 MP)
+OCR_MAX_UPSCALE = 2.0 # Low-DPI scans are upscaled at most this much
+OCR_MARGIN_PADDING_PX = 16 # Padding kept around the detected text area
+OCR_DESKEW_MAX_ANGLE = 5.0 # Degrees searched in each direction when deskewing
+OCR_DESKEW_STEP = 0.5 # Angle resolution of the deskew search
+OCR_DESKEW_SAMPLE_PX = 800 # Longest side of the thumbnail used to estimate skew
+OCR_MIN_SEPARABILITY = 0.8 # Share of the grey-level variance the Otsu split must explain to trust its ink mask
+OCR_MIN_CONTRAST = 80 # Grey levels between mean ink and mean paper required to trust the ink mask
+
+DEFAULT_OCR_PREPROCESSING_OPTIONS: Dict[str, Any] = {
+    'enabled': True,
+    'target_dpi': OCR_TARGET_DPI,
+    'max_pixels': OCR_MAX_PIXELS,
+    'grayscale': True,
+    # 'auto': only for clean, bimodal pages (ink on paper); photos with shading or
+    # coloured backgrounds go to Tesseract as grayscale with their margins intact
+    'binarize': 'auto',
+    'crop_margins': 'auto',
+    'deskew': False, # Costs a few rotations of a thumbnail, off by default
+}
+
+
+def _resolve_options(options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merges caller options over the defaults."""
+    resolved = DEFAULT_OCR_PREPROCESSING_OPTIONS.copy()
+    if options:
+        resolved.update(options)
+    return resolved
+
+
+def _scale_factor(size: Tuple[int, int], dpi: Optional[float], options: Dict[str, Any]) -> float:
+    """Computes the resize factor for DPI normalization and the pixel budget."""
+    width, height = size
+    scale = 1.0
+
+    target_dpi = options.get('target_dpi')
+    if dpi and target_dpi and dpi > 0:
+        scale = min(target_dpi / dpi, OCR_MAX_UPSCALE)
+
+    max_pixels = options.get('max_pixels')
+    if max_pixels and width * height * scale * scale > max_pixels:
+        scale = math.sqrt(max_pixels / float(width * height))
+
+    return scale
+
+
+def _to_grayscale_array(image: "Image.Image") -> "np.ndarray":
+    """Converts a PIL image to a 2-D uint8 luminance array (ITU-R 601 weights)."""
+    if image.mode in ('L', '1'):
+        return np.asarray(image.convert('L'), dtype=np.uint8)
+    rgb = np.asarray(image.convert('RGB'), dtype=np.float32)
+    luma = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return np.clip(luma, 0, 255).astype(np.uint8)
+
+
+def otsu_threshold(gray: "np.ndarray") -> int:
+    """Returns the Otsu threshold of a uint8 grayscale array."""
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    if total == 0:
+        return 127
+
+    levels = np.arange(256, dtype=np.float64)
+    weight_bg = np.cumsum(histogram)
+    weight_fg = total - weight_bg
+    cumulative_mean = np.cumsum(histogram * levels)
+    global_mean = cumulative_mean[-1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_bg = cumulative_mean / weight_bg
+        mean_fg = (global_mean - cumulative_mean) / weight_fg
+        between_variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    between_variance = np.nan_to_num(between_variance)
+    return int(np.argmax(between_variance))
+
+
+def is_bimodal(gray: "np.ndarray", threshold: int) -> bool:
+    """
+    Whether an Otsu split cleanly separates ink from paper: the split explains at least
+    OCR_MIN_SEPARABILITY of the grey-level variance and the two classes are at least
+    OCR_MIN_CONTRAST levels apart. Blank pages, photos and shaded scans fail the check.
+    """
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    weight_ink = histogram[:threshold + 1].sum() / total if total else 0.0
+    if weight_ink <= 0.0 or weight_ink >= 1.0:
+        return False
+    levels = np.arange(256, dtype=np.float64)
+    mean = float((histogram * levels).sum() / total)
+    mean_ink = float((histogram[:threshold + 1] * levels[:threshold + 1]).sum() / (weight_ink * total))
+    mean_paper = float((histogram[threshold + 1:] * levels[threshold + 1:]).sum() / ((1.0 - weight_ink) * total))
+    variance = float((histogram * (levels - mean) ** 2).sum() / total)
+    between_variance = weight_ink * (1.0 - weight_ink) * (mean_paper - mean_ink) ** 2
+    return mean_paper - mean_ink >= OCR_MIN_CONTRAST and between_variance >= OCR_MIN_SEPARABILITY * variance
+
+
+def _ink_bounding_box(ink: "np.ndarray", padding: int) -> Optional[Tuple[int, int, int, int]]:
+    """Returns the (left, top, right, bottom) box around ink pixels, or None for a blank page."""
+    rows = np.flatnonzero(ink.any(axis=1))
+    cols = np.flatnonzero(ink.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return None
+    height, width = ink.shape
+    top = max(int(rows[0]) - padding, 0)
+    bottom = min(int(rows[-1]) + padding + 1, height)
+    left = max(int(cols[0]) - padding, 0)
+    right = min(int(cols[-1]) + padding + 1, width)
+    return left, top, right, bottom
+
+
+def estimate_skew_angle(ink: "np.ndarray") -> float:
+    """
+    Estimates page skew in degrees using the projection-profile method.
+
+    Text lines produce sharp peaks in the row sums of the ink mask when they are
+    horizontal, so the angle maximising the variance of the row profile wins.
+    """
+    height, width = ink.shape
+    factor = min(1.0, OCR_DESKEW_SAMPLE_PX / float(max(height, width)))
+    thumbnail = Image.fromarray((ink * 255).astype(np.uint8))
+    if factor < 1.0:
+        thumbnail = thumbnail.resize((max(int(width * factor), 1), max(int(height * factor), 1)), Image.NEAREST)
+
+    angles = np.arange(-OCR_DESKEW_MAX_ANGLE, OCR_DESKEW_MAX_ANGLE + OCR_DESKEW_STEP / 2, OCR_DESKEW_STEP)
+    scores = np.empty(angles.shape, dtype=np.float64)
+    for i, angle in enumerate(angles):
+        rotated = np.asarray(thumbnail.rotate(float(angle), resample=Image.NEAREST, expand=True))
+        scores[i] = np.var(rotated.sum(axis=1, dtype=np.int64))
+    return float(angles[int(np.argmax(scores))])
+
+
+def preprocess_image_for_ocr(image: "Image.Image", options: Optional[Dict[str, Any]] = None) -> "Image.Image":
+    """
+    Prepares an image for OCR to cut recognition time on pixels that carry no text.
+
+    Args:
+        image: PIL image to process
+        options: Dictionary with pre-processing options (merged over DEFAULT_OCR_PREPROCESSING_OPTIONS):
+            - enabled: bool - skip all pre-processing when False
+            - target_dpi: int - normalize resolution to this DPI when the source DPI is known
+            - max_pixels: int - downscale images with more pixels than this
+            - grayscale: bool - convert to 8-bit luminance
+            - binarize: bool or 'auto' - apply an Otsu threshold (implies grayscale);
+              'auto' only when is_bimodal() accepts the page
+            - crop_margins: bool or 'auto' - crop empty margins around the text area;
+              'auto' only when is_bimodal() accepts the page
+            - deskew: bool - rotate the page so text lines are horizontal
+
+    Returns:
+        The processed PIL image, or the original image when pre-processing is disabled or unavailable.
+    """
+    options = _resolve_options(options)
+    if not options.get('enabled'):
+        return image
+    if np is None or Image is None:
+        logger.warning("NumPy or Pillow is not installed. Skipping OCR pre-processing.")
+        return image
+
+    original_size = image.size
+
+    # Phone photos are frequently stored sideways with an EXIF orientation tag
+    image = ImageOps.exif_transpose(image)
+
+    # 1. DPI normalization and downscaling of oversized images
+    dpi_info = image.info.get('dpi')
+    dpi = float(dpi_info[0]) if dpi_info else None
+    scale = _scale_factor(image.size, dpi, options)
+    if abs(scale - 1.0) > 0.01:
+        new_size = (max(int(image.width * scale), 1), max(int(image.height * scale), 1))
+        image = image.resize(new_size, Image.LANCZOS if scale < 1.0 else Image.BICUBIC)
+
+    needs_array = options.get('grayscale') or options.get('binarize') or options.get('crop_margins') or options.get('deskew')
+    if not needs_array:
+        return image
+
+    # 2. Grayscale and binarization
+    gray = _to_grayscale_array(image)
+    threshold = otsu_threshold(gray)
+    ink = gray <= threshold
+    bimodal = None
+    if 'auto' in (options.get('binarize'), options.get('crop_margins')):
+        bimodal = is_bimodal(gray, threshold)
+    binarize = bimodal if options.get('binarize') == 'auto' else bool(options.get('binarize'))
+    crop_margins = bimodal if options.get('crop_margins') == 'auto' else bool(options.get('crop_margins'))
+    output = np.where(ink, 0, 255).astype(np.uint8) if binarize else gray
+
+    # 3. Deskew
+    if options.get('deskew'):
+        angle = estimate_skew_angle(ink)
+        if abs(angle) >= OCR_DESKEW_STEP:
+            logger.info(f"Deskewing image by {angle:.1f} degrees before OCR.")
+            rotated = Image.fromarray(output).rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+            output = np.asarray(rotated, dtype=np.uint8)
+            ink = output <= threshold
+
+    # 4. Crop empty margins
+    if crop_margins:
+        box = _ink_bounding_box(ink, OCR_MARGIN_PADDING_PX)
+        if box:
+            left, top, right, bottom = box
+            output = output[top:bottom, left:right]
+
+    result = Image.fromarray(np.ascontiguousarray(output))
+    if options.get('target_dpi'):
+        result.info['dpi'] = (options['target_dpi'], options['target_dpi'])
+
+    logger.info(f"OCR pre-processing: {original_size[0]}x{original_size[1]} -> {result.width}x{result.height} px.")
+    return result
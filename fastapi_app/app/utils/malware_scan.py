@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import socket
+import struct
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from .bounded_cache import BoundedLRU
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+MALWARE_SCAN_ENABLED = os.getenv("CLAMD_ENABLED", "false").lower() in ("1", "true", "yes")
+CLAMD_SOCKET = os.getenv("CLAMD_SOCKET", "") # Unix socket of clamd; TCP is used when empty
+CLAMD_HOST = os.getenv("CLAMD_HOST", "127.0.0.1")
+CLAMD_PORT = int(os.getenv("CLAMD_PORT", "3310"))
+CLAMD_POOL_SIZE = int(os.getenv("CLAMD_POOL_SIZE", "4")) # Concurrent scans and idle connections kept open
+CLAMD_TIMEOUT_SECONDS = 30 # Socket timeout of connects, sends and the verdict
+CLAMD_IDLE_SECONDS = 20 # Idle connections older than this are dropped (clamd's IdleTimeout defaults to 30 s)
+CLAMD_CHUNK_BYTES = 256 * 1024 # INSTREAM chunk size
+CLAMD_FAIL_OPEN = os.getenv("CLAMD_FAIL_OPEN", "false").lower() in ("1", "true", "yes") # Accept files when clamd is down
+SCAN_CACHE_MAX_ENTRIES = 10000 # Verdicts kept, least recently used are dropped first
+SCAN_CACHE_CLEAN_TTL_SECONDS = 6 * 3600 # Clean verdicts expire so new signatures get a chance; detections never do
+
+
+class ScanVerdict(NamedTuple):
+    clean: bool
+    signature: Optional[str] # Name of the detected malware
+    cached: bool # Whether the verdict came from the cache instead of clamd
+
+
+class MalwareDetected(ValueError):
+    """Raised for uploads clamd reports as infected."""
+
+    def __init__(self, signature: str):
+        super().__init__(f"File rejected by malware scan: {signature}")
+        self.signature = signature
+
+
+class MalwareScanError(RuntimeError):
+    """Raised when no verdict could be obtained from clamd."""
+
+
+class _Session:
+    """A clamd connection in IDSESSION mode, so several scans can share it."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.last_used = time.monotonic()
+
+    def close(self) -> None:
+        try:
+            self.sock.sendall(b'zEND\0')
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class ClamdClient:
+    """
+    Minimal clamd client streaming content with INSTREAM over pooled connections.
+
+    Connections are opened in session mode and returned to the pool after each scan;
+    a pooled connection that clamd closed meanwhile is replaced once transparently.
+    Thread-safe.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        host: str = CLAMD_HOST,
+        port: int = CLAMD_PORT,
+        timeout: float = CLAMD_TIMEOUT_SECONDS,
+        max_idle: int = CLAMD_POOL_SIZE
+    ):
+        self.socket_path = socket_path
+        self.address = (host, port)
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: List[_Session] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> _Session:
+        if self.socket_path:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            target = self.socket_path
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            target = self.address
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(target)
+            sock.sendall(b'zIDSESSION\0')
+        except OSError:
+            sock.close()
+            raise
+        return _Session(sock)
+
+    def _acquire(self) -> Tuple[_Session, bool]:
+        """Returns an idle connection (pooled=True) or a new one."""
+        now = time.monotonic()
+        stale = []
+        session = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if now - candidate.last_used < CLAMD_IDLE_SECONDS:
+                    session = candidate
+                    break
+                stale.append(candidate)
+        for candidate in stale:
+            candidate.close()
+        if session is not None:
+            return session, True
+        return self._connect(), False
+
+    def _release(self, session: _Session) -> None:
+        session.last_used = time.monotonic()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(session)
+                return
+        session.close()
+
+    def close(self) -> None:
+        """Closes all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            session.close()
+
+    @staticmethod
+    def _read_reply(sock: socket.socket) -> str:
+        reply = bytearray()
+        while not reply.endswith(b'\0'):
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("clamd closed the connection")
+            reply += chunk
+        return reply[:-1].decode('utf-8', errors='replace')
+
+    def _instream(self, sock: socket.socket, data: bytes) -> str:
+        sock.sendall(b'zINSTREAM\0')
+        view = memoryview(data)
+        for offset in range(0, len(view), CLAMD_CHUNK_BYTES):
+            chunk = view[offset:offset + CLAMD_CHUNK_BYTES]
+            sock.sendall(struct.pack('!L', len(chunk)))
+            sock.sendall(chunk)
+        sock.sendall(struct.pack('!L', 0))
+        return self._read_reply(sock)
+
+    def scan(self, data: bytes) -> Optional[str]:
+        """
+        Streams data to clamd.
+
+        Returns:
+            The detected signature name, or None if the data is clean
+
+        Raises:
+            MalwareScanError: If clamd is unreachable or reports an error
+        """
+        for attempt in range(2):
+            try:
+                session, pooled = self._acquire()
+            except OSError as e:
+                raise MalwareScanError(f"Malware scanner unavailable: {e}") from e
+            try:
+                reply = self._instream(session.sock, data)
+            except OSError as e:
+                session.sock.close()
+                if pooled and attempt == 0:
+                    continue # clamd may have closed the idle connection, retry on a fresh one
+                raise MalwareScanError(f"Malware scan failed: {e}") from e
+
+            # Session replies are prefixed with the request number: "1: stream: OK"
+            number, _, verdict = reply.partition(': ')
+            if not number.isdigit():
+                verdict = reply
+            if verdict.endswith('ERROR'):
+                session.sock.close() # clamd ends the session after an error
+                raise MalwareScanError(f"Malware scan failed: {verdict}")
+            self._release(session)
+            if verdict.endswith(' FOUND'):
+                return verdict[len('stream: '):-len(' FOUND')]
+            if verdict == 'stream: OK':
+                return None
+            raise MalwareScanError(f"Unexpected clamd reply: {verdict}")
+        raise MalwareScanError("Malware scan failed") # Not reached
+
+
+class VerdictCache:
+    """Bounded in-memory LRU of scan verdicts keyed by the SHA-256 of the content."""
+
+    def __init__(self, max_entries: int = SCAN_CACHE_MAX_ENTRIES, clean_ttl_seconds: float = SCAN_CACHE_CLEAN_TTL_SECONDS):
+        self.clean_ttl_seconds = clean_ttl_seconds
+        self._entries: BoundedLRU[Tuple[Optional[str], Optional[float]]] = BoundedLRU(max_entries)
+
+    def get(self, key: str) -> Optional[ScanVerdict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        signature, expires_at = entry
+        if expires_at is not None and time.monotonic() > expires_at:
+            self._entries.pop(key)
+            return None
+        return ScanVerdict(signature is None, signature, True)
+
+    def put(self, key: str, signature: Optional[str]) -> None:
+        expires_at = time.monotonic() + self.clean_ttl_seconds if signature is None else None
+        self._entries.put(key, (signature, expires_at))
+
+
+class MalwareScanner:
+    """Scans uploads with clamd, reusing verdicts for content seen before."""
+
+    def __init__(self, client: ClamdClient, cache: Optional[VerdictCache] = None, fail_open: bool = CLAMD_FAIL_OPEN):
+        self.client = client
+        self.cache = cache or VerdictCache()
+        self.fail_open = fail_open
+        self._pool = ThreadPoolExecutor(max_workers=client.max_idle, thread_name_prefix="clamd")
+
+    def scan(self, content: bytes) -> ScanVerdict:
+        """
+        Returns the verdict for content, from the cache when the same bytes were scanned before.
+
+        Raises:
+            MalwareScanError: If clamd gives no verdict and the scanner does not fail open
+        """
+        key = hashlib.sha256(content).hexdigest()
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            signature = self.client.scan(content)
+        except MalwareScanError as e:
+            if not self.fail_open:
+                raise
+            logger.warning(f"{e}; accepting the file unscanned (CLAMD_FAIL_OPEN).")
+            return ScanVerdict(True, None, False)
+        self.cache.put(key, signature)
+        if signature:
+            logger.warning(f"Malware detected in upload: {signature}")
+        return ScanVerdict(signature is None, signature, False)
+
+    def check(self, content: bytes) -> ScanVerdict:
+        """Like scan(), but raises MalwareDetected for infected content."""
+        verdict = self.scan(content)
+        if not verdict.clean:
+            raise MalwareDetected(verdict.signature)
+        return verdict
+
+    def start_check(self, load_content: Callable[[], bytes]) -> "Future[ScanVerdict]":
+        """
+        Starts check() in the scan pool and returns its future at once, so the scan runs
+        while the caller sniffs and extracts the file.
+
+        Args:
+            load_content: Returns the content (decodes the base64 upload, reads the stored
+                file); called in the scan pool
+        """
+        return self._pool.submit(lambda: self.check(load_content()))
+
+
+_scanner: Optional[MalwareScanner] = None
+_scanner_lock = threading.Lock()
+
+def get_malware_scanner() -> Optional[MalwareScanner]:
+    """Returns the process-wide malware scanner, or None when scanning is disabled."""
+    global _scanner
+    if not MALWARE_SCAN_ENABLED:
+        return None
+    if _scanner is None:
+        with _scanner_lock:
+            if _scanner is None:
+                _scanner = MalwareScanner(ClamdClient(CLAMD_SOCKET or None))
+    return _scanner
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import zipfile
+from typing import Optional
+
+import magic
+
+from .extraction_io import as_binary_stream
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+MIME_SNIFF_BYTES = 64 * 1024 # Prefix handed to libmagic; every format we accept is identified within it
+CONTAINER_MIME_MAX_BYTES = 256 # Size limit of an ODF/EPUB 'mimetype' member
+
+ZIP_SIGNATURES = (b'PK\x03\x04', b'PK\x05\x06') # Local file header, empty archive
+ZIP_LIKE_MIME_TYPES = ('application/zip', 'application/octet-stream')
+
+# OOXML packages are recognised by their main part
+OOXML_MAIN_PARTS = (
+    ('word/document.xml', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    ('xl/workbook.xml', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    ('ppt/presentation.xml', 'application/vnd.openxmlformats-officedocument.presentationml.presentation'),
+)
+# Types declared by the 'mimetype' member of EPUB and OpenDocument packages
+PACKAGE_MIME_TYPES = (
+    'application/epub+zip',
+    'application/vnd.oasis.opendocument.text',
+    'application/vnd.oasis.opendocument.spreadsheet',
+    'application/vnd.oasis.opendocument.presentation',
+)
+
+
+class _MagicState(threading.local):
+    """One libmagic handle per thread: loading the magic database costs milliseconds, lookups microseconds."""
+
+    def __init__(self):
+        self.handle = None
+
+
+_magic = _MagicState()
+
+
+def _magic_handle() -> magic.Magic:
+    if _magic.handle is None:
+        _magic.handle = magic.Magic(mime=True)
+    return _magic.handle
+
+
+def sniff_mime_type(file_content: bytes, sniff_bytes: Optional[int] = None) -> str:
+    """MIME type reported by libmagic for a bounded prefix of the content."""
+    return _magic_handle().from_buffer(bytes(file_content[:sniff_bytes or MIME_SNIFF_BYTES]))
+
+
+def inspect_zip_container(file_content: bytes) -> Optional[str]:
+    """
+    Identifies OOXML, EPUB and OpenDocument packages from the zip central directory.
+
+    Only the directory and the tiny 'mimetype' member are read. Returns None for
+    plain archives and for data that is not a readable zip.
+    """
+    try:
+        with zipfile.ZipFile(as_binary_stream(file_content)) as archive:
+            names = set(archive.namelist())
+            if 'mimetype' in names and archive.getinfo('mimetype').file_size <= CONTAINER_MIME_MAX_BYTES:
+                declared = archive.read('mimetype').decode('ascii', errors='replace').strip()
+                if declared in PACKAGE_MIME_TYPES:
+                    return declared
+            if '[Content_Types].xml' in names:
+                for part, mime_type in OOXML_MAIN_PARTS:
+                    if part in names:
+                        return mime_type
+    except (zipfile.BadZipFile, OSError, KeyError) as e:
+        logger.debug(f"Zip container inspection failed: {e}")
+    return None
+
+
+def detect_mime_type(file_content: bytes, filename: str = '') -> str:
+    """
+    Detects the MIME type of an upload from a bounded prefix.
+
+    libmagic sees only the first MIME_SNIFF_BYTES; when that is reported as a generic
+    zip the container is inspected to tell DOCX, XLSX, PPTX, EPUB and ODF apart.
+    CSV files (reported as text/plain) are recognised by extension.
+
+    Args:
+        file_content: Upload content
+        filename: Original file name, only used for the CSV rule
+    """
+    mime_type = sniff_mime_type(file_content)
+    if mime_type in ZIP_LIKE_MIME_TYPES and bytes(file_content[:4]) in ZIP_SIGNATURES:
+        mime_type = inspect_zip_container(file_content) or 'application/zip'
+    elif mime_type == 'text/plain' and filename.lower().endswith('.csv'):
+        mime_type = 'text/csv'
+    return mime_type
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+import re
+import difflib
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .cost_estimation import estimate_tokens
+from .structured_text import StructuredText
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+DEDUP_MIN_PARAGRAPH_CHARS = 80 # Shorter paragraphs (headings, list items) are never removed as duplicates
+DEDUP_SHINGLE_WORDS = 2 # Words per shingle hashed into the SimHash
+DEDUP_MAX_DISTANCE = 7 # Max differing SimHash bits of near-duplicate paragraphs (of 64; unrelated text differs in ~32)
+DEDUP_MAX_DIFF_WORDS = 30 # A near-duplicate differing in more words is kept whole instead of as a diff
+FURNITURE_MAX_LINE_CHARS = 100 # Longer lines are never page headers or footers
+FURNITURE_MAX_NUMBERED_CHARS = 40 # Only lines this short may differ in digits ("Page 3 of 10")
+FURNITURE_MIN_REPEATS = 3 # A header or footer must repeat on at least this many pages
+FURNITURE_EDGE_LINES = 2 # Non-empty lines at the top and bottom of each page examined for headers and footers
+
+PARAGRAPH_PATTERN = re.compile(r'\n\s*\n')
+WORD_PATTERN = re.compile(r'\w+')
+DIGITS_PATTERN = re.compile(r'\d+')
+NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)*')
+# Words that flip the meaning of a clause; near-duplicates must agree on them and on all numbers
+NEGATIONS = frozenset("no not never none nor neither without cannot nie bez nigdy nicht kein keine keinen ohne ne pas jamais sans".split())
+APOSTROPHE_WORD_PATTERN = re.compile(r"\w+(?:['’]\w+)*")
+
+# The 64-bit SimHash is split into blocks; two hashes within DEDUP_MAX_DISTANCE bits agree
+# on at least one of DEDUP_MAX_DISTANCE + 1 blocks, so only paragraphs sharing a block are compared
+SIMHASH_BITS = 64
+
+
+class DedupReport(NamedTuple):
+    removed_chars: int
+    removed_tokens: int
+    removed_paragraphs: int # Paragraphs repeating an earlier one exactly, or replaced by a diff against it
+    removed_furniture_lines: int # Repeated page header and footer lines
+    duplicate_documents: int # Documents whose every substantial paragraph appeared before, exactly
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of the word shingles of text: similar texts get hashes differing in few bits.
+
+    Raises:
+        ValueError: If NumPy is not installed
+    """
+    if np is None:
+        raise ValueError("NumPy is not installed for near-duplicate detection.")
+    words = WORD_PATTERN.findall(text.lower())
+    size = min(DEDUP_SHINGLE_WORDS, len(words)) or 1
+    shingles = {' '.join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+    hashes = np.frombuffer(
+        b''.join(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles),
+        dtype='>u8'
+    )
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1) # Most significant bit first
+    weights = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+    return int.from_bytes(np.packbits(weights > 0).tobytes(), 'big')
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(WORD_PATTERN.findall(text.lower()))
+
+
+class SimHashIndex:
+    """Finds earlier SimHashes within max_distance bits, comparing only hashes that share a block."""
+
+    def __init__(self, max_distance: int = DEDUP_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.block_bits = SIMHASH_BITS // (max_distance + 1)
+        self._blocks: List[Dict[int, List[Tuple[int, Any]]]] = [{} for _ in range(max_distance + 1)]
+
+    def _keys(self, value: int) -> List[int]:
+        mask = (1 << self.block_bits) - 1
+        return [(value >> (block * self.block_bits)) & mask for block in range(len(self._blocks))]
+
+    def find(self, value: int) -> Optional[Any]:
+        """Label of an indexed hash near value, or None."""
+        for block, key in zip(self._blocks, self._keys(value)):
+            for other, label in block.get(key, ()):
+                if bin(value ^ other).count('1') <= self.max_distance:
+                    return label
+        return None
+
+    def add(self, value: int, label: Any) -> None:
+        for block, key in zip(self._blocks, self._keys(value)):
+            block.setdefault(key, []).append((value, label))
+
+
+def _furniture_key(line: str) -> Optional[str]:
+    """Key under which a page edge line is counted, or None if it can never be furniture."""
+    line = line.strip()
+    if not line or len(line) > FURNITURE_MAX_LINE_CHARS or line.startswith('|'):
+        return None # Table rows repeat per sheet or page legitimately
+    return DIGITS_PATTERN.sub('#', line) if len(line) <= FURNITURE_MAX_NUMBERED_CHARS else line
+
+
+def strip_page_furniture(structured: StructuredText) -> Tuple[str, int]:
+    """
+    Removes header and footer lines repeated at the top or bottom of many pages, e.g. a
+    running title or "Page 3 of 10". Pages are the 'page' spans of the extracted text, so
+    documents without pages (pasted text, spreadsheets) are returned unchanged. Short lines
+    are matched ignoring digits; table rows are never removed.
+
+    Returns:
+        Tuple of (text without the repeated lines, number of lines removed)
+    """
+    text = structured.text
+    edges = [] # (start, end, key) of the edge lines of every page
+    for span, page in structured.iter_units('page'):
+        lines = []
+        offset = span.start
+        for line in page.splitlines(keepends=True):
+            if line.strip():
+                lines.append((offset, offset + len(line), _furniture_key(line)))
+            offset += len(line)
+        if len(lines) > 2 * FURNITURE_EDGE_LINES:
+            lines = lines[:FURNITURE_EDGE_LINES] + lines[-FURNITURE_EDGE_LINES:]
+        edges.extend(line for line in lines if line[2] is not None)
+
+    counts = Counter(key for _, _, key in edges)
+    removed = sorted((start, end) for start, end, key in edges if counts[key] >= FURNITURE_MIN_REPEATS)
+    if not removed:
+        return text, 0
+    parts = []
+    position = 0
+    for start, end in removed:
+        parts.append(text[position:start])
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts), len(removed)
+
+
+def _key_facts(paragraph: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Numbers and negations of a paragraph in order; near-duplicates must agree on both."""
+    lowered = paragraph.lower()
+    negations = tuple(
+        word for word in APOSTROPHE_WORD_PATTERN.findall(lowered)
+        if word in NEGATIONS or word.endswith(("n't", "n’t"))
+    )
+    return tuple(NUMBER_PATTERN.findall(lowered)), negations
+
+
+def _word_diff(original: str, variant: str) -> Optional[str]:
+    """Compact description of the word changes from original to variant, or None if there are too many."""
+    before, after = original.split(), variant.split()
+    changes = []
+    changed_words = 0
+    for operation, i1, i2, j1, j2 in difflib.SequenceMatcher(None, before, after, autojunk=False).get_opcodes():
+        if operation == 'equal':
+            continue
+        changed_words += max(i2 - i1, j2 - j1)
+        old, new = ' '.join(before[i1:i2]), ' '.join(after[j1:j2])
+        if operation == 'delete':
+            changes.append(f'removed "{old}"')
+        elif operation == 'insert':
+            changes.append(f'added "{new}"')
+        else:
+            changes.append(f'"{old}" -> "{new}"')
+    if changed_words > DEDUP_MAX_DIFF_WORDS:
+        return None
+    return '; '.join(changes)
+
+
+def deduplicate_documents(
+    names: List[str],
+    texts: List[str],
+    spans: Optional[List[Optional[Dict[str, List[Any]]]]] = None,
+    normalize: Optional[Callable[[str], str]] = None
+) -> Tuple[List[str], DedupReport]:
+    """
+    Removes repeated page furniture within each document, then paragraphs repeating an
+    earlier paragraph of any document in the list:
+
+    - an exact repeat (ignoring case, spacing and punctuation) is replaced by a short note
+      naming the document that has it;
+    - a near repeat (close SimHash) with the same numbers and negations is replaced by the
+      word changes against the earlier paragraph, or kept whole if the changes are many;
+    - a near repeat that differs in any number or negation is always kept whole, since
+      versions differing in a deadline, amount or "not" are what users compare.
+
+    A document made only of exact repeats is reduced to one note.
+
+    Args:
+        names: Document names, used in the notes
+        texts: Document contents, in the order they are presented
+        spans: Unit spans of each text as returned with the extracted text (or None); their
+            pages locate headers and footers
+        normalize: Applied to each text after furniture removal (e.g. whitespace compaction)
+
+    Returns:
+        Tuple of (deduplicated texts, report of what was removed)
+    """
+    index = SimHashIndex()
+    seen: Dict[str, str] = {} # Normalized paragraph -> name of the document that has it
+    paragraphs: List[Tuple[str, str]] = [] # (document name, paragraph) of the indexed paragraphs
+    result = []
+    removed_chars = removed_tokens = 0
+    removed_paragraphs = furniture_lines = duplicate_documents = 0
+    for position, (name, text) in enumerate(zip(names, texts)):
+        document_spans = spans[position] if spans else None
+        if document_spans:
+            try:
+                stripped, lines = strip_page_furniture(StructuredText.from_dict({'text': text, 'spans': document_spans}))
+            except ValueError as e:
+                logger.warning(f"Ignoring invalid spans of {name}: {e}")
+                stripped, lines = text, 0
+            furniture_lines += lines
+            removed_chars += len(text) - len(stripped)
+            removed_tokens += estimate_tokens(text) - estimate_tokens(stripped)
+            text = stripped
+        if normalize:
+            text = normalize(text)
+
+        kept: List[str] = []
+        substantial = repeated = 0
+        sources = set()
+        previous_source = None
+        for paragraph in PARAGRAPH_PATTERN.split(text):
+            if len(paragraph.strip()) < DEDUP_MIN_PARAGRAPH_CHARS:
+                kept.append(paragraph)
+                previous_source = None
+                continue
+            substantial += 1
+            normalized = _normalize(paragraph)
+            source = seen.get(normalized)
+            if source is not None:
+                repeated += 1
+                removed_paragraphs += 1
+                sources.add(source)
+                if source != previous_source:
+                    kept.append(f"[Repeated passage omitted, see {source}]")
+                    previous_source = source
+                continue
+
+            previous_source = None
+            fingerprint = simhash(normalized)
+            match = index.find(fingerprint)
+            if match is not None:
+                source, original = paragraphs[match]
+                if _key_facts(original) == _key_facts(paragraph):
+                    changes = _word_diff(original, paragraph)
+                    if changes is not None:
+                        removed_paragraphs += 1
+                        kept.append(f"[Variant of a passage in {source}: {changes}]")
+                        continue
+            seen[normalized] = name
+            index.add(fingerprint, len(paragraphs))
+            paragraphs.append((name, paragraph))
+            kept.append(paragraph)
+        if substantial and repeated == substantial:
+            duplicate_documents += 1
+            kept = [f"[Duplicate of {', '.join(sorted(sources))}, omitted]"]
+        deduplicated = '\n\n'.join(kept)
+        removed_chars += len(text) - len(deduplicated)
+        removed_tokens += estimate_tokens(text) - estimate_tokens(deduplicated)
+        result.append(deduplicated)
+
+    report = DedupReport(max(removed_chars, 0), max(removed_tokens, 0), removed_paragraphs, furniture_lines, duplicate_documents)
+    if removed_paragraphs or furniture_lines:
+        logger.info(f"Deduplication removed {report.removed_chars} chars (~{report.removed_tokens} tokens): {removed_paragraphs} paragraph(s), {furniture_lines} header/footer line(s), {duplicate_documents} duplicate document(s).")
+    return result, report
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Optional, List, Tuple
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "tripplecheck_ocr_cache"))
+OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "256")) # Size limit of the on-disk cache
+OCR_CACHE_EVICT_TO = 0.9 # Eviction trims the cache to this fraction of the size limit
+OCR_CACHE_CHECK_EVERY = 64 # Writes between eviction checks (a directory walk)
+
+
+class OCRCache:
+    """
+    On-disk cache of OCR results keyed by the hash of the normalized page image.
+
+    Entries are plain UTF-8 files written atomically (temp file + rename), so the cache
+    can be shared by all workers on a host. Reads refresh the file mtime, which makes
+    the size-based eviction least-recently-used.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._writes_since_check = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image, languages: str) -> str:
+        """Builds the cache key from the image pixels, its geometry and the OCR language settings."""
+        digest = hashlib.sha256()
+        digest.update(f"{languages}|{image.mode}|{image.width}x{image.height}|".encode("utf-8"))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached OCR text for the key, or None on a miss."""
+        path = self._path_for(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read OCR cache entry {path}: {e}")
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass # Entry evicted by another worker in the meantime
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Stores OCR text for the key. Failures are logged and ignored."""
+        path = self._path_for(key)
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temp_path, path)
+            temp_path = None
+        except OSError as e:
+            logger.warning(f"Could not write OCR cache entry {path}: {e}")
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                try: os.unlink(temp_path)
+                except OSError: pass
+
+        with self._lock:
+            self._writes_since_check += 1
+            should_check = self._writes_since_check >= OCR_CACHE_CHECK_EVERY
+            if should_check:
+                self._writes_since_check = 0
+        if should_check:
+            self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self) -> int:
+        """Deletes least recently used entries while the cache exceeds its size limit. Returns bytes freed."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        target = int(self.max_bytes * OCR_CACHE_EVICT_TO)
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= target:
+                break
+            try:
+                os.unlink(path)
+                freed += size
+            except OSError:
+                pass # Already removed by another worker
+        logger.info(f"OCR cache eviction freed {freed} bytes ({total} -> {total - freed}).")
+        return freed
+
+
+_ocr_cache: Optional[OCRCache] = None
+
+def get_ocr_cache() -> Optional[OCRCache]:
+    """Returns the process-wide OCR cache, or None when caching is disabled."""
+    global _ocr_cache
+    if not OCR_CACHE_ENABLED:
+        return None
+    if _ocr_cache is None:
+        _ocr_cache = OCRCache(OCR_CACHE_DIR, OCR_CACHE_MAX_MB * 1024 * 1024)
+    return _ocr_cache
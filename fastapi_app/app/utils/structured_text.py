@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .extraction_stream import TextFragment
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Markdown ATX headings as produced by html2text and the Markdown/HTML extractors
+HEADING_PATTERN = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t#]*$', re.MULTILINE)
+
+
+class Span(NamedTuple):
+    """
+    A document unit located in the extracted text.
+
+    Attributes:
+        unit: Kind of unit ('page', 'slide', 'sheet', 'chapter', 'heading', ...)
+        index: 1-based position of the unit within its kind
+        start: Offset of the first character (Python string index, i.e. code points)
+        end: Offset after the last character
+        title: Unit title (sheet name, chapter or heading text), None when absent
+    """
+    unit: str
+    index: int
+    start: int
+    end: int
+    title: Optional[str] = None
+
+
+class StructuredText:
+    """
+    Extracted text with the spans of its document units.
+
+    Spans are kept column-wise in typed arrays (a few bytes per span instead of a
+    tuple and dict per span) and serialize to the same columnar layout. Spans are
+    ordered by start offset; heading spans nest inside the unit containing them and
+    run until the next heading of the same or a higher level.
+    """
+
+    __slots__ = ('text', '_units', '_unit_codes', '_indices', '_starts', '_ends', '_titles')
+
+    def __init__(self, text: str = ''):
+        self.text = text
+        self._units: List[str] = [] # Unit names, referenced by code
+        self._unit_codes = array('B')
+        self._indices = array('I')
+        self._starts = array('I')
+        self._ends = array('I')
+        self._titles: List[Optional[str]] = []
+
+    def add_span(self, unit: str, index: int, start: int, end: int, title: Optional[str] = None) -> None:
+        """Appends a span; spans must be added in start order."""
+        if self._starts and start < self._starts[-1]:
+            raise ValueError(f"Spans must be added in start order ({start} < {self._starts[-1]})")
+        if unit not in self._units:
+            self._units.append(unit)
+        self._unit_codes.append(self._units.index(unit))
+        self._indices.append(index)
+        self._starts.append(start)
+        self._ends.append(end)
+        self._titles.append(title)
+
+    @classmethod
+    def from_fragments(cls, fragments: Iterable[TextFragment], separator: str = '\n\n', headings: bool = True) -> 'StructuredText':
+        """
+        Joins extractor fragments like separator.join() and records one span per fragment.
+
+        Args:
+            fragments: Fragments from an iter_extract_text_from_* generator or consume_fragments
+            separator: Text placed between fragments
+            headings: Also record Markdown headings found in the fragments
+        """
+        structured = cls()
+        parts: List[str] = []
+        offset = 0
+        heading_count = 0
+        for fragment in fragments:
+            if parts:
+                parts.append(separator)
+                offset += len(separator)
+            parts.append(fragment.text)
+            end = offset + len(fragment.text)
+            structured.add_span(fragment.unit, fragment.index, offset, end, fragment.title)
+            if headings:
+                for level, title, start, heading_end in _iter_headings(fragment.text):
+                    heading_count += 1
+                    structured.add_span('heading', heading_count, offset + start, offset + heading_end, title)
+            offset = end
+        structured.text = ''.join(parts)
+        return structured
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def span(self, position: int) -> Span:
+        """The span at the given position in span order."""
+        return Span(
+            self._units[self._unit_codes[position]],
+            self._indices[position],
+            self._starts[position],
+            self._ends[position],
+            self._titles[position],
+        )
+
+    def __iter__(self) -> Iterator[Span]:
+        return (self.span(position) for position in range(len(self)))
+
+    def spans_at(self, offset: int) -> List[Span]:
+        """Spans containing the character offset, outermost first (e.g. chapter, then heading)."""
+        last = bisect_right(self._starts, offset)
+        return [self.span(position) for position in range(last) if self._ends[position] > offset]
+
+    def iter_units(self, unit: str) -> Iterator[Tuple[Span, str]]:
+        """Yields (span, text) for every span of one kind, e.g. all pages."""
+        for span in self:
+            if span.unit == unit:
+                yield span, self.text[span.start:span.end]
+
+    def spans_to_dict(self) -> Dict[str, List[Any]]:
+        """Columnar representation of the spans, e.g. {'units': ['page'], 'unit': [0, 0], 'start': [0, 812], ...}."""
+        return {
+            'units': list(self._units),
+            'unit': self._unit_codes.tolist(),
+            'index': self._indices.tolist(),
+            'start': self._starts.tolist(),
+            'end': self._ends.tolist(),
+            'title': list(self._titles),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'text': self.text, 'spans': self.spans_to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StructuredText':
+        """
+        Restores a result serialized with to_dict().
+
+        Raises:
+            ValueError: If the span columns are inconsistent
+        """
+        structured = cls(data.get('text', ''))
+        spans = data.get('spans') or {}
+        columns = [spans.get(name, []) for name in ('unit', 'index', 'start', 'end', 'title')]
+        if len({len(column) for column in columns}) > 1:
+            raise ValueError("Span columns have different lengths")
+        structured._units = list(spans.get('units', []))
+        try:
+            structured._unit_codes = array('B', columns[0])
+            structured._indices = array('I', columns[1])
+            structured._starts = array('I', columns[2])
+            structured._ends = array('I', columns[3])
+        except (TypeError, OverflowError) as e:
+            raise ValueError(f"Invalid span data: {e}") from e
+        structured._titles = list(columns[4])
+        if any(code >= len(structured._units) for code in structured._unit_codes):
+            raise ValueError("Span refers to an unknown unit")
+        return structured
+
+
+def _iter_headings(text: str) -> Iterator[Tuple[int, str, int, int]]:
+    """
+    Yields (level, title, start, end) of the Markdown headings in a text, in start order.
+
+    A heading section ends where the next heading of the same or a higher level starts.
+    """
+    sections: List[List[Any]] = []
+    open_sections: List[List[Any]] = []
+    for match in HEADING_PATTERN.finditer(text):
+        level = len(match.group(1))
+        while open_sections and open_sections[-1][0] >= level:
+            open_sections.pop()[3] = match.start()
+        section = [level, match.group(2).strip(), match.start(), len(text)]
+        sections.append(section)
+        open_sections.append(section)
+    for level, title, start, end in sections:
+        yield level, title, start, end
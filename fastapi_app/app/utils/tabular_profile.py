@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+import datetime
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+TABLE_MAX_ROWS = 200_000 # Rows loaded into memory per table
+TABLE_MAX_COLUMNS = 500 # Columns loaded per table
+TABLE_MAX_CELLS = 2_000_000 # Rows x columns per table; text columns are object arrays pickled out of the sandbox cell by cell
+TABLE_STORE_MAX_TABLES = 32 # Tables kept queryable server-side (least recently used are dropped)
+PROFILE_SAMPLE_ROWS = 5 # Sample rows included in the profile
+PROFILE_TOP_CATEGORIES = 5 # Most frequent values listed for categorical columns
+PROFILE_MAX_VALUE_CHARS = 40 # Long cell values are shortened in the profile
+NUMERIC_RATIO = 0.9 # Share of parseable values required to treat a column as numeric
+QUERY_MAX_ROWS = 1000 # Max rows returned by one query
+
+FILTER_OPERATORS = ('==', '!=', '<', '<=', '>', '>=', 'contains')
+
+
+def _to_float(value: Any) -> float:
+    """Converts a cell value to float, NaN when it is not numeric."""
+    if value is None or isinstance(value, bool):
+        return np.nan
+    try:
+        return float(str(value).replace(',', '.')) if isinstance(value, str) else float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class Table:
+    """
+    Column-oriented table backed by NumPy arrays.
+
+    Numeric columns are float64 arrays with NaN for missing values, all other
+    columns are object arrays with None for missing values.
+    """
+
+    def __init__(self, name: str, columns: List[str], data: Dict[str, "np.ndarray"], kinds: Dict[str, str], truncated: bool = False):
+        self.name = name
+        self.columns = columns
+        self.data = data
+        self.kinds = kinds
+        self.truncated = truncated
+        self.table_id = ""
+
+    @property
+    def row_count(self) -> int:
+        return len(self.data[self.columns[0]]) if self.columns else 0
+
+    def rows(self, indices: "np.ndarray", columns: Optional[List[str]] = None) -> List[List[Any]]:
+        """Returns the selected rows as Python lists (NaN and None become None)."""
+        columns = columns or self.columns
+        out = []
+        for index in indices.tolist():
+            row = []
+            for column in columns:
+                value = self.data[column][index]
+                if self.kinds[column] == 'numeric':
+                    value = None if np.isnan(value) else float(value)
+                row.append(value)
+            out.append(row)
+        return out
+
+
+def _column_names(header: Sequence[Any], width: int) -> List[str]:
+    """Builds unique, non-empty column names from a header row."""
+    names = []
+    seen = set()
+    for i in range(width):
+        raw = header[i] if i < len(header) else None
+        name = str(raw).strip() if raw not in (None, '') else f"column_{i + 1}"
+        base, suffix = name, 2
+        while name in seen:
+            name = f"{base}_{suffix}"
+            suffix += 1
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _classify_column(values: "np.ndarray") -> Any:
+    """Returns (kind, array) for one column of object values."""
+    missing = np.fromiter((v is None or v == '' for v in values), dtype=bool, count=len(values))
+    present = values[~missing]
+    if present.size == 0:
+        return 'empty', np.where(missing, None, values)
+
+    if all(isinstance(v, (datetime.date, datetime.datetime)) for v in present[:100]):
+        return 'datetime', np.where(missing, None, values)
+
+    try:
+        numeric = np.full(len(values), np.nan)
+        numeric[~missing] = present.astype(np.float64) # Fast path, parsed in C
+        return 'numeric', numeric
+    except (TypeError, ValueError):
+        pass
+
+    numeric = np.fromiter((_to_float(v) for v in values), dtype=np.float64, count=len(values))
+    parsed = np.count_nonzero(~np.isnan(numeric))
+    if parsed >= NUMERIC_RATIO * present.size:
+        return 'numeric', numeric
+    return 'categorical', np.where(missing, None, values).astype(object)
+
+
+def load_table(name: str, rows: Iterable[Sequence[Any]], has_header: bool = True) -> Optional[Table]:
+    """
+    Loads rows into a column-oriented NumPy table.
+
+    Args:
+        name: Table name (sheet name or 'CSV')
+        rows: Iterable of row value sequences, consumed lazily
+        has_header: Use the first non-empty row as column names
+
+    Returns:
+        Table, or None if there were no non-empty rows.
+    """
+    if np is None:
+        raise ValueError("NumPy is not installed for tabular summaries.")
+
+    header = None
+    records = []
+    truncated = False
+    width = 0
+    for row in rows:
+        values = list(row)[:TABLE_MAX_COLUMNS]
+        if not any(value not in (None, '') for value in values):
+            continue
+        if has_header and header is None:
+            header = values
+            continue
+        row_width = max(width, len(values), len(header or []))
+        if len(records) >= TABLE_MAX_ROWS or (len(records) + 1) * row_width > TABLE_MAX_CELLS:
+            truncated = True
+            break
+        records.append(values)
+        width = max(width, len(values))
+
+    if header is None and not records:
+        return None
+    width = max(width, len(header or []))
+    columns = _column_names(header or [], width)
+
+    # Pad ragged rows, then let NumPy slice columns out of one object matrix
+    matrix = np.empty((len(records), width), dtype=object)
+    for i, values in enumerate(records):
+        matrix[i, :len(values)] = values
+
+    data = {}
+    kinds = {}
+    for i, column in enumerate(columns):
+        kinds[column], data[column] = _classify_column(matrix[:, i])
+    return Table(name, columns, data, kinds, truncated)
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        if np.isnan(value):
+            return ''
+        return f"{value:.6g}"
+    text = str(value)
+    if len(text) > PROFILE_MAX_VALUE_CHARS:
+        text = text[:PROFILE_MAX_VALUE_CHARS - 1] + '…'
+    return text
+
+
+def profile_column(table: Table, column: str) -> Dict[str, Any]:
+    """Computes summary statistics of one column."""
+    values = table.data[column]
+    kind = table.kinds[column]
+    profile: Dict[str, Any] = {'name': column, 'type': kind}
+
+    if kind == 'numeric':
+        present = values[~np.isnan(values)]
+        profile['count'] = int(present.size)
+        profile['missing'] = int(values.size - present.size)
+        if present.size:
+            p25, median, p75 = np.quantile(present, [0.25, 0.5, 0.75])
+            profile.update({
+                'min': float(present.min()),
+                'max': float(present.max()),
+                'mean': float(present.mean()),
+                'std': float(present.std()),
+                'p25': float(p25),
+                'median': float(median),
+                'p75': float(p75),
+            })
+        return profile
+
+    present = values[values != None] # noqa: E711 - element-wise comparison on an object array
+    profile['count'] = int(present.size)
+    profile['missing'] = int(values.size - present.size)
+    if kind == 'datetime' and present.size:
+        profile['min'] = min(present)
+        profile['max'] = max(present)
+    elif present.size:
+        labels, counts = np.unique(present.astype(str), return_counts=True)
+        order = np.argsort(counts)[::-1][:PROFILE_TOP_CATEGORIES]
+        profile['distinct'] = int(labels.size)
+        profile['top'] = [(str(labels[i]), int(counts[i])) for i in order]
+    return profile
+
+
+def render_profile(table: Table) -> str:
+    """Renders a compact, LLM-friendly profile of the table."""
+    lines = [
+        f"Table '{table.name}' (table_id: {table.table_id}, {table.row_count} rows x {len(table.columns)} columns"
+        f"{', truncated' if table.truncated else ''}; full table kept server-side)",
+        "Columns:",
+    ]
+    for column in table.columns:
+        p = profile_column(table, column)
+        parts = [f"count={p['count']}", f"missing={p['missing']}"]
+        if p['type'] == 'numeric' and p['count']:
+            parts += [f"{key}={_format_value(p[key])}" for key in ('min', 'max', 'mean', 'std', 'p25', 'median', 'p75')]
+        elif p['type'] == 'datetime' and p['count']:
+            parts += [f"min={p['min']}", f"max={p['max']}"]
+        elif p.get('top'):
+            top = ', '.join(f"{_format_value(label)} ({count})" for label, count in p['top'])
+            parts += [f"distinct={p['distinct']}", f"top: {top}"]
+        lines.append(f"- {column} ({p['type']}): " + ', '.join(parts))
+
+    sample_count = min(PROFILE_SAMPLE_ROWS, table.row_count)
+    if sample_count:
+        lines.append(f"Sample rows ({sample_count} of {table.row_count}):")
+        lines.append(' | '.join(table.columns))
+        for row in table.rows(np.arange(sample_count)):
+            lines.append(' | '.join(_format_value(value) for value in row))
+    return '\n'.join(lines)
+
+
+class TableStore:
+    """Bounded in-memory store of loaded tables, evicting the least recently used."""
+
+    def __init__(self, max_tables: int = TABLE_STORE_MAX_TABLES):
+        self.max_tables = max_tables
+        self._tables: "OrderedDict[str, Table]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, table: Table, source_digest: str) -> str:
+        table.table_id = hashlib.sha256(f"{source_digest}:{table.name}".encode('utf-8')).hexdigest()[:16]
+        return self.put(table)
+
+    def put(self, table: Table) -> str:
+        """Stores a table under its existing id (e.g. a table loaded in a sandboxed job)."""
+        with self._lock:
+            self._tables[table.table_id] = table
+            self._tables.move_to_end(table.table_id)
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table.table_id
+
+    def get(self, table_id: str) -> Optional[Table]:
+        with self._lock:
+            table = self._tables.get(table_id)
+            if table is not None:
+                self._tables.move_to_end(table_id)
+            return table
+
+
+table_store = TableStore()
+
+
+def _filter_mask(table: Table, flt: Dict[str, Any]) -> "np.ndarray":
+    """Builds a boolean row mask for one filter {'column', 'op', 'value'}."""
+    column, op, value = flt.get('column'), flt.get('op', '=='), flt.get('value')
+    if column not in table.data:
+        raise ValueError(f"Unknown column: {column}")
+    if op not in FILTER_OPERATORS:
+        raise ValueError(f"Unsupported filter operator: {op}")
+
+    values = table.data[column]
+    if op == 'contains':
+        needle = str(value).lower()
+        return np.fromiter((v is not None and needle in str(v).lower() for v in values), dtype=bool, count=len(values))
+
+    if table.kinds[column] == 'numeric':
+        target = _to_float(value)
+        if np.isnan(target):
+            raise ValueError(f"Column '{column}' is numeric, got non-numeric value: {value}")
+        present = ~np.isnan(values)
+    else:
+        target = value
+        present = values != None # noqa: E711 - element-wise comparison on an object array
+        if op not in ('==', '!='):
+            values = values.astype(str)
+            target = str(value)
+
+    with np.errstate(invalid='ignore'):
+        if op == '==':
+            mask = values == target
+        elif op == '!=':
+            mask = values != target
+        elif op == '<':
+            mask = values < target
+        elif op == '<=':
+            mask = values <= target
+        elif op == '>':
+            mask = values > target
+        else:
+            mask = values >= target
+    return np.asarray(mask, dtype=bool) & present
+
+
+def query_table(
+    table_id: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[List[Dict[str, Any]]] = None,
+    offset: int = 0,
+    limit: int = 100
+) -> Dict[str, Any]:
+    """
+    Queries a stored table with vectorized filters.
+
+    Args:
+        table_id: Identifier returned in the table profile
+        columns: Columns to return (all when omitted)
+        filters: List of {'column', 'op', 'value'} conditions combined with AND
+        offset: Number of matching rows to skip
+        limit: Max rows to return (capped at QUERY_MAX_ROWS)
+
+    Raises:
+        ValueError: If the table is unknown or the query is invalid
+    """
+    table = table_store.get(table_id)
+    if table is None:
+        raise ValueError(f"Unknown or expired table: {table_id}")
+    columns = columns or table.columns
+    unknown = [column for column in columns if column not in table.data]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+    mask = np.ones(table.row_count, dtype=bool)
+    for flt in filters or []:
+        mask &= _filter_mask(table, flt)
+    matches = np.flatnonzero(mask)
+
+    limit = max(0, min(limit, QUERY_MAX_ROWS))
+    selected = matches[max(offset, 0):max(offset, 0) + limit]
+    return {
+        'table_id': table_id,
+        'columns': columns,
+        'total_matches': int(matches.size),
+        'rows': table.rows(selected, columns),
+    }
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import re
+import logging
+
+from .bounded_cache import BoundedLRU, text_key
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+COMPACTION_CACHE_MAX_ENTRIES = 256 # Compacted documents kept, keyed by content hash
+BOILERPLATE_MAX_LINE_CHARS = 80 # Longer lines are never dropped as navigation or copyright junk
+PAGE_NUMBER_MIN_RUN = 3 # Bare numbers are page numbers only in runs of this many consecutive values
+
+# Characters that carry no text: soft hyphens, zero-width spaces and joiners, BOMs
+INVISIBLE_PATTERN = re.compile('[­​‌‍⁠﻿]')
+EXOTIC_SPACE_PATTERN = re.compile('[\xa0\u2000-\u200a\u202f\u205f\u3000]') # Non-breaking, thin, ideographic, ...
+# Runs of spaces and tabs within a line become one space, indentation is kept. Patterns start
+# with a character class or literal and check the lookbehind after it, which is much faster
+# than a leading lookbehind tried at every position
+SPACE_PATTERN = re.compile(r'[ \t](?<=\S[ \t])(?:[ \t]+|(?<=\t))(?=\S)')
+TRAILING_SPACE_PATTERN = re.compile(r'[ \t]+(?=\n|$)')
+# "infor-\nmation" -> "information"; the continuation must start lowercase so "Jean-\nPaul" stays split
+HYPHENATION_PATTERN = re.compile(r'-\n(?<=[^\W\d_]{2}-\n)[ ]*(?=[^\W\d_A-ZÀ-ÖØ-Þ])')
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+
+# Fenced code blocks are set aside before compaction and restored verbatim
+CODE_FENCE_PATTERN = re.compile(r'^[ ]{0,3}(```|~~~)[^\n]*\n.*?^[ ]{0,3}\1[ ]*$', re.MULTILINE | re.DOTALL)
+CODE_PLACEHOLDER = '\x00%d\x00'
+CODE_PLACEHOLDER_PATTERN = re.compile('\x00(\\d+)\x00')
+
+# Whole lines dropped on their own: page labels, skip links, cookie banners, copyright
+# footers and rules made of one repeated character ("-----", "* * *", "=====")
+BOILERPLATE_LINE = (
+    r'^[^\S\n]*(?:'
+    r'(?:page|p\.|strona|seite)[ ]*\d{1,4}(?:[ ]*(?:/|of|z|von)[ ]*\d{1,4})?'
+    r'|\d{1,4}[ ]*(?:of|z|von)[ ]*\d{1,4}|[-–—][ ]*\d{1,4}[ ]*[-–—]'
+    r'|skip to (?:main )?content|skip navigation|toggle navigation|back to top|next page|previous page'
+    r'|print this page|share this (?:page|article)|read more'
+    r'|(?:accept|reject)(?: all)? cookies|cookie (?:settings|preferences|policy)|privacy policy|terms of (?:use|service)'
+    # Copyright footers only: "©", or "(c)"/"copyright" followed by a year, or "all rights
+    # reserved"; enumerated "(c)" clauses and sentences about copyright stay
+    r'|©[^\n]{0,%(max)d}|(?:\(c\)|copyright)[ ]*(?:(?:19|20)\d\d\b|all rights reserved)[^\n]{0,%(max)d}'
+    r'|[^\n]{0,%(max)d}all rights reserved\.?'
+    r'|(?:-[ ]?){3,}|(?:=[ ]?){3,}|(?:_[ ]?){3,}|(?:\*[ ]?){3,}'
+    r')[ ]*\n' % {'max': BOILERPLATE_MAX_LINE_CHARS}
+)
+BOILERPLATE_LINE_PATTERN = re.compile(BOILERPLATE_LINE, re.MULTILINE | re.IGNORECASE)
+# Single words that are also ordinary prose ("Next", "Close", "Search") are only dropped
+# in a run of two or more consecutive widget lines, as menus and share bars extract
+NAVIGATION_WORD = (
+    r'^[^\S\n]*(?:(?:main )?menu|navigation|breadcrumbs?|home|to top|next|previous|print|share'
+    r'|(?:log|sign)[ ]?(?:in|up|out)|subscribe|close|search|facebook|twitter|x|linkedin|instagram'
+    r'|youtube|whatsapp|e-?mail|(?:accept|reject)(?: all)?)[ ]*\n'
+)
+NAVIGATION_RUN_PATTERN = re.compile(r'(?:%s|%s){2,}' % (NAVIGATION_WORD, BOILERPLATE_LINE), re.MULTILINE | re.IGNORECASE)
+# Candidates for page numbers: a bare number at the edge of a paragraph (pages are joined
+# by blank lines). Only runs of consecutive values are removed, so a year heading or a
+# number in a table cell extracted one per line survives
+PAGE_NUMBER_PATTERN = re.compile(r'\n\n[ ]*(\d{1,4})[ ]*(?=\n)|\n[ ]*(\d{1,4})[ ]*(?=\n\n)')
+
+
+def compact_text(text: str) -> str:
+    """
+    Normalizes extracted text for prompts: removes invisible characters, joins words
+    hyphenated across lines, collapses runs of spaces and blank lines, and drops
+    boilerplate lines (page numbers, navigation links, cookie and copyright footers,
+    separator rules). Paragraph breaks, Markdown tables, indentation and fenced code
+    blocks are kept.
+
+    Every step is a precompiled regex applied to the whole text, so the work per
+    character happens in the regex engine rather than a Python loop over lines.
+    """
+    if not text:
+        return ""
+    text = text.replace('\r\n', '\n').replace('\r', '\n').replace('\x00', '')
+    text = INVISIBLE_PATTERN.sub('', text)
+    code_blocks = []
+
+    def set_aside(match: re.Match) -> str:
+        code_blocks.append(match.group(0))
+        return CODE_PLACEHOLDER % (len(code_blocks) - 1)
+
+    text = CODE_FENCE_PATTERN.sub(set_aside, text)
+    text = EXOTIC_SPACE_PATTERN.sub(' ', text)
+    text = SPACE_PATTERN.sub(' ', text)
+    text = TRAILING_SPACE_PATTERN.sub('', text)
+    text = HYPHENATION_PATTERN.sub('', text)
+    # Line endings around the text let the first and last lines match like the others
+    text = NAVIGATION_RUN_PATTERN.sub('', '\n\n' + text + '\n')
+    text = BOILERPLATE_LINE_PATTERN.sub('', text)
+    text = _remove_page_numbers(text + '\n')
+    text = BLANK_LINES_PATTERN.sub('\n\n', text)
+    if code_blocks:
+        text = CODE_PLACEHOLDER_PATTERN.sub(lambda match: code_blocks[int(match.group(1))], text)
+    return text.strip()
+
+
+def _remove_page_numbers(text: str) -> str:
+    """Drops bare numbers at paragraph edges that count up page by page (3, 4, 5, ...)."""
+    candidates = list(PAGE_NUMBER_PATTERN.finditer(text))
+    if len(candidates) < PAGE_NUMBER_MIN_RUN:
+        return text
+    # Chains of consecutive values keyed by the value they expect next; other numbers
+    # (headings, cells) between two page numbers do not break a chain
+    chains = {}
+    runs = []
+    for match in candidates:
+        value = int(match.group(1) or match.group(2))
+        chain = chains.pop(value, None)
+        if chain is None:
+            chain = []
+            runs.append(chain)
+        chain.append(match)
+        chains[value + 1] = chain
+    doomed = sorted(
+        (match for chain in runs if len(chain) >= PAGE_NUMBER_MIN_RUN for match in chain),
+        key=lambda match: match.start(),
+    )
+    if not doomed:
+        return text
+    parts = []
+    position = 0
+    for match in doomed:
+        parts.append(text[position:match.start()])
+        parts.append('\n\n')
+        position = match.end()
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+class CompactionCache:
+    """Bounded LRU of compacted texts keyed by the SHA-256 of the original."""
+
+    def __init__(self, max_entries: int = COMPACTION_CACHE_MAX_ENTRIES):
+        self._entries: BoundedLRU[str] = BoundedLRU(max_entries)
+
+    def compact(self, text: str) -> str:
+        """compact_text(), computed once per distinct text."""
+        return self._entries.get_or_compute(text_key(text), lambda: compact_text(text))
+
+
+compaction_cache = CompactionCache()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import codecs
+import io
+import logging
+import unicodedata
+from typing import Dict, Iterator, NamedTuple, Optional
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+ENCODING_SAMPLE_BYTES = 64 * 1024 # Prefix inspected to detect the encoding
+DECODE_CHUNK_BYTES = 1024 * 1024 # Chunk size of the incremental decoder
+SINGLE_BYTE_ENCODINGS = ('cp1250', 'iso-8859-2', 'cp1252') # Candidates when the data is not UTF-8, ties go to the first
+
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'), # Before UTF-16 LE, which shares its first two bytes
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Plausibility of non-ASCII letters, roughly by frequency in Polish, Czech/Slovak and Western European text.
+# Letters that appear at the same byte in all candidates (ó, é, ü, ...) weigh the same everywhere and
+# cancel out; the bytes where the code pages differ decide.
+LETTER_WEIGHTS: Dict[str, int] = {
+    **dict.fromkeys('ąćęłńóśźżĄĆĘŁŃÓŚŹŻ', 3),
+    **dict.fromkeys('čďěňřšťůžýČĎĚŇŘŠŤŮŽÝ', 2),
+    **dict.fromkeys('àèìòùâêîôûëïçñãõåæøœÀÈÌÒÙÂÊÎÔÛËÏÇÑ', 3),
+    **dict.fromkeys('áéíúäöüßőűÁÉÍÚÄÖÜŐŰ', 2),
+}
+CONTROL_PENALTY = -5 # C1 control characters and undefined bytes are almost never intended
+
+
+class DecodedText(NamedTuple):
+    text: str
+    encoding: str
+
+
+def _score_single_byte(sample: bytes, encoding: str) -> int:
+    """Scores how plausible the non-ASCII characters of the sample are in the given code page."""
+    decoded = sample.decode(encoding, errors='replace')
+    score = 0
+    for char in decoded:
+        if char < '\x80':
+            continue
+        weight = LETTER_WEIGHTS.get(char)
+        if weight is not None:
+            score += weight
+        elif char == '�' or unicodedata.category(char) == 'Cc':
+            score += CONTROL_PENALTY
+        elif char.isalpha():
+            score += 1
+        # Punctuation and symbols (typographic quotes, dashes, '³', '¿') are neutral
+    return score
+
+
+def _looks_like_utf16(sample: bytes) -> Optional[str]:
+    """Detects BOM-less UTF-16 from the NUL bytes of mostly-ASCII text."""
+    if len(sample) < 4:
+        return None
+    even_nuls = sample[0::2].count(0)
+    odd_nuls = sample[1::2].count(0)
+    half = len(sample) // 2
+    if odd_nuls > 0.4 * half and even_nuls < 0.05 * half:
+        return 'utf-16-le'
+    if even_nuls > 0.4 * half and odd_nuls < 0.05 * half:
+        return 'utf-16-be'
+    return None
+
+
+def _is_valid_utf8_prefix(sample: bytes, complete: bool) -> bool:
+    """Checks UTF-8 validity; a multi-byte sequence cut at the end of a partial sample is allowed."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        decoder.decode(sample, final=complete)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def detect_single_byte_encoding(sample: bytes) -> str:
+    """Picks the most plausible of SINGLE_BYTE_ENCODINGS for the sample."""
+    scores = {encoding: _score_single_byte(sample, encoding) for encoding in SINGLE_BYTE_ENCODINGS}
+    best = max(SINGLE_BYTE_ENCODINGS, key=lambda encoding: scores[encoding]) # max() keeps the first on ties
+    logger.debug(f"Single-byte encoding scores: {scores}")
+    return best
+
+
+def detect_encoding(data: bytes, sample_size: int = ENCODING_SAMPLE_BYTES) -> str:
+    """
+    Detects the text encoding from a bounded prefix of the data.
+
+    Order: byte order mark, BOM-less UTF-16, UTF-8 validity (ASCII counts as UTF-8),
+    then a byte-frequency score over Central and Western European code pages.
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding
+    sample = bytes(data[:sample_size])
+    utf16 = _looks_like_utf16(sample)
+    if utf16:
+        return utf16
+    if _is_valid_utf8_prefix(sample, complete=len(data) <= sample_size):
+        return 'utf-8'
+    return detect_single_byte_encoding(sample)
+
+
+def iter_decode(data: bytes, encoding: str, chunk_size: Optional[int] = None) -> Iterator[str]:
+    """Decodes data chunk by chunk with an incremental decoder (multi-byte sequences may span chunks)."""
+    chunk_size = chunk_size or DECODE_CHUNK_BYTES
+    decoder = codecs.getincrementaldecoder(encoding)(errors='strict' if encoding.startswith('utf') else 'replace')
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        text = decoder.decode(view[start:start + chunk_size])
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def decode_text(data: bytes, encoding: Optional[str] = None, max_chars: Optional[int] = None) -> DecodedText:
+    """
+    Decodes bytes in one incremental pass with the detected (or given) encoding.
+
+    If data detected as UTF-8 from its prefix turns out to be invalid further on, it is
+    decoded again with the best single-byte code page for the offending region.
+
+    Args:
+        data: Raw bytes
+        encoding: Encoding to use instead of detecting it
+        max_chars: Stop decoding once this many characters are available (the result
+            is then longer than max_chars by at most one chunk, so callers can tell it was cut)
+    """
+    encoding = encoding or detect_encoding(data)
+    parts = []
+    length = 0
+    try:
+        for text in iter_decode(data, encoding):
+            parts.append(text)
+            length += len(text)
+            if max_chars is not None and length > max_chars:
+                break
+    except UnicodeDecodeError as e:
+        if not encoding.startswith('utf-8'):
+            raise
+        offset = sum(len(part.encode('utf-8')) for part in parts) + e.start
+        fallback = detect_single_byte_encoding(bytes(data[max(offset - 1024, 0):offset + ENCODING_SAMPLE_BYTES]))
+        logger.warning(f"Text is not valid UTF-8 at byte {offset}, decoding as {fallback}.")
+        return decode_text(data, fallback, max_chars)
+    return DecodedText(''.join(parts), encoding)
+
+
+def open_text_stream(data: bytes, encoding: Optional[str] = None, newline: Optional[str] = None) -> io.TextIOWrapper:
+    """Wraps bytes in a lazily decoding text stream (e.g. for csv.reader) with the detected encoding."""
+    encoding = encoding or detect_encoding(data)
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding, errors='replace', newline=newline)
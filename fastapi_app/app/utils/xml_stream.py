@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+import logging
+from typing import Any, Iterator, List, Optional, Sequence
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+from .extraction_io import as_binary_stream
+from .extraction_stream import TextFragment
+
+# Logger configuration
+logger = logging.getLogger(__name__)
+
+# Constants (could be moved to config)
+XML_STREAM_THRESHOLD_BYTES = 1024 * 1024 # Uploads larger than this are extracted in streaming mode
+XML_RECORD_MAX_CHARS = 20000 # A single record is cut at this length
+XML_MAX_DEPTH = 256 # Deeper documents are rejected
+
+
+def _local_name(tag: Any) -> str:
+    """Tag without its {namespace} prefix."""
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+class RecordFilter:
+    """
+    Selects record elements by tag name or by a simple slash-separated path of local names.
+
+    Paths starting with '/' are absolute ('/catalog/book'); other paths and paths starting
+    with '//' match the end of the element's path ('book', '//catalog/book').
+    Without tags or path, the children of the root element are records.
+    """
+
+    def __init__(self, tags: Optional[Sequence[str]] = None, path: Optional[str] = None):
+        self.tags = set(tags or ())
+        self.absolute = bool(path) and path.startswith('/') and not path.startswith('//')
+        self.steps = [step for step in (path or '').split('/') if step]
+        if any(step in ('.', '..') or '[' in step for step in self.steps):
+            raise ValueError(f"Unsupported XML path (only tag names separated by '/'): {path}")
+
+    def matches(self, stack: List[str]) -> bool:
+        if self.tags and stack[-1] in self.tags:
+            return True
+        if self.steps:
+            if self.absolute:
+                return stack == self.steps
+            return stack[-len(self.steps):] == self.steps
+        return not self.tags and len(stack) == 2
+
+
+def _record_title(element: Any) -> str:
+    """Short record title: local tag name plus an id-like attribute when present."""
+    name = _local_name(element.tag)
+    for key in ('id', 'name', 'key'):
+        if element.get(key):
+            return f"{name} {element.get(key)}"
+    return name
+
+
+def render_record(element: Any) -> str:
+    """Renders a record as 'path: text' lines, attributes as '@name: value'."""
+    lines = [_local_name(element.tag) + ''.join(f" {_local_name(k)}={v}" for k, v in element.attrib.items())]
+
+    def walk(node: Any, prefix: str) -> None:
+        for child in node:
+            if not isinstance(child.tag, str):
+                continue
+            path = f"{prefix}{_local_name(child.tag)}"
+            for key, value in child.attrib.items():
+                lines.append(f"  {path}@{_local_name(key)}: {value}")
+            text = (child.text or '').strip()
+            if text:
+                lines.append(f"  {path}: {' '.join(text.split())}")
+            walk(child, path + '/')
+
+    own_text = (element.text or '').strip()
+    if own_text:
+        lines.append(f"  {' '.join(own_text.split())}")
+    walk(element, '')
+    record = '\n'.join(lines)
+    if len(record) > XML_RECORD_MAX_CHARS:
+        record = record[:XML_RECORD_MAX_CHARS] + "\n  [record truncated]"
+    return record
+
+
+def iter_xml_records(
+    content: bytes,
+    tags: Optional[Sequence[str]] = None,
+    path: Optional[str] = None,
+    max_chars: Optional[int] = None
+) -> Iterator[TextFragment]:
+    """
+    Streams matching XML elements as text records without building the whole tree.
+
+    Each element is cleared as soon as it has been rendered (or skipped), and earlier
+    siblings are detached, so memory stays proportional to one record. Parsing stops
+    once max_chars have been yielded or when the consumer closes the generator.
+
+    Args:
+        content: XML content in bytes
+        tags: Local tag names of record elements
+        path: Slash-separated path of record elements (see RecordFilter)
+        max_chars: Character budget of the yielded records, None for no limit
+
+    Raises:
+        ValueError: If lxml is missing, the filter is invalid or the XML is malformed
+    """
+    if etree is None:
+        raise ValueError("lxml is not installed for XML processing.")
+    record_filter = RecordFilter(tags, path)
+
+    events = etree.iterparse(
+        as_binary_stream(content),
+        events=('start', 'end'),
+        resolve_entities=False,
+        no_network=True,
+        load_dtd=False,
+        huge_tree=False,
+    )
+    stack: List[str] = []
+    capture_depth = None # Depth of the record being collected, None outside records
+    emitted = 0
+    total = 0
+    try:
+        for event, element in events:
+            if event == 'start':
+                stack.append(_local_name(element.tag))
+                if len(stack) > XML_MAX_DEPTH:
+                    raise ValueError(f"XML nesting deeper than {XML_MAX_DEPTH} levels.")
+                if capture_depth is None and record_filter.matches(stack):
+                    capture_depth = len(stack)
+                continue
+
+            depth = len(stack)
+            stack.pop()
+            if capture_depth is not None and depth > capture_depth:
+                continue # Part of a record that is still open
+
+            if capture_depth == depth:
+                capture_depth = None
+                record = render_record(element)
+                emitted += 1
+                if max_chars is not None and total + len(record) > max_chars:
+                    record = record[:max(max_chars - total, 0)]
+                    if record:
+                        yield TextFragment(record, 'record', emitted, _record_title(element))
+                    logger.info(f"XML streaming stopped at the {max_chars} character budget after {emitted} records.")
+                    return
+                total += len(record)
+                yield TextFragment(record, 'record', emitted, _record_title(element))
+
+            # Free the processed element and the siblings before it
+            element.clear(keep_tail=False)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+    except etree.XMLSyntaxError as e:
+        raise ValueError(f"Malformed XML: {e}") from e
+    finally:
+        del events
+
@@ -104,6 +104,50 @@ def sample_image_content():
     )
 
 
+@pytest.fixture
+def sample_epub_content():
+    """Small but valid EPUB book with three chapters."""
+    import io
+    from ebooklib import epub
+
+    book = epub.EpubBook()
+    book.set_identifier("test-book")
+    book.set_title("Test Book")
+    book.set_language("en")
+    book.add_author("Test Author")
+    chapters = []
+    for i in range(1, 4):
+        chapter = epub.EpubHtml(title=f"Chapter {i}", file_name=f"chap_{i}.xhtml", lang="en")
+        chapter.content = f"<html><body><h1>Chapter {i}</h1><p>Content of chapter {i}.</p></body></html>"
+        book.add_item(chapter)
+        chapters.append(chapter)
+    book.toc = chapters
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = ["nav"] + chapters
+
+    buffer = io.BytesIO()
+    epub.write_epub(buffer, book)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def sample_xlsx_content():
+    """XLSX workbook with a header row and a few data rows."""
+    import io
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Data"
+    sheet.append(["name", "score"])
+    for i in range(1, 6):
+        sheet.append([f"item {i}", i * 10])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
 # Mock external services
 @pytest.fixture
 def mock_openrouter_api():
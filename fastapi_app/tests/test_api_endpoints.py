@@ -136,6 +136,61 @@ class TestFileProcessingEndpoint:
         assert response.status_code == 400  # Bad request for client errors
 
 
+class TestTableQueryEndpoint:
+    """Test querying tables kept server-side in summary mode."""
+
+    def test_summary_then_query(self, client: TestClient):
+        import base64
+        csv_content = base64.b64encode(b"name,score\nanna,10\njan,20\nola,30\n").decode('utf-8')
+        response = client.post("/api/v1/process_file", json={
+            "filename": "scores.csv",
+            "file_data_base64": csv_content,
+            "tabular_mode": "summary"
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert "score (numeric)" in data["content"]
+        table_id = data["tables"][0]
+
+        response = client.post(f"/api/v1/tables/{table_id}/query", json={
+            "filters": [{"column": "score", "op": ">", "value": 15}]
+        })
+        assert response.status_code == 200
+        assert response.json()["rows"] == [["jan", 20.0], ["ola", 30.0]]
+
+    def test_unknown_table(self, client: TestClient):
+        response = client.post("/api/v1/tables/unknown/query", json={})
+        assert response.status_code == 404
+
+
+class TestBatchProcessingEndpoint:
+    """Test the batch /process_files endpoint."""
+
+    def test_results_stream_per_file(self, client: TestClient):
+        import base64
+        import json
+        files = [
+            {"filename": "notes.txt", "file_data_base64": base64.b64encode(b"First file text").decode()},
+            {"filename": "broken.bin", "file_data_base64": base64.b64encode(bytes(range(256)) * 4).decode()},
+            {"filename": "scores.csv", "file_data_base64": base64.b64encode(b"name,score\nanna,10\n").decode()},
+        ]
+        response = client.post("/api/v1/process_files", json={"files": files})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        results = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+        assert sorted(results) == [0, 1, 2]
+        assert results[0]["content"] == "First file text"
+        assert "Unsupported file type" in results[1]["error"]
+        assert "anna | 10" in results[2]["content"]
+
+    def test_batch_limits(self, client: TestClient):
+        from app.utils import batch_processing
+        assert client.post("/api/v1/process_files", json={"files": []}).status_code == 400
+        files = [{"filename": f"{i}.txt", "file_data_base64": "YQ=="} for i in range(batch_processing.BATCH_MAX_FILES + 1)]
+        assert client.post("/api/v1/process_files", json={"files": files}).status_code == 400
+
+
 class TestRateLimiting:
     """Test rate limiting functionality."""
 
@@ -0,0 +1,125 @@
+"""
+Test cases for archive member extraction and zip-bomb limits.
+"""
+
+import base64
+import io
+import zipfile
+
+import pytest
+
+from app.utils.archive_extraction import ArchiveLimits, iter_extract_archive
+from app.utils.file_processor import (
+    iter_extract_text_from_archive,
+    safe_extract_text_from_archive,
+    process_uploaded_file_data,
+    _detect_archive_member,
+    _extract_archive_member,
+)
+
+ZIP = 'application/zip'
+
+
+def make_zip(members, compression=zipfile.ZIP_DEFLATED) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def extract(data, limits=None):
+    return list(iter_extract_archive(data, ZIP, _detect_archive_member, _extract_archive_member, limits))
+
+
+class TestArchiveExtraction:
+    def test_members_are_extracted(self):
+        data = make_zip({
+            'notes.txt': b'Meeting notes for Monday',
+            'page.html': b'<html><body><p>Hello from HTML</p></body></html>',
+            'data.csv': b'a,b\n1,2\n',
+            'binary.bin': b'\x00\x01\x02' * 100,
+        })
+        fragments = extract(data)
+        assert fragments[0].unit == 'listing'
+        members = {f.title: f.text for f in fragments if f.unit == 'member'}
+        assert 'Meeting notes for Monday' in members['notes.txt']
+        assert 'Hello from HTML' in members['page.html']
+        assert '1 | 2' in members['data.csv']
+        assert 'binary.bin: unsupported file type' in fragments[-1].text
+
+    def test_nested_archives_up_to_depth(self):
+        inner = make_zip({'deep.txt': b'inside the inner archive'})
+        middle = make_zip({'inner.zip': inner})
+        outer = make_zip({'middle.zip': middle, 'top.txt': b'top level text'})
+
+        text = '\n'.join(f.text for f in extract(outer, ArchiveLimits(max_depth=1)))
+        assert 'top level text' in text
+        assert 'middle.zip/inner.zip: nested too deeply' in text
+
+        text = '\n'.join(f.text for f in extract(outer, ArchiveLimits(max_depth=2)))
+        assert '=== middle.zip/inner.zip/deep.txt ===\ninside the inner archive' in text
+
+    def test_compression_ratio_limit(self):
+        data = make_zip({'zeros.txt': b'0' * 5_000_000})
+        fragments = extract(data)
+        assert not [f for f in fragments if f.unit == 'member']
+        assert 'compression ratio above' in fragments[-1].text
+
+    def test_member_and_size_limits(self):
+        data = make_zip({f'f{i}.txt': b'some text %d' % i for i in range(10)}, zipfile.ZIP_STORED)
+        fragments = extract(data, ArchiveLimits(max_members=3))
+        assert len([f for f in fragments if f.unit == 'member']) == 3
+        assert 'member limit reached' in fragments[-1].text
+
+        fragments = extract(data, ArchiveLimits(max_total_bytes=25))
+        assert len([f for f in fragments if f.unit == 'member']) == 2
+        assert 'total size limit reached' in fragments[-1].text
+
+    def test_limit_in_nested_archive_stops_the_outer_one(self):
+        inner = make_zip({f'inner{i}.txt': b'inner text %d' % i for i in range(5)}, zipfile.ZIP_STORED)
+        outer = make_zip({'a.zip': inner, 'later.txt': b'after the nested archive'}, zipfile.ZIP_STORED)
+        fragments = extract(outer, ArchiveLimits(max_members=4))
+        members = [f.title for f in fragments if f.unit == 'member']
+        assert sorted(members) == ['a.zip/inner0.txt', 'a.zip/inner1.txt', 'a.zip/inner2.txt']
+        assert fragments[-1].title == 'truncated' and 'Archive truncated: member limit reached' in fragments[-1].text
+
+    def test_truncated_archive_is_marked_in_the_result(self, monkeypatch):
+        # max_members=2 for the limits created by the upload path
+        monkeypatch.setattr(ArchiveLimits.__init__, '__defaults__', (2,) + ArchiveLimits.__init__.__defaults__[1:])
+        inner = make_zip({f'inner{i}.txt': b'inner text %d' % i for i in range(3)})
+        data = base64.b64encode(make_zip({'a.zip': inner, 'b.txt': b'top'})).decode()
+        assert process_uploaded_file_data(data, 'docs.zip', archive_mode='extract')['truncated'] is True
+        assert 'truncated' not in process_uploaded_file_data(base64.b64encode(inner).decode(), 'small.zip')
+
+    def test_forged_declared_size_is_rejected(self):
+        data = bytearray(make_zip({'a.txt': b'x' * 1000}, zipfile.ZIP_STORED))
+        # Patch the uncompressed size in the central directory to a smaller value
+        central = data.rfind(b'PK\x01\x02')
+        data[central + 24:central + 28] = (10).to_bytes(4, 'little')
+        fragments = extract(bytes(data))
+        assert 'unreadable' in fragments[-1].text
+
+    def test_closing_early_cancels_pending_members(self):
+        data = make_zip({f'f{i}.txt': b'text %d' % i for i in range(50)})
+        fragments = iter_extract_text_from_archive(data, ZIP)
+        next(fragments)
+        next(fragments)
+        fragments.close()
+
+
+class TestArchiveModes:
+    def test_list_mode_is_default_for_function(self):
+        data = make_zip({'a.txt': b'content'})
+        assert safe_extract_text_from_archive(data, ZIP) == "Archive contents:\n- a.txt"
+        assert 'content' in safe_extract_text_from_archive(data, ZIP, mode='extract')
+
+    def test_upload_lists_members_unless_extraction_is_requested(self):
+        data = base64.b64encode(make_zip({'report.txt': b'quarterly report'})).decode()
+        listing = process_uploaded_file_data(data, 'docs.zip')['text']
+        assert 'report.txt' in listing and 'quarterly report' not in listing
+        assert 'quarterly report' in process_uploaded_file_data(data, 'docs.zip', archive_mode='extract')['text']
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            safe_extract_text_from_archive(make_zip({'a.txt': b'x'}), ZIP, mode='unpack')
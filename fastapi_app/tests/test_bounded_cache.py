@@ -0,0 +1,37 @@
+"""
+Test cases for the bounded LRU shared by the in-memory result caches.
+"""
+
+from app.utils.bounded_cache import BoundedLRU, text_key
+
+
+class TestBoundedLRU:
+    def test_least_recently_used_is_dropped(self):
+        cache = BoundedLRU(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1 # 'b' is now the least recently used
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert (cache.get('a'), cache.get('c'), len(cache)) == (1, 3, 2)
+
+    def test_get_or_compute_computes_once(self):
+        cache = BoundedLRU(4)
+        calls = []
+        def compute():
+            calls.append(1)
+            return 'value'
+        assert cache.get_or_compute(text_key('text'), compute) == 'value'
+        assert cache.get_or_compute(text_key('text'), compute) == 'value'
+        assert len(calls) == 1
+
+    def test_pop(self):
+        cache = BoundedLRU(4)
+        cache.put('a', 1)
+        cache.pop('a')
+        cache.pop('missing')
+        assert cache.get('a') is None
+
+    def test_text_key(self):
+        assert text_key('abc') == text_key('abc') != text_key('abd')
+        assert len(text_key('zażółć')) == 64
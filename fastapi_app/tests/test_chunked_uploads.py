@@ -0,0 +1,134 @@
+"""
+Test cases for resumable chunked uploads.
+"""
+
+import hashlib
+import time
+from pathlib import Path
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+from app.utils import chunked_uploads, file_processor
+from app.utils.chunked_uploads import UploadOffsetMismatch, UploadStore
+
+
+def make_pdf(pages: int) -> bytes:
+    with fitz.open() as doc:
+        for number in range(1, pages + 1):
+            doc.new_page().insert_text((72, 72), f"Page number {number}")
+        return doc.tobytes()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = UploadStore(str(tmp_path / "uploads"))
+    monkeypatch.setattr(chunked_uploads, "upload_store", store)
+    return store
+
+
+class TestUploadStore:
+    def test_chunks_are_appended_and_verified(self, store, monkeypatch):
+        monkeypatch.setattr(chunked_uploads, "MIME_SNIFF_BYTES", 1024)
+        data = b"plain text " * 1000
+        state = store.create("notes.txt", len(data))
+        store.write_chunk(state.upload_id, 0, data[:4000])
+        state = store.write_chunk(state.upload_id, 4000, data[4000:])
+        assert state.complete and state.mime_type == 'text/plain'
+        assert store.finalize(state.upload_id, hashlib.sha256(data).hexdigest()).sha256
+
+    def test_wrong_offset_reports_resume_point(self, store):
+        state = store.create("notes.txt", 10)
+        store.write_chunk(state.upload_id, 0, b"hello")
+        with pytest.raises(UploadOffsetMismatch) as error:
+            store.write_chunk(state.upload_id, 2, b"llo w")
+        assert error.value.expected == 5
+        with pytest.raises(ValueError, match="overruns"):
+            store.write_chunk(state.upload_id, 5, b"too much data")
+
+    def test_hash_survives_a_restart(self, store):
+        data = b"0123456789" * 10
+        state = store.create("digits.txt", len(data))
+        store.write_chunk(state.upload_id, 0, data[:50])
+        restarted = UploadStore(store.directory)
+        restarted.write_chunk(state.upload_id, 50, data[50:])
+        with pytest.raises(ValueError, match="SHA-256 mismatch"):
+            restarted.finalize(state.upload_id, hashlib.sha256(b"other").hexdigest())
+        assert restarted.finalize(state.upload_id, hashlib.sha256(data).hexdigest()).sha256
+
+    def test_incomplete_and_unsupported_uploads(self, store):
+        state = store.create("notes.txt", 100)
+        with pytest.raises(ValueError, match="incomplete"):
+            store.finalize(state.upload_id, "0" * 64)
+        executable = b"\x7fELF\x02\x01\x01" + b"\x00" * 200
+        state = store.create("tool", len(executable))
+        with pytest.raises(ValueError, match="Unsupported file type"):
+            store.write_chunk(state.upload_id, 0, executable)
+        assert store.get(state.upload_id).received == 0
+
+    def test_expired_uploads_are_swept(self, store):
+        state = store.create("notes.txt", 10)
+        store.ttl_seconds = -1
+        assert store.sweep() == 1
+        assert store.get(state.upload_id) is None
+
+
+class TestStoredFileExtraction:
+    def test_stored_pdf_is_not_read_into_memory(self, tmp_path, monkeypatch):
+        path = tmp_path / "big.pdf"
+        path.write_bytes(make_pdf(2))
+        def read_bytes(self):
+            raise AssertionError("stored PDF copied into memory")
+        monkeypatch.setattr(Path, "read_bytes", read_bytes)
+        result = file_processor.process_stored_file(str(path), "big.pdf", max_pdf_size_mb=chunked_uploads.UPLOAD_MAX_MB)
+        assert "Page number 2" in result["text"]
+
+    def test_other_stored_files_are_read(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("Stored notes")
+        assert file_processor.process_stored_file(str(path), "notes.txt")["text"] == "Stored notes"
+
+
+class TestUploadEndpoints:
+    def test_upload_resume_and_extract(self, client: TestClient, store):
+        data = make_pdf(3)
+        upload = client.post("/api/v1/uploads", json={"filename": "big.pdf", "size": len(data)})
+        assert upload.status_code == 201
+        upload_id = upload.json()["upload_id"]
+
+        half = len(data) // 2
+        assert client.put(f"/api/v1/uploads/{upload_id}?offset=0", content=data[:half]).status_code == 200
+        conflict = client.put(f"/api/v1/uploads/{upload_id}?offset=0", content=data[:half])
+        assert conflict.status_code == 409 and conflict.headers["Upload-Offset"] == str(half)
+
+        resume_at = client.get(f"/api/v1/uploads/{upload_id}").json()["received"]
+        assert client.put(f"/api/v1/uploads/{upload_id}?offset={resume_at}", content=data[resume_at:]).json()["complete"]
+
+        finalize = client.post(f"/api/v1/uploads/{upload_id}/finalize", json={"sha256": hashlib.sha256(data).hexdigest()})
+        assert finalize.status_code == 202
+        job_id = finalize.json()["job_id"]
+        for _ in range(200):
+            state = client.get(f"/api/v1/jobs/{job_id}").json()
+            if state["status"] in ("done", "failed"):
+                break
+            time.sleep(0.05)
+        assert state["status"] == "done"
+        assert "Page number 3" in state["result"]["content"]
+
+        assert client.delete(f"/api/v1/uploads/{upload_id}").status_code == 204
+        assert client.get(f"/api/v1/uploads/{upload_id}").status_code == 404
+
+    def test_finalize_rejects_invalid_options(self, client: TestClient, store):
+        data = make_pdf(1)
+        upload_id = client.post("/api/v1/uploads", json={"filename": "big.pdf", "size": len(data)}).json()["upload_id"]
+        client.put(f"/api/v1/uploads/{upload_id}?offset=0", content=data)
+        sha256 = hashlib.sha256(data).hexdigest()
+        rejected = client.post(f"/api/v1/uploads/{upload_id}/finalize", json={"sha256": sha256, "profile": "turbo"})
+        assert rejected.status_code == 400 and "Unsupported extraction profile" in rejected.json()["detail"]
+        assert client.post(f"/api/v1/uploads/{upload_id}/finalize", json={"sha256": sha256}).status_code == 202
+
+    def test_oversized_chunk(self, client: TestClient, store, monkeypatch):
+        monkeypatch.setattr(chunked_uploads, "UPLOAD_CHUNK_MAX_MB", 0)
+        upload_id = client.post("/api/v1/uploads", json={"filename": "a.txt", "size": 10}).json()["upload_id"]
+        assert client.put(f"/api/v1/uploads/{upload_id}?offset=0", content=b"0123456789").status_code == 413
@@ -0,0 +1,111 @@
+"""
+Test cases for pre-flight cost estimation of uploads.
+"""
+
+import base64
+import json
+
+import fitz
+from fastapi.testclient import TestClient
+
+from app.utils import cost_estimation, file_processor
+from app.utils.cost_estimation import TimingModel, UploadProfile, estimate_tokens, inspect_upload
+
+
+def make_pdf(text_pages: int, blank_pages: int = 0) -> bytes:
+    with fitz.open() as doc:
+        for number in range(1, text_pages + 1):
+            doc.new_page().insert_text((72, 72), f"Page number {number}")
+        for _ in range(blank_pages):
+            doc.new_page()
+        return doc.tobytes()
+
+
+class TestInspectUpload:
+    def test_pdf_pages_without_text_need_ocr(self):
+        profile = inspect_upload(make_pdf(2, blank_pages=2), 'application/pdf')
+        assert (profile.family, profile.unit, profile.units, profile.ocr_units) == ('pdf', 'page', 4, 2)
+        assert profile.details['sampled_pages_without_text'] == [3, 4]
+
+    def test_pdf_without_ocr_available(self):
+        profile = inspect_upload(make_pdf(1, blank_pages=1), 'application/pdf', ocr_available=False)
+        assert profile.ocr_units == 0
+
+    def test_xlsx_rows_from_dimension(self, sample_xlsx_content):
+        profile = inspect_upload(sample_xlsx_content, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        assert profile.unit == 'row' and profile.units > 0
+
+    def test_unreadable_header_falls_back_to_size(self):
+        profile = inspect_upload(b'%PDF-1.4 broken' * 100, 'application/pdf')
+        assert (profile.family, profile.unit) == ('text', 'kilobyte')
+        assert 'profile_error' in profile.details
+
+    def test_estimate_tokens(self):
+        assert estimate_tokens('') == 0
+        assert estimate_tokens('abcd' * 10) == 10
+        assert estimate_tokens('čćžšđ' * 2) == 5
+
+
+class TestTimingModel:
+    def test_defaults_until_calibrated(self, tmp_path):
+        model = TimingModel(str(tmp_path / 'timings.jsonl'))
+        profile = UploadProfile('pdf', 'page', 10, 0, {})
+        assert model.predict(profile).calibrated is False
+
+        for pages in range(1, cost_estimation.TIMING_MIN_SAMPLES + 1):
+            model.record(UploadProfile('pdf', 'page', pages, 0, {}), 0.1 + 0.05 * pages, 1000 * pages)
+        estimate = model.predict(profile, max_chars=5000)
+        assert estimate.calibrated is True
+        assert abs(estimate.estimated_seconds - 0.35) < 0.01 # Only the 5 pages filling the budget are read
+        assert estimate.estimated_chars == 5000 # Capped by the character budget
+        assert abs(model.predict(profile).estimated_seconds - 0.6) < 0.01
+
+    def test_lane_follows_predicted_time(self, tmp_path):
+        model = TimingModel(str(tmp_path / 'timings.jsonl'))
+        scan = model.predict(UploadProfile('pdf', 'page', 40, 40, {}))
+        assert scan.needs_ocr and scan.lane == 'background'
+        assert scan.estimated_seconds_without_ocr < cost_estimation.INTERACTIVE_MAX_SECONDS
+
+    def test_log_is_trimmed(self, tmp_path):
+        path = tmp_path / 'timings.jsonl'
+        model = TimingModel(str(path), max_samples=10)
+        for _ in range(40):
+            model.record(UploadProfile('text', 'kilobyte', 1, 0, {}), 0.01, 100)
+        lines = path.read_text().splitlines()
+        assert len(lines) <= 20 and json.loads(lines[-1])['family'] == 'text'
+
+
+class TestRecordedTimings:
+    def test_truncated_run_is_recorded_with_pages_read(self, tmp_path, monkeypatch):
+        path = tmp_path / 'timings.jsonl'
+        monkeypatch.setattr(file_processor, 'timing_model', TimingModel(str(path)))
+        result = file_processor.process_file_content(make_pdf(10), 'doc.pdf', max_chars=40)
+        assert result['truncated'] is True
+        sample = json.loads(path.read_text())
+        assert sample['family'] == 'pdf' and sample['units'] == 4 # Of 10 pages
+
+    def test_inspection_of_the_caller_is_reused(self, tmp_path, monkeypatch):
+        path = tmp_path / 'timings.jsonl'
+        monkeypatch.setattr(file_processor, 'timing_model', TimingModel(str(path)))
+        upload_profile = inspect_upload(make_pdf(2), 'application/pdf')
+        def fail(*args, **kwargs):
+            raise AssertionError('upload inspected again')
+        monkeypatch.setattr(file_processor, 'inspect_upload', fail)
+        file_processor.process_file_content(make_pdf(2), 'doc.pdf', upload_profile=upload_profile)
+        assert json.loads(path.read_text())['units'] == 2
+
+
+class TestEstimateEndpoint:
+    def test_estimate_pdf(self, client: TestClient):
+        content = base64.b64encode(make_pdf(3)).decode()
+        response = client.post("/api/v1/estimate_file", json={"filename": "doc.pdf", "file_data_base64": content})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["mime_type"] == "application/pdf"
+        assert data["units"] == 3 and data["needs_ocr"] is False
+        assert data["lane"] == "interactive"
+
+    def test_estimate_unsupported(self, client: TestClient):
+        content = base64.b64encode(b"\x00\x01\x02 not a document").decode()
+        response = client.post("/api/v1/estimate_file", json={"filename": "x.bin", "file_data_base64": content})
+        assert response.status_code == 400
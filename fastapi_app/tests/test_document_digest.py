@@ -0,0 +1,92 @@
+"""
+Test cases for document digests computed at extraction time.
+"""
+
+import asyncio
+import base64
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.models import schemas
+from app.services import pipeline_service
+from app.services.pipeline_service import summarize_documents
+from app.utils.document_digest import DigestCache, compute_document_digest
+from app.utils.extraction_stream import TextFragment
+from app.utils.structured_text import StructuredText
+
+REPORT = """# Quarterly Report
+
+## Revenue
+The revenue of the company grew in the third quarter, and revenue from services was the largest part.
+
+## Outlook
+The company expects that revenue will grow further in the next quarter.
+"""
+
+
+class TestComputeDigest:
+    def test_markdown_document(self):
+        digest = compute_document_digest(StructuredText.from_fragments([TextFragment(REPORT)]))
+        assert digest.title == "Quarterly Report"
+        assert digest.outline == ["Quarterly Report", "Revenue", "Outlook"]
+        assert digest.key_terms[0] == "revenue"
+        assert "the" not in digest.key_terms
+        assert digest.language == 'en'
+        assert digest.words > 30 and digest.estimated_tokens > 0
+
+    def test_page_units_and_language(self):
+        pages = [
+            TextFragment("Der Bericht zeigt, dass die Kosten in dem Jahr gestiegen sind.", 'page', 1),
+            TextFragment("Die Kosten werden auch im nächsten Jahr nicht sinken.", 'page', 2),
+        ]
+        digest = compute_document_digest(StructuredText.from_fragments(pages), "bericht.pdf")
+        assert digest.units == {'page': 2}
+        assert digest.language == 'de'
+        assert digest.title.startswith("Der Bericht")
+
+    def test_empty_text_falls_back_to_filename(self):
+        digest = compute_document_digest(StructuredText(''), "scan.pdf")
+        assert digest.title == "scan.pdf" and digest.language is None and digest.words == 0
+
+
+class TestDigestInPipeline:
+    def test_digest_is_returned_with_extracted_text(self, client: TestClient):
+        content = base64.b64encode(REPORT.encode()).decode()
+        response = client.post("/api/v1/process_file", json={"filename": "report.md", "file_data_base64": content})
+        assert response.status_code == 200
+        assert response.json()["digest"]["title"] == "Quarterly Report"
+
+    def test_summary_uses_digests_and_computes_missing_ones(self, monkeypatch):
+        cache = DigestCache()
+        monkeypatch.setattr("app.services.pipeline_service.digest_cache", cache)
+        given = schemas.DocumentDigest(title="Supplied title", key_terms=["alpha"], words=3)
+        documents = [
+            schemas.DocumentInput(name="a.txt", content="alpha beta gamma", size=16, digest=given),
+            schemas.DocumentInput(name="b.md", content=REPORT, size=len(REPORT)),
+        ]
+        summary = summarize_documents(documents)
+        assert summary.startswith("2 document(s) attached:")
+        assert '"Supplied title"' in summary and "Key terms: alpha" in summary
+        assert "Outline: Quarterly Report | Revenue | Outlook" in summary
+        assert cache.get_or_compute(REPORT) is cache.get_or_compute(REPORT)
+
+    def test_missing_digests_are_computed_off_the_event_loop(self, monkeypatch):
+        threads = []
+        cache = DigestCache()
+
+        def record_thread(text, name=''):
+            threads.append(threading.current_thread())
+            return cache.get_or_compute(text, name)
+
+        async def stop_after_preparation(*args, **kwargs):
+            raise RuntimeError("stop")
+
+        monkeypatch.setattr(pipeline_service.digest_cache, "get_or_compute", record_thread)
+        monkeypatch.setattr(pipeline_service, "run_analysis_step", stop_after_preparation)
+        request = schemas.ProcessQueryRequest(query="q", documents=[schemas.DocumentInput(name="b.md", content=REPORT, size=1)])
+        try:
+            asyncio.run(pipeline_service.run_ai_pipeline(request, "key"))
+        except RuntimeError:
+            pass
+        assert threads and threads[0] is not threading.main_thread()
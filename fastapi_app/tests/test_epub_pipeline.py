@@ -0,0 +1,134 @@
+"""
+Test cases for the EPUB pipeline and the ordered extraction pool.
+"""
+
+import io
+import threading
+import time
+import zipfile
+
+import html2text
+import pytest
+from unittest.mock import patch
+
+from app.utils.epub_pipeline import chapter_to_markdown, iter_epub_chapters, read_epub_package
+from app.utils.extraction_pool import map_ordered
+from app.utils.file_processor import iter_extract_text_from_epub
+
+CONTAINER = (
+    '<?xml version="1.0"?><container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+    '<rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles></container>'
+)
+OPF = (
+    '<?xml version="1.0"?><package xmlns="http://www.idpf.org/2007/opf" version="2.0">'
+    '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>Spine Order</dc:title>'
+    '<dc:creator>Ann Author</dc:creator><dc:language>pl</dc:language></metadata>'
+    '<manifest><item id="c1" href="text/one.xhtml" media-type="application/xhtml+xml"/>'
+    '<item id="c2" href="text/two%20words.xhtml" media-type="application/xhtml+xml"/>'
+    '<item id="css" href="style.css" media-type="text/css"/>'
+    '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/></manifest>'
+    '<spine toc="ncx"><itemref idref="c2"/><itemref idref="c1"/><itemref idref="css"/></spine></package>'
+)
+NCX = (
+    '<?xml version="1.0"?><ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1"><navMap>'
+    '<navPoint id="p1"><navLabel><text>Part One</text></navLabel><content src="text/two%20words.xhtml"/>'
+    '<navPoint id="p2"><navLabel><text>Nested</text></navLabel><content src="text/one.xhtml"/></navPoint>'
+    '</navPoint></navMap></ncx>'
+)
+
+
+def make_epub() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        zf.writestr('mimetype', 'application/epub+zip')
+        zf.writestr('META-INF/container.xml', CONTAINER)
+        zf.writestr('OEBPS/content.opf', OPF)
+        zf.writestr('OEBPS/toc.ncx', NCX)
+        zf.writestr('OEBPS/style.css', 'p {}')
+        zf.writestr('OEBPS/text/one.xhtml', '<html><body><h1>Second</h1><p>Read second.</p></body></html>')
+        zf.writestr('OEBPS/text/two words.xhtml', '<html><body><h1>First</h1><p>Read first.</p></body></html>')
+    return buffer.getvalue()
+
+
+class TestEpubPackage:
+    def test_reads_spine_metadata_and_toc(self):
+        package = read_epub_package(make_epub())
+        assert package.chapters == ['OEBPS/text/two words.xhtml', 'OEBPS/text/one.xhtml']
+        assert package.metadata == {'title': ['Spine Order'], 'creator': ['Ann Author'], 'language': ['pl']}
+        assert package.toc == ['- Part One', '  - Nested']
+
+    def test_invalid_epub(self):
+        with pytest.raises(ValueError):
+            read_epub_package(b"not a zip")
+
+    def test_chapters_are_read_lazily(self):
+        content = make_epub()
+        package = read_epub_package(content)
+        with patch('zipfile.ZipFile.read', autospec=True, side_effect=zipfile.ZipFile.read) as mock_read:
+            chapters = iter_epub_chapters(content, package.chapters)
+            assert next(chapters)[1].startswith(b'<html><body><h1>First')
+            assert mock_read.call_count == 1
+            chapters.close()
+
+    def test_total_size_limit(self):
+        content = make_epub()
+        chapters = iter_epub_chapters(content, read_epub_package(content).chapters, max_total_bytes=80)
+        assert next(chapters)[0] == 'OEBPS/text/two words.xhtml'
+        with pytest.raises(ValueError, match="in total"):
+            next(chapters)
+
+    def test_chapters_in_spine_order(self):
+        fragments = [f for f in iter_extract_text_from_epub(make_epub()) if f.unit == 'chapter']
+        assert [f.title for f in fragments] == ['First', 'Second']
+
+    def test_chapters_are_converted_in_the_pool_and_parsed_once(self):
+        threads = []
+        original = chapter_to_markdown
+
+        def record(content):
+            threads.append(threading.current_thread().name)
+            return original(content)
+
+        with patch('app.utils.epub_pipeline.chapter_to_markdown', side_effect=record), \
+                patch('app.utils.html_extraction.parse_html') as mock_parse:
+            fragments = [f for f in iter_extract_text_from_epub(make_epub()) if f.unit == 'chapter']
+        assert [f.title for f in fragments] == ['First', 'Second']
+        assert len(threads) == 2 and all(name.startswith('extract') for name in threads)
+        assert not mock_parse.called
+
+    def test_converter_reuse_matches_fresh_converter(self):
+        chapters = [b"<blockquote><p>unclosed quote", b"<h2>B</h2><p>plain</p>", b"<ul><li>one<li>two"]
+        for content in chapters:
+            fresh = html2text.HTML2Text()
+            fresh.ignore_links = False
+            fresh.ignore_emphasis = False
+            assert chapter_to_markdown(content) == fresh.handle(content.decode('utf-8'))
+
+
+class TestMapOrdered:
+    def test_results_keep_input_order(self):
+        def slow_for_small(n):
+            time.sleep(0.01 * (5 - n))
+            return n * n
+        assert list(map_ordered(slow_for_small, range(5))) == [0, 1, 4, 9, 16]
+
+    def test_early_close_stops_submitting(self):
+        seen = []
+        lock = threading.Lock()
+
+        def record(n):
+            with lock:
+                seen.append(n)
+            return n
+
+        results = map_ordered(record, range(1000), window=4)
+        assert next(results) == 0
+        results.close()
+        time.sleep(0.05)
+        assert len(seen) < 10
+
+    def test_errors_propagate(self):
+        def fail(n):
+            raise ValueError("bad chapter")
+        with pytest.raises(ValueError, match="bad chapter"):
+            list(map_ordered(fail, [1]))
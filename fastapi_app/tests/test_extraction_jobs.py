@@ -0,0 +1,99 @@
+"""
+Test cases for background extraction jobs and progress reporting.
+"""
+
+import base64
+import json
+import time
+
+import fitz
+from fastapi.testclient import TestClient
+
+from app.utils.extraction_progress import progress_reporting, report_progress
+from app.utils.extraction_sandbox import run_sandboxed
+from app.utils.file_processor import safe_extract_text_from_pdf
+
+
+def make_pdf(pages: int) -> bytes:
+    with fitz.open() as doc:
+        for number in range(1, pages + 1):
+            doc.new_page().insert_text((72, 72), f"Page number {number}")
+        return doc.tobytes()
+
+
+def reporting_job(steps):
+    for step in range(1, steps + 1):
+        report_progress('ocr', step, steps, f"chunk {step}")
+    return 'finished'
+
+
+def wait_for_job(client: TestClient, job_id: str) -> dict:
+    for _ in range(200):
+        state = client.get(f"/api/v1/jobs/{job_id}").json()
+        if state["status"] in ("done", "failed"):
+            return state
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+class TestProgressReporting:
+    def test_pdf_pages_are_reported(self):
+        updates = []
+        with progress_reporting(updates.append):
+            safe_extract_text_from_pdf(make_pdf(3))
+        assert updates[0] == {'stage': 'text_layer', 'done': 0, 'total': 3}
+        assert updates[-1] == {'stage': 'text_layer', 'done': 3, 'total': 3}
+
+    def test_no_listener_is_a_no_op(self):
+        report_progress('ocr', 1, 2) # Must not raise
+
+    def test_progress_crosses_the_sandbox(self):
+        updates = []
+        assert run_sandboxed(reporting_job, 3, progress=updates.append) == 'finished'
+        assert [update['text'] for update in updates] == ['chunk 1', 'chunk 2', 'chunk 3']
+
+
+class TestJobEndpoints:
+    def test_job_mode_returns_job_then_result(self, client: TestClient):
+        content = base64.b64encode(make_pdf(2)).decode()
+        response = client.post("/api/v1/process_file", json={
+            "filename": "scan.pdf", "file_data_base64": content, "mode": "job"
+        })
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        state = wait_for_job(client, job_id)
+        assert state["status"] == "done"
+        assert state["pages_total"] == 2
+        assert "Page number 2" in state["result"]["content"]
+
+    def test_events_end_with_final_state(self, client: TestClient):
+        content = base64.b64encode(make_pdf(2)).decode()
+        job_id = client.post("/api/v1/process_file", json={
+            "filename": "scan.pdf", "file_data_base64": content, "mode": "job"
+        }).json()["job_id"]
+
+        response = client.get(f"/api/v1/jobs/{job_id}/events")
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block for block in response.text.split("\n\n") if block.startswith("event:")]
+        name, data = events[-1].split("\n", 1)
+        assert name == "event: done"
+        assert "Page number 1" in json.loads(data[len("data: "):])["result"]["content"]
+
+    def test_failed_job_and_unknown_job(self, client: TestClient):
+        content = base64.b64encode(b"\x00\x01\x02 not a document").decode()
+        job_id = client.post("/api/v1/process_file", json={
+            "filename": "x.bin", "file_data_base64": content, "mode": "job"
+        }).json()["job_id"]
+        state = wait_for_job(client, job_id)
+        assert state["status"] == "failed" and "Unsupported file type" in state["error"]
+        assert client.get("/api/v1/jobs/unknown").status_code == 404
+
+    def test_invalid_options_are_rejected_before_queuing(self, client: TestClient):
+        content = base64.b64encode(make_pdf(1)).decode()
+        for option in ({"profile": "turbo"}, {"archive_mode": "unpack"}, {"tabular_mode": "cells"}):
+            response = client.post("/api/v1/process_file", json={
+                "filename": "scan.pdf", "file_data_base64": content, "mode": "job", **option
+            })
+            assert response.status_code == 400
+            assert "job_id" not in response.json()
@@ -0,0 +1,107 @@
+"""
+Test cases for per-request extraction profiles.
+"""
+
+import base64
+import io
+from unittest.mock import patch
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image, ImageDraw
+
+from app.utils import extraction_profiles
+from app.utils.extraction_profiles import get_extraction_profile
+from app.utils.file_processor import process_uploaded_file_data
+
+
+def make_pdf(text_pages: int, blank_pages: int = 0) -> str:
+    with fitz.open() as doc:
+        for number in range(1, text_pages + 1):
+            doc.new_page().insert_text((72, 72), f"Page number {number}")
+        for _ in range(blank_pages):
+            doc.new_page()
+        return base64.b64encode(doc.tobytes()).decode()
+
+
+class TestProfileLookup:
+    def test_default_and_named_profiles(self):
+        assert get_extraction_profile().name == extraction_profiles.DEFAULT_EXTRACTION_PROFILE
+        assert get_extraction_profile('fast').ocr is False
+        assert get_extraction_profile('thorough').html_parser == 'html5lib'
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError, match="Unsupported extraction profile"):
+            get_extraction_profile('turbo')
+
+
+class TestFastProfile:
+    def test_page_limit_adds_note(self, monkeypatch):
+        monkeypatch.setitem(extraction_profiles.EXTRACTION_PROFILES, 'fast',
+                            get_extraction_profile('fast')._replace(max_pages=2))
+        result = process_uploaded_file_data(make_pdf(4), "long.pdf", profile='fast')
+        assert "Page number 2" in result["text"] and "Page number 3" not in result["text"]
+        assert result["text"].endswith("[Page limit: read 2 of 4 pages]")
+        assert result["spans"]["units"] == ['page', 'note']
+
+    def test_scanned_pdf_is_not_ocred(self):
+        result = process_uploaded_file_data(make_pdf(0, blank_pages=2), "scan.pdf", profile='fast')
+        assert "OCR is disabled" in result["text"]
+
+    def test_images_are_rejected(self, sample_image_content):
+        content = base64.b64encode(sample_image_content).decode()
+        with pytest.raises(ValueError, match="'fast' extraction profile"):
+            process_uploaded_file_data(content, "photo.png", profile='fast')
+
+    def test_epub_without_metadata_and_toc(self, sample_epub_content):
+        content = base64.b64encode(sample_epub_content).decode()
+        fast = process_uploaded_file_data(content, "book.epub", profile='fast')
+        balanced = process_uploaded_file_data(content, "book.epub", profile='balanced')
+        assert "Metadata:" in balanced["text"]
+        assert "Metadata:" not in fast["text"]
+        assert 'metadata' not in fast["spans"]["units"]
+
+
+class TestProfileEndpoints:
+    def test_process_file_with_profile(self, client: TestClient):
+        response = client.post("/api/v1/process_file", json={
+            "filename": "doc.pdf", "file_data_base64": make_pdf(2), "profile": "fast"
+        })
+        assert response.status_code == 200
+        assert "Page number 2" in response.json()["content"]
+
+    def test_unknown_profile_is_rejected(self, client: TestClient):
+        response = client.post("/api/v1/process_file", json={
+            "filename": "doc.pdf", "file_data_base64": make_pdf(1), "profile": "turbo"
+        })
+        assert response.status_code == 400
+
+    def test_estimate_without_ocr(self, client: TestClient):
+        scan = make_pdf(0, blank_pages=3)
+        fast = client.post("/api/v1/estimate_file", json={"filename": "scan.pdf", "file_data_base64": scan, "profile": "fast"}).json()
+        assert fast["ocr_units"] == 0 and fast["needs_ocr"] is False
+
+    def test_lane_defaults(self, client: TestClient, monkeypatch):
+        scan = make_pdf(0, blank_pages=1)
+        response = client.post("/api/v1/process_file", json={"filename": "scan.pdf", "file_data_base64": scan, "profile": "fast"})
+        assert "OCR is disabled" in response.json()["content"]
+
+        profiles = []
+        monkeypatch.setattr("app.utils.file_processor.process_uploaded_file_sandboxed",
+                            lambda *args, **kwargs: profiles.append(kwargs["profile"]) or {"text": "ok"})
+        client.post("/api/v1/process_files", json={"files": [{"filename": "a.pdf", "file_data_base64": scan}]})
+        assert profiles == ['thorough']
+
+    def test_image_without_profile_is_ocred(self, client: TestClient, monkeypatch):
+        monkeypatch.setattr("app.utils.file_processor.SANDBOX_ENABLED", False)
+        image = Image.new("RGB", (300, 120), "white")
+        ImageDraw.Draw(image).text((20, 40), "Invoice 42", fill="black")
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        with patch('pytesseract.image_to_string', return_value="Invoice 42"):
+            response = client.post("/api/v1/process_file", json={
+                "filename": "scan.png", "file_data_base64": base64.b64encode(buffer.getvalue()).decode()
+            })
+        assert response.status_code == 200
+        assert "Invoice 42" in response.json()["content"]
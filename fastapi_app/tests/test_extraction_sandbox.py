@@ -0,0 +1,62 @@
+"""
+Test cases for sandboxed extraction jobs (subprocess with rlimits and a deadline).
+"""
+
+import base64
+import time
+
+import pytest
+
+from app.utils import tabular_profile
+from app.utils.extraction_sandbox import ExtractionLimitExceeded, SandboxLimits, run_sandboxed
+from app.utils.file_processor import process_uploaded_file_sandboxed
+
+
+# Jobs must be module-level functions so the job process can import them
+def add(a, b=0):
+    return a + b
+
+def burn_cpu():
+    while True:
+        pass
+
+def allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+def sleep(seconds):
+    time.sleep(seconds)
+
+def reject():
+    raise ValueError("bad input")
+
+
+class TestSandbox:
+    def test_result_is_returned(self):
+        assert run_sandboxed(add, 2, b=3) == 5
+
+    def test_value_error_is_reraised(self):
+        with pytest.raises(ValueError, match="bad input"):
+            run_sandboxed(reject)
+
+    def test_cpu_limit(self):
+        with pytest.raises(ExtractionLimitExceeded) as info:
+            run_sandboxed(burn_cpu, limits=SandboxLimits(cpu_seconds=1, timeout_seconds=30))
+        assert info.value.limit == 'CPU time'
+
+    def test_memory_limit(self):
+        with pytest.raises(ExtractionLimitExceeded) as info:
+            run_sandboxed(allocate, 4096, limits=SandboxLimits(memory_mb=1024))
+        assert info.value.limit == 'memory'
+
+    def test_wall_clock_limit(self):
+        started = time.monotonic()
+        with pytest.raises(ExtractionLimitExceeded) as info:
+            run_sandboxed(sleep, 30, limits=SandboxLimits(timeout_seconds=0.5))
+        assert info.value.limit == 'wall-clock'
+        assert time.monotonic() - started < 10
+
+    def test_summary_tables_are_registered_in_the_caller(self):
+        content = base64.b64encode(b"name,score\nanna,10\njan,20\n").decode()
+        result = process_uploaded_file_sandboxed(content, "scores.csv", tabular_mode='summary')
+        assert "_tables" not in result
+        assert tabular_profile.table_store.get(result["tables"][0]) is not None
@@ -0,0 +1,59 @@
+"""
+Test cases for local extractive (TextRank) summarization of oversized documents.
+"""
+
+from app.utils import extractive_summary
+from app.utils.cost_estimation import estimate_tokens
+from app.utils.extractive_summary import SummaryCache, fit_to_budget, split_sentences, summarize_text, textrank_scores
+
+ARTICLE = (
+    "Solar power capacity grew quickly last year. "
+    "Solar panels became cheaper, so solar power capacity reached a record. "
+    "The weather in the capital was mild in spring. "
+    "Analysts expect solar power capacity to keep growing as panels get cheaper. "
+    "A local bakery opened a second shop downtown. "
+) * 3
+
+
+class TestSentenceSplitting:
+    def test_abbreviations_and_lines(self):
+        text = "Dr. Smith arrived at 10 a.m. and left. Prices rose e.g. for fuel.\nNew line here!\n\nNext paragraph."
+        assert split_sentences(text) == [
+            "Dr. Smith arrived at 10 a.m. and left.",
+            "Prices rose e.g. for fuel.",
+            "New line here!",
+            "Next paragraph.",
+        ]
+
+
+class TestTextRank:
+    def test_central_sentences_rank_highest(self):
+        sentences = split_sentences(ARTICLE)[:5]
+        scores = textrank_scores(sentences)
+        assert abs(float(scores.sum()) - 1.0) < 1e-3
+        ranked = [sentences[position] for position in scores.argsort()[::-1]]
+        assert "solar" in ranked[0].lower()
+        assert "bakery" in ranked[-1] or "weather" in ranked[-1]
+
+    def test_summary_fits_budget_and_keeps_order(self):
+        summary = summarize_text(ARTICLE, 60)
+        assert estimate_tokens(summary) <= 70
+        assert "bakery" not in summary
+        assert summary.endswith(extractive_summary.SUMMARY_GAP_MARKER)
+        assert summarize_text("Short text.", 60) == "Short text."
+
+    def test_long_text_is_ranked_in_blocks(self, monkeypatch):
+        monkeypatch.setattr(extractive_summary, "SUMMARY_BLOCK_SENTENCES", 5)
+        summary = summarize_text(ARTICLE * 4, 200)
+        assert 0 < estimate_tokens(summary) <= 220
+
+
+class TestFitToBudget:
+    def test_small_documents_stay_whole(self):
+        cache = SummaryCache()
+        small = "A short note about the meeting."
+        texts = fit_to_budget([small, ARTICLE * 4], 300, cache)
+        assert texts[0] == small
+        assert estimate_tokens(texts[1]) <= 300 - estimate_tokens(small) + 20
+        assert fit_to_budget([small, ARTICLE * 4], 300, cache)[1] is texts[1]
+        assert fit_to_budget([small], 300, cache) == [small]
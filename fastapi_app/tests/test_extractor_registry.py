@@ -0,0 +1,74 @@
+"""
+Test cases for lazy optional imports and the extractor plugin registry.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.extractor_registry import LazyImport, ExtractorRegistry
+from app.utils import file_processor
+from app.utils.file_processor import iter_extract_fragments
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class TestLazyImport:
+    def test_missing_module_is_falsy(self):
+        missing = LazyImport('module_that_does_not_exist')
+        assert not missing
+        with pytest.raises(ImportError):
+            missing.anything
+
+    def test_import_happens_on_first_use(self):
+        lazy = LazyImport('json')
+        assert not lazy.loaded
+        assert lazy.dumps([1]) == '[1]'
+        assert lazy.loaded
+
+    def test_attribute_follows_patches(self):
+        lazy = LazyImport('json', 'dumps')
+        with patch('json.dumps', return_value='patched'):
+            assert lazy({}) == 'patched'
+        assert lazy({}) == '{}'
+
+    def test_file_processor_import_skips_heavy_libraries(self):
+        code = (
+            "import sys, app.utils.file_processor;"
+            "print(','.join(m for m in ('fitz', 'openpyxl', 'pptx', 'ebooklib', 'numpy', 'lxml') if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == ''
+
+
+class TestExtractorRegistry:
+    def test_exact_match_before_prefix(self):
+        registry = ExtractorRegistry()
+        registry.register('generic', mime_prefixes=['text/'])(lambda *args: iter(()))
+        registry.register('csv', ['text/csv'])(lambda *args: iter(()))
+        assert registry.get('text/csv').name == 'csv'
+        assert registry.get('text/x-other').name == 'generic'
+        assert registry.get('application/octet-stream') is None
+
+    def test_availability_reflects_dependencies(self):
+        registry = ExtractorRegistry()
+        registry.register('broken', ['x/y'], requires=[LazyImport('module_that_does_not_exist')])(lambda *args: iter(()))
+        assert registry.get('x/y').is_available() is False
+
+    def test_excel_requirements_are_per_format(self, monkeypatch):
+        monkeypatch.setattr(file_processor.xlrd, '_module', None) # As if xlrd were not installed
+        xlsx = file_processor.extractor_registry.get('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        xls = file_processor.extractor_registry.get('application/vnd.ms-excel')
+        assert xlsx.is_available() is True
+        assert xls.is_available() is False
+
+    def test_unsupported_type_raises(self):
+        with pytest.raises(ValueError, match="Unsupported file type"):
+            iter_extract_fragments(b"data", 'application/x-unknown')
+
+    def test_dispatch_to_registered_plugin(self):
+        fragments = list(iter_extract_fragments(b"plain text", 'text/plain'))
+        assert fragments[0].text == "plain text"
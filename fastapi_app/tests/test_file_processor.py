@@ -9,6 +9,7 @@ from app.utils.file_processor import (
     safe_extract_text_from_txt,
     safe_extract_text_from_markdown,
     safe_extract_text_from_excel,
+    safe_extract_text_from_csv,
     safe_extract_text_from_powerpoint,
     safe_extract_text_from_rtf,
     safe_extract_text_from_archive,
@@ -17,9 +18,15 @@ from app.utils.file_processor import (
     safe_extract_text_from_html,
     safe_extract_text_from_epub,
     format_extracted_text,
+    iter_extract_text_from_pdf,
+    iter_extract_text_from_powerpoint,
+    iter_extract_text_from_epub,
     process_uploaded_file_data,
     validate_file_type_and_scan
 )
+from app.utils import extraction_io
+from app.utils.extraction_io import scratch_file
+from app.utils.extraction_stream import consume_fragments
 
 # Ścieżka do katalogu z plikami testowymi
 TEST_FILES_DIR = Path(__file__).parent / "test_files"
@@ -243,4 +250,190 @@ class TestIntegration:
                 mock_magic.return_value.from_buffer.return_value = mime_type
                 content = base64.b64encode(b"Test content").decode()
                 result = process_uploaded_file_data(content, filename)
-                assert result["mime_type"] == mime_type 
\ No newline at end of file
+                assert result["mime_type"] == mime_type 
+
+# Testy ekstrakcji w pamięci (bez plików tymczasowych)
+class TestInMemoryExtraction:
+    @pytest.fixture(autouse=True)
+    def forbid_temp_files(self):
+        with patch('tempfile.NamedTemporaryFile', side_effect=AssertionError("temp file used")), \
+             patch('tempfile.mkstemp', side_effect=AssertionError("temp file used")):
+            yield
+
+    def test_xlsx_from_memory(self, sample_xlsx_content):
+        result = safe_extract_text_from_excel(
+            sample_xlsx_content,
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        assert "Sheet: Data" in result
+        assert "item 3 | 30" in result
+
+    def test_pptx_from_memory(self):
+        import io
+        from pptx import Presentation
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = "In-memory slide"
+        buffer = io.BytesIO()
+        prs.save(buffer)
+        assert "In-memory slide" in safe_extract_text_from_powerpoint(buffer.getvalue())
+
+    def test_odt_from_memory(self):
+        import io
+        from odf.opendocument import OpenDocumentText
+        from odf.text import P
+        doc = OpenDocumentText()
+        doc.text.addElement(P(text="OpenDocument text"))
+        buffer = io.BytesIO()
+        doc.write(buffer)
+        result = safe_extract_text_from_opendocument(buffer.getvalue(), 'application/vnd.oasis.opendocument.text')
+        assert result == "OpenDocument text"
+
+    def test_zip_from_memory(self):
+        import io
+        import zipfile
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr('docs/readme.txt', 'hello')
+        result = safe_extract_text_from_archive(buffer.getvalue(), 'application/zip')
+        assert '- docs/readme.txt' in result
+
+    def test_epub_from_memory(self, sample_epub_content):
+        result = safe_extract_text_from_epub(sample_epub_content)
+        assert "Content of chapter 2." in result
+        assert "Table of Contents:" in result
+
+class TestScratchFiles:
+    def test_scratch_file_is_removed_on_error(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(extraction_io, 'SCRATCH_DIR', str(tmp_path))
+        with pytest.raises(RuntimeError):
+            with scratch_file(b"data", suffix=".pdf") as path:
+                assert os.path.exists(path)
+                raise RuntimeError("parser failed")
+        assert list(tmp_path.iterdir()) == []
+        assert extraction_io.scratch_bytes_in_use() == 0
+
+    def test_scratch_quota(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(extraction_io, 'SCRATCH_DIR', str(tmp_path))
+        monkeypatch.setattr(extraction_io, 'SCRATCH_QUOTA_MB', 1)
+        with pytest.raises(RuntimeError, match="quota"):
+            with scratch_file(b"x" * (2 * 1024 * 1024)):
+                pass
+        assert extraction_io.scratch_bytes_in_use() == 0
+
+# Testy strumieniowej ekstrakcji arkuszy i CSV
+class TestStreamingSpreadsheets:
+    XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    def make_workbook(self, sheets):
+        import io
+        import openpyxl
+        workbook = openpyxl.Workbook()
+        workbook.remove(workbook.active)
+        for name, rows in sheets.items():
+            sheet = workbook.create_sheet(name)
+            for row in rows:
+                sheet.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        return buffer.getvalue()
+
+    def test_uses_read_only_mode(self, sample_xlsx_content):
+        import openpyxl
+        with patch('openpyxl.load_workbook', wraps=openpyxl.load_workbook) as mock_load:
+            safe_extract_text_from_excel(sample_xlsx_content, self.XLSX)
+            assert mock_load.call_args.kwargs['read_only'] is True
+
+    def test_row_limit_records_truncation(self):
+        content = self.make_workbook({
+            'First': [[f"row {i}", i] for i in range(20)],
+            'Second': [["never read"]],
+        })
+        result = safe_extract_text_from_excel(content, self.XLSX, limits={'max_rows': 5})
+        assert "row 4 | 4" in result
+        assert "row 5 | 5" not in result
+        assert "[Truncated: sheet 'First' at row 6 (row limit)]" in result
+        assert "never read" not in result
+        assert "'Second'" in result
+
+    def test_character_and_column_limits(self):
+        content = self.make_workbook({'Wide': [list(range(10)) for _ in range(50)]})
+        result = safe_extract_text_from_excel(content, self.XLSX, limits={'max_columns': 3, 'max_chars': 100})
+        assert "0 | 1 | 2" in result
+        assert "3" not in result.split("\n")[1]
+        assert "(character limit)" in result
+
+    def test_csv_with_semicolons(self):
+        content = "name;city\nAnna;Kraków\nJan;Gdańsk\n".encode('utf-8')
+        result = safe_extract_text_from_csv(content)
+        assert "name | city" in result
+        assert "Anna | Kraków" in result
+
+    def test_csv_upload_is_processed(self):
+        content = base64.b64encode(b"a,b\n1,2\n3,4\n").decode()
+        result = process_uploaded_file_data(content, "data.csv")
+        assert "1 | 2" in result["text"]
+
+
+class TestStreamingExtraction:
+    def make_pdf(self, pages):
+        import fitz
+        doc = fitz.open()
+        for i in range(pages):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Page number {i + 1} " + "lorem ipsum " * 10)
+        content = doc.tobytes()
+        doc.close()
+        return content
+
+    def test_pdf_yields_pages_in_order(self):
+        fragments = list(iter_extract_text_from_pdf(self.make_pdf(3)))
+        assert [(f.unit, f.index) for f in fragments] == [('page', 1), ('page', 2), ('page', 3)]
+        assert "Page number 2" in fragments[1].text
+
+    def test_budget_stops_pdf_parsing_early(self):
+        pulled = []
+
+        def tracking(fragments):
+            for fragment in fragments:
+                pulled.append(fragment.index)
+                yield fragment
+
+        collected, truncated = consume_fragments(tracking(iter_extract_text_from_pdf(self.make_pdf(20))), max_chars=200)
+        assert truncated is True
+        assert sum(len(f.text) for f in collected) == 200
+        assert len(pulled) < 20
+
+    def test_powerpoint_yields_slides(self):
+        import io
+        from pptx import Presentation
+        prs = Presentation()
+        for i in range(2):
+            slide = prs.slides.add_slide(prs.slide_layouts[5])
+            slide.shapes.title.text = f"Title {i + 1}"
+        buffer = io.BytesIO()
+        prs.save(buffer)
+
+        fragments = list(iter_extract_text_from_powerpoint(buffer.getvalue()))
+        assert [f.index for f in fragments] == [1, 2]
+        assert fragments[1].text == "Slide 2:\nTitle 2"
+
+    def test_epub_yields_chapters(self, sample_epub_content):
+        fragments = list(iter_extract_text_from_epub(sample_epub_content))
+        units = [f.unit for f in fragments]
+        assert units[:2] == ['metadata', 'toc']
+        titles = [f.title for f in fragments if f.unit == 'chapter']
+        assert [t for t in titles if t.startswith('Chapter')] == ['Chapter 1', 'Chapter 2', 'Chapter 3']
+
+    def test_upload_respects_character_budget(self):
+        content = base64.b64encode(b"abcdefghij" * 100).decode()
+        result = process_uploaded_file_data(content, "long.txt", max_chars=50)
+        assert result["truncated"] is True
+        assert result["text"].startswith("abcdefghij" * 5)
+        assert "[Truncated: extraction stopped at 50 characters]" in result["text"]
+
+    def test_upload_without_budget_is_complete(self):
+        content = base64.b64encode(b"abcdefghij" * 100).decode()
+        result = process_uploaded_file_data(content, "long.txt", max_chars=None)
+        assert len(result["text"]) == 1000
+        assert "truncated" not in result
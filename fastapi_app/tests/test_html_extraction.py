@@ -0,0 +1,106 @@
+"""
+Test cases for the lxml HTML extraction engine.
+"""
+
+import base64
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import html_extraction
+from app.utils.epub_pipeline import read_epub_package
+from app.utils.file_processor import (
+    safe_extract_text_from_html,
+    safe_extract_text_from_epub,
+    process_uploaded_file_data,
+)
+
+PAGE = (
+    b"<html><head><title>Page</title><style>p { color: red }</style></head><body>"
+    b"<nav class='menu'><a href='/'>Home</a> | <a href='/about'>About</a></nav>"
+    b"<div id='cookie-banner'>We use cookies</div>"
+    b"<article><header><h1>Main  title</h1></header>"
+    b"<p>First <b>bold</b> paragraph.</p><p>Second&nbsp;paragraph<br>next line</p></article>"
+    b"<aside>Related links</aside><footer>Copyright</footer>"
+    b"<script>var tracking = true;</script></body></html>"
+)
+
+
+class TestLxmlEngine:
+    def test_strips_boilerplate(self):
+        text = html_extraction.extract_text(PAGE)
+        assert text == "Main title\nFirst bold paragraph.\nSecond paragraph\nnext line"
+
+    def test_keeps_everything_but_scripts_without_stripping(self):
+        text = html_extraction.extract_text(PAGE, remove_boilerplate=False)
+        assert "Home | About" in text
+        assert "We use cookies" in text
+        assert "Copyright" in text
+        assert "tracking" not in text
+        assert "color: red" not in text
+
+    def test_empty_document_raises(self):
+        with pytest.raises(ValueError):
+            html_extraction.extract_text(b"   ")
+
+    def test_find_heading(self):
+        root = html_extraction.parse_html(b"<div><p>intro</p><h2> Chapter  One </h2></div>")
+        assert html_extraction.find_heading(root) == "Chapter One"
+
+
+class TestParserSelection:
+    def test_lxml_is_default(self):
+        with patch('app.utils.html_extraction.extract_text', wraps=html_extraction.extract_text) as mock_extract:
+            safe_extract_text_from_html(PAGE)
+            assert mock_extract.called
+
+    def test_html5lib_on_request(self):
+        with patch('app.utils.html_extraction.extract_text') as mock_extract:
+            text = safe_extract_text_from_html(PAGE, {'parser': 'html5lib', 'preserve_links': True})
+            assert not mock_extract.called
+            assert "Home" in text
+
+    def test_falls_back_to_html5lib(self):
+        with patch('app.utils.html_extraction.extract_text', side_effect=ValueError("broken")):
+            text = safe_extract_text_from_html(PAGE)
+            assert "First" in text
+
+    def test_unknown_parser_rejected(self):
+        content = base64.b64encode(PAGE).decode()
+        with pytest.raises(ValueError, match="Unsupported HTML parser"):
+            process_uploaded_file_data(content, "page.html", html_parser="regex")
+
+    def test_epub_chapters_parsed_once(self, sample_epub_content):
+        documents = len(read_epub_package(sample_epub_content).chapters)
+
+        with patch('app.utils.html_extraction.parse_html', wraps=html_extraction.parse_html) as mock_parse:
+            text = safe_extract_text_from_epub(sample_epub_content, {'preserve_chapters': True})
+            assert mock_parse.call_count == documents
+        assert "## Chapter 2" in text
+        assert "Content of chapter 2." in text
+
+
+class TestLxmlRobustness:
+    def test_utf8_without_meta_charset(self):
+        html = "<html><body><p>Zażółć gęślą jaźń – café</p></body></html>".encode('utf-8')
+        assert html_extraction.extract_text(html) == "Zażółć gęślą jaźń – café"
+
+    def test_declared_single_byte_charset(self):
+        html = "<html><head><meta charset='windows-1250'></head><body><p>Łódź</p></body></html>".encode('cp1250')
+        assert html_extraction.extract_text(html) == "Łódź"
+
+    def test_hyphenated_classes_keep_content(self):
+        html = (
+            b"<html><body><header><h1>Site title</h1><a href='/'>Home</a></header>"
+            b"<div class='container has-sidebar'><div class='post has-comments'><p>Body text.</p></div>"
+            b"<div class='sidebar-left'>Links</div></div></body></html>"
+        )
+        assert html_extraction.extract_text(html) == "Site title\nBody text."
+
+    def test_main_content_is_never_dropped(self):
+        html = b"<html><body><div class='header'><main><p>Inside main.</p></main></div></body></html>"
+        assert html_extraction.extract_text(html) == "Inside main."
+
+    def test_falls_back_to_unstripped_text(self):
+        html = b"<html><body><div class='menu'><p>Everything is in here.</p></div></body></html>"
+        assert "Everything is in here." in html_extraction.extract_text(html)
@@ -0,0 +1,87 @@
+"""
+Test cases for OCR image pre-processing.
+"""
+
+import pytest
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.utils.image_preprocessing import (
+    preprocess_image_for_ocr,
+    otsu_threshold,
+    estimate_skew_angle,
+    is_bimodal,
+)
+
+
+def make_page(width: int = 1200, height: int = 1600, dpi: int = 300) -> Image.Image:
+    """Creates a white RGB page with a block of dark 'text' lines in the middle."""
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(height // 3, 2 * height // 3, 40):
+        draw.rectangle([width // 4, y, 3 * width // 4, y + 12], fill=(20, 20, 20))
+    image.info['dpi'] = (dpi, dpi)
+    return image
+
+
+class TestOtsuThreshold:
+    def test_bimodal_threshold_separates_ink(self):
+        gray = np.array([10] * 100 + [240] * 900, dtype=np.uint8)
+        threshold = otsu_threshold(gray)
+        assert 10 <= threshold < 240
+
+    def test_blank_page(self):
+        gray = np.full((10, 10), 255, dtype=np.uint8)
+        assert otsu_threshold(gray) < 255
+
+
+class TestPreprocessing:
+    def test_downscales_oversized_photo(self):
+        image = make_page(4000, 3000, dpi=300)
+        result = preprocess_image_for_ocr(image, {'crop_margins': False, 'max_pixels': 3_000_000})
+        assert result.width * result.height <= 3_000_000
+        assert result.mode == 'L'
+
+    def test_dpi_normalization(self):
+        image = make_page(1200, 1600, dpi=600)
+        result = preprocess_image_for_ocr(image, {'crop_margins': False, 'binarize': False})
+        assert result.size == (600, 800)
+        assert result.info['dpi'] == (300, 300)
+
+    def test_binarize_and_crop_margins(self):
+        image = make_page()
+        result = preprocess_image_for_ocr(image)
+        values = set(np.unique(np.asarray(result)).tolist())
+        assert values <= {0, 255}
+        assert result.width < image.width
+        assert result.height < image.height
+
+    def test_blank_page_is_not_cropped_away(self):
+        image = Image.new("RGB", (200, 100), "white")
+        result = preprocess_image_for_ocr(image)
+        assert result.size == (200, 100)
+
+    def test_disabled(self):
+        image = make_page()
+        assert preprocess_image_for_ocr(image, {'enabled': False}) is image
+
+    def test_deskew_estimates_rotation(self):
+        image = make_page(800, 800).convert('L').rotate(3, fillcolor=255, expand=True)
+        ink = np.asarray(image) < 128
+        assert estimate_skew_angle(ink) == pytest.approx(-3, abs=1.0)
+
+    def test_photo_is_neither_binarized_nor_cropped(self):
+        # Shaded background: a horizontal light gradient under the text block
+        page = np.asarray(make_page(600, 800).convert('L'), dtype=np.float64)
+        shading = np.linspace(90, 0, page.shape[1])[None, :]
+        photo = Image.fromarray(np.clip(page - shading, 0, 255).astype(np.uint8))
+        photo.info['dpi'] = (300, 300)
+        assert not is_bimodal(np.asarray(photo), otsu_threshold(np.asarray(photo)))
+        result = preprocess_image_for_ocr(photo)
+        assert result.size == photo.size
+        assert len(np.unique(np.asarray(result))) > 2
+
+    def test_forced_binarization(self):
+        photo = Image.new("L", (100, 100), 128)
+        result = preprocess_image_for_ocr(photo, {'binarize': True, 'crop_margins': False, 'target_dpi': None})
+        assert set(np.unique(np.asarray(result)).tolist()) <= {0, 255}
@@ -0,0 +1,139 @@
+"""
+Test cases for clamd malware scanning, against a stub clamd speaking the INSTREAM protocol.
+"""
+
+import base64
+import socket
+import socketserver
+import struct
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.utils import file_processor, malware_scan
+from app.utils.malware_scan import ClamdClient, MalwareDetected, MalwareScanError, MalwareScanner
+
+EICAR = b"X5O!P%@AP[4\\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*"
+
+
+class StubClamdHandler(socketserver.BaseRequestHandler):
+    def read_command(self, buffer: bytearray) -> bytes:
+        while b'\0' not in buffer:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                raise ConnectionError
+            buffer += chunk
+        command, _, rest = bytes(buffer).partition(b'\0')
+        buffer[:] = rest
+        return command
+
+    def read_exactly(self, buffer: bytearray, size: int) -> bytes:
+        while len(buffer) < size:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                raise ConnectionError
+            buffer += chunk
+        data = bytes(buffer[:size])
+        del buffer[:size]
+        return data
+
+    def handle(self):
+        self.server.connections += 1
+        buffer = bytearray()
+        number = 0
+        try:
+            while True:
+                command = self.read_command(buffer)
+                if command == b'zIDSESSION':
+                    continue
+                if command == b'zEND':
+                    return
+                assert command == b'zINSTREAM'
+                data = bytearray()
+                while True:
+                    (size,) = struct.unpack('!L', self.read_exactly(buffer, 4))
+                    if not size:
+                        break
+                    data += self.read_exactly(buffer, size)
+                number += 1
+                self.server.scans += 1
+                verdict = b'stream: Eicar-Test-Signature FOUND' if EICAR in data else b'stream: OK'
+                self.request.sendall(f"{number}: ".encode() + verdict + b'\0')
+        except ConnectionError:
+            return
+
+
+class StubClamd(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubClamdHandler)
+        self.connections = 0
+        self.scans = 0
+
+
+@pytest.fixture
+def clamd():
+    server = StubClamd()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def scanner(clamd):
+    client = ClamdClient(host='127.0.0.1', port=clamd.server_address[1])
+    yield MalwareScanner(client)
+    client.close()
+
+
+class TestMalwareScanner:
+    def test_clean_and_infected(self, scanner):
+        assert scanner.scan(b"hello world").clean
+        verdict = scanner.scan(b"prefix " + EICAR)
+        assert not verdict.clean and verdict.signature == 'Eicar-Test-Signature'
+        with pytest.raises(MalwareDetected, match="Eicar-Test-Signature"):
+            scanner.check(EICAR)
+
+    def test_large_content_is_streamed_in_chunks(self, scanner, monkeypatch):
+        monkeypatch.setattr(malware_scan, "CLAMD_CHUNK_BYTES", 1024)
+        assert not scanner.scan(b"x" * 10000 + EICAR).clean
+
+    def test_verdicts_are_cached_by_content(self, scanner, clamd):
+        scanner.scan(b"same bytes")
+        verdict = scanner.scan(b"same bytes")
+        assert verdict.cached and clamd.scans == 1
+
+    def test_connection_is_reused(self, scanner, clamd):
+        scanner.scan(b"first")
+        scanner.scan(b"second")
+        assert clamd.scans == 2 and clamd.connections == 1
+
+    def test_unavailable_clamd(self):
+        with socket.socket() as unused:
+            unused.bind(('127.0.0.1', 0))
+            port = unused.getsockname()[1]
+        closed = MalwareScanner(ClamdClient(host='127.0.0.1', port=port))
+        with pytest.raises(MalwareScanError):
+            closed.scan(b"data")
+        assert MalwareScanner(ClamdClient(host='127.0.0.1', port=port), fail_open=True).scan(b"data").clean
+
+
+class TestScanDuringExtraction:
+    def test_infected_upload_is_rejected(self, client: TestClient, scanner, monkeypatch):
+        monkeypatch.setattr(file_processor, "get_malware_scanner", lambda: scanner)
+        content = base64.b64encode(b"plain text " + EICAR).decode()
+        response = client.post("/api/v1/process_file", json={"filename": "a.txt", "file_data_base64": content})
+        assert response.status_code == 400
+        assert "Eicar-Test-Signature" in response.json()["detail"]
+
+    def test_clean_upload_passes(self, client: TestClient, scanner, monkeypatch):
+        monkeypatch.setattr(file_processor, "get_malware_scanner", lambda: scanner)
+        content = base64.b64encode(b"just some plain text").decode()
+        response = client.post("/api/v1/process_file", json={"filename": "a.txt", "file_data_base64": content})
+        assert response.status_code == 200
+        assert response.json()["content"] == "just some plain text"
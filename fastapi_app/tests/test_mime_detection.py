@@ -0,0 +1,55 @@
+"""
+Test cases for bounded-prefix MIME detection.
+"""
+
+import io
+import threading
+import zipfile
+
+from app.utils import mime_detection
+from app.utils.mime_detection import detect_mime_type, inspect_zip_container, sniff_mime_type
+
+XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def make_zip(members, first=None) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        if first:
+            archive.writestr(zipfile.ZipInfo(first[0]), first[1]) # Stored, as EPUB/ODF require
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class TestMimeDetection:
+    def test_xlsx_cut_by_prefix_is_resolved_from_container(self, sample_xlsx_content, monkeypatch):
+        monkeypatch.setattr(mime_detection, 'MIME_SNIFF_BYTES', 512)
+        assert sniff_mime_type(sample_xlsx_content) == 'application/zip'
+        assert detect_mime_type(sample_xlsx_content) == XLSX
+
+    def test_epub(self, sample_epub_content):
+        assert detect_mime_type(sample_epub_content, 'book.epub') == 'application/epub+zip'
+
+    def test_container_parts(self):
+        docx = make_zip({'[Content_Types].xml': '<Types/>', 'word/document.xml': '<w/>'})
+        odt = make_zip({'content.xml': '<x/>'}, first=('mimetype', 'application/vnd.oasis.opendocument.text'))
+        assert inspect_zip_container(docx).endswith('wordprocessingml.document')
+        assert inspect_zip_container(odt) == 'application/vnd.oasis.opendocument.text'
+
+    def test_plain_zip_stays_zip(self):
+        assert detect_mime_type(make_zip({'a.txt': 'hello'})) == 'application/zip'
+        assert inspect_zip_container(b'PK\x03\x04 truncated') is None
+
+    def test_csv_by_extension(self):
+        assert detect_mime_type(b'a,b\n1,2\n', 'data.csv') == 'text/csv'
+        assert detect_mime_type(b'a,b\n1,2\n', 'data.txt') == 'text/plain'
+
+    def test_handle_is_per_thread(self):
+        handles = []
+        mime_detection._magic_handle()
+        thread = threading.Thread(target=lambda: handles.append(mime_detection._magic_handle()))
+        thread.start()
+        thread.join()
+        assert handles[0] is not mime_detection._magic_handle()
+        assert mime_detection._magic_handle() is mime_detection._magic_handle()
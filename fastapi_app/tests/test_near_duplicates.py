@@ -0,0 +1,108 @@
+"""
+Test cases for near-duplicate paragraph and page furniture elimination.
+"""
+
+from app.models import schemas
+from app.services.pipeline_service import prepare_documents_content
+from app.utils.extraction_stream import TextFragment
+from app.utils.near_duplicates import SimHashIndex, deduplicate_documents, simhash, strip_page_furniture
+from app.utils.structured_text import StructuredText
+
+PARAGRAPHS = [
+    "The committee approved the new budget for the coming year after a long debate about infrastructure spending.",
+    "Funding for public transport will increase by ten percent, while road maintenance keeps its current allocation.",
+    "The opposition argued that the plan underestimates the cost of renovating the old bridges in the northern district.",
+]
+
+
+class TestSimHash:
+    def test_near_duplicates_have_close_hashes(self):
+        text = " ".join(PARAGRAPHS[:2]) * 2
+        original = simhash(text)
+        edited = simhash(text.replace("long debate", "lengthy debate", 1))
+        unrelated = simhash(PARAGRAPHS[2])
+        assert bin(original ^ edited).count('1') < bin(original ^ unrelated).count('1')
+
+        index = SimHashIndex()
+        index.add(original, "a.pdf")
+        assert index.find(edited) == "a.pdf"
+        assert index.find(unrelated) is None
+
+
+def paged(pages):
+    """StructuredText with one 'page' span per page text."""
+    return StructuredText.from_fragments([TextFragment(text, 'page', number) for number, text in enumerate(pages, 1)])
+
+
+class TestPageFurniture:
+    def test_repeated_headers_and_page_numbers(self):
+        bodies = ["Revenue grew.", "Costs fell.", "Staff doubled.", "Outlook is stable."]
+        pages = [f"ACME Annual Report\n{body}\nPage {n} of 4" for n, body in enumerate(bodies, 1)]
+        text, removed = strip_page_furniture(paged(pages))
+        assert removed == 8
+        assert "ACME" not in text and "Page 2 of 4" not in text
+        assert "Staff doubled." in text
+
+    def test_text_without_pages_is_unchanged(self):
+        text = "ACME Annual Report\nRevenue grew.\n\n" * 4
+        assert strip_page_furniture(StructuredText(text)) == (text, 0)
+
+    def test_tables_are_not_furniture(self):
+        table = "| Name | Value |\n| --- | --- |\n| b{n} | {n} |\n| c{n} | {n}0 |"
+        sheets = [table.format(n=n) for n in range(1, 5)]
+        structured = StructuredText.from_fragments([TextFragment(text, 'sheet', n) for n, text in enumerate(sheets, 1)])
+        assert strip_page_furniture(structured)[1] == 0
+        assert strip_page_furniture(paged(sheets)) == ("\n\n".join(sheets), 0)
+
+
+class TestDeduplicateDocuments:
+    def test_versions_of_the_same_document(self):
+        first = "\n\n".join(PARAGRAPHS)
+        second = "\n\n".join([PARAGRAPHS[0] + " ", PARAGRAPHS[1].upper(), PARAGRAPHS[2]])
+        third = "\n\n".join([PARAGRAPHS[0], "A completely new closing paragraph that only appears in the third revision of the text."])
+        texts, report = deduplicate_documents(["v1.pdf", "v2.pdf", "v3.pdf"], [first, second, third])
+        assert texts[0] == first
+        assert texts[1] == "[Duplicate of v1.pdf, omitted]"
+        assert texts[2].startswith("[Repeated passage omitted, see v1.pdf]") and "third revision" in texts[2]
+        assert report.removed_paragraphs == 4 and report.duplicate_documents == 1
+        assert report.removed_chars > 300 and report.removed_tokens > 75
+
+    def test_versions_differing_in_figures_are_kept(self):
+        clause = (
+            "The Contractor shall deliver the works within {days} days of signing. The total price is {price} PLN net, "
+            "payable in three instalments after acceptance of each stage by the Employer. For each day of delay the "
+            "Contractor shall pay a contractual penalty of {penalty}% of the total price, capped at ten percent of it."
+        )
+        v1 = clause.format(days=90, price=250000, penalty="0.1")
+        v2 = clause.format(days=120, price=310000, penalty="0.5")
+        texts, report = deduplicate_documents(["contract_v1.pdf", "contract_v2.pdf"], [v1, v2])
+        assert texts == [v1, v2]
+        assert report.removed_paragraphs == 0 and report.duplicate_documents == 0
+
+        # Close enough for the SimHash index, still kept because a figure or a negation differs
+        for variant in (v1.replace("0.1%", "0.5%"), v1.replace("shall pay", "shall not pay")):
+            assert deduplicate_documents(["a", "b"], [v1, variant])[0][1] == variant
+
+    def test_wording_variant_becomes_a_diff(self):
+        text = " ".join(PARAGRAPHS[:2]) * 2
+        variant = text.replace("long debate", "lengthy debate", 1)
+        texts, report = deduplicate_documents(["v1.pdf", "v2.pdf"], [text, variant])
+        assert texts[1] == '[Variant of a passage in v1.pdf: "long" -> "lengthy"]'
+        assert report.removed_paragraphs == 1 and report.duplicate_documents == 0
+
+    def test_furniture_is_located_by_page_spans(self):
+        pages = [f"ACME Annual Report\n{paragraph}\nPage {n} of 3" for n, paragraph in enumerate(PARAGRAPHS, 1)]
+        structured = paged(pages)
+        texts, report = deduplicate_documents(["report.pdf"], [structured.text], spans=[structured.spans_to_dict()])
+        assert "ACME" not in texts[0] and PARAGRAPHS[2] in texts[0]
+        assert report.removed_furniture_lines == 6
+
+    def test_pipeline_reports_removed_content(self):
+        documents = [
+            schemas.DocumentInput(name="a.txt", content="\n\n".join(PARAGRAPHS), size=1),
+            schemas.DocumentInput(name="b.txt", content="\n\n".join(PARAGRAPHS), size=1),
+        ]
+        content, report = prepare_documents_content(documents)
+        assert content.count("committee approved") == 1
+        assert "--- START Document: b.txt ---\n[Duplicate of a.txt, omitted]" in content
+        assert report.duplicate_documents == 1
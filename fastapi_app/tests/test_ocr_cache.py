@@ -0,0 +1,73 @@
+"""
+Test cases for the on-disk OCR result cache.
+"""
+
+import io
+import os
+import pytest
+from unittest.mock import patch
+from PIL import Image, ImageDraw
+
+from app.utils import ocr_cache
+from app.utils.ocr_cache import OCRCache
+from app.utils.file_processor import safe_extract_text_from_image
+
+
+def make_image_bytes(label: str = "A") -> bytes:
+    image = Image.new("RGB", (300, 120), "white")
+    ImageDraw.Draw(image).text((20, 40), label * 10, fill="black")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Process-wide OCR cache redirected to a temporary directory."""
+    instance = OCRCache(str(tmp_path), max_bytes=1024 * 1024)
+    monkeypatch.setattr(ocr_cache, "_ocr_cache", instance)
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_ENABLED", True)
+    return instance
+
+
+class TestOCRCache:
+    def test_put_and_get(self, cache):
+        cache.put("ab" * 32, "cached text")
+        assert cache.get("ab" * 32) == "cached text"
+        assert cache.get("cd" * 32) is None
+
+    def test_key_depends_on_pixels_and_languages(self):
+        first = Image.new("L", (10, 10), 255)
+        second = Image.new("L", (10, 10), 0)
+        assert OCRCache.make_key(first, "eng") == OCRCache.make_key(first.copy(), "eng")
+        assert OCRCache.make_key(first, "eng") != OCRCache.make_key(second, "eng")
+        assert OCRCache.make_key(first, "eng") != OCRCache.make_key(first, "eng+pol")
+
+    def test_eviction_removes_least_recently_used(self, tmp_path):
+        small_cache = OCRCache(str(tmp_path), max_bytes=250)
+        for i, key in enumerate(["aa" * 32, "bb" * 32, "cc" * 32]):
+            small_cache.put(key, "x" * 100)
+            path = small_cache._path_for(key)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        freed = small_cache.evict()
+        assert freed >= 100
+        assert small_cache.get("aa" * 32) is None
+        assert small_cache.get("cc" * 32) == "x" * 100
+
+
+class TestOCRCacheIntegration:
+    def test_repeated_image_hits_cache(self, cache):
+        content = make_image_bytes()
+        with patch('pytesseract.image_to_string') as mock_ocr:
+            mock_ocr.return_value = "Scanned letterhead"
+            assert safe_extract_text_from_image(content) == "Scanned letterhead"
+            assert safe_extract_text_from_image(content) == "Scanned letterhead"
+            assert mock_ocr.call_count == 1
+
+    def test_different_images_miss(self, cache):
+        with patch('pytesseract.image_to_string') as mock_ocr:
+            mock_ocr.return_value = "text"
+            safe_extract_text_from_image(make_image_bytes("A"))
+            safe_extract_text_from_image(make_image_bytes("B"))
+            assert mock_ocr.call_count == 2
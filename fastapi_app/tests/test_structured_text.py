@@ -0,0 +1,63 @@
+"""
+Test cases for structured extraction results (text plus document unit spans).
+"""
+
+import base64
+import json
+
+import pytest
+
+from app.utils.extraction_stream import TextFragment
+from app.utils.structured_text import StructuredText
+from app.utils.file_processor import process_uploaded_file_data
+
+FRAGMENTS = [
+    TextFragment("Metadata: book", 'metadata', 1),
+    TextFragment("# Part one\nintro\n## Section\nbody\n# Part two\nend", 'chapter', 1, 'Part one'),
+    TextFragment("Plain chapter", 'chapter', 2),
+]
+
+
+class TestStructuredText:
+    def test_offsets_match_joined_text(self):
+        structured = StructuredText.from_fragments(FRAGMENTS)
+        assert structured.text == '\n\n'.join(fragment.text for fragment in FRAGMENTS)
+        chapters = list(structured.iter_units('chapter'))
+        assert [text for _, text in chapters] == [FRAGMENTS[1].text, FRAGMENTS[2].text]
+        assert chapters[0][0].title == 'Part one'
+
+    def test_heading_sections_nest(self):
+        structured = StructuredText.from_fragments(FRAGMENTS)
+        headings = {span.title: structured.text[span.start:span.end] for span, _ in structured.iter_units('heading')}
+        assert headings['Part one'] == "# Part one\nintro\n## Section\nbody\n"
+        assert headings['Section'] == "## Section\nbody\n"
+        assert headings['Part two'] == "# Part two\nend"
+
+    def test_spans_at_offset(self):
+        structured = StructuredText.from_fragments(FRAGMENTS)
+        offset = structured.text.index('body')
+        assert [(span.unit, span.title) for span in structured.spans_at(offset)] == [
+            ('chapter', 'Part one'), ('heading', 'Part one'), ('heading', 'Section')
+        ]
+
+    def test_round_trip(self):
+        structured = StructuredText.from_fragments(FRAGMENTS)
+        restored = StructuredText.from_dict(json.loads(json.dumps(structured.to_dict())))
+        assert restored.text == structured.text
+        assert list(restored) == list(structured)
+
+    def test_inconsistent_columns_rejected(self):
+        with pytest.raises(ValueError):
+            StructuredText.from_dict({'text': '', 'spans': {'units': ['page'], 'unit': [0], 'index': [], 'start': [0], 'end': [1], 'title': [None]}})
+
+    def test_spans_must_be_ordered(self):
+        structured = StructuredText('abc')
+        structured.add_span('page', 1, 2, 3)
+        with pytest.raises(ValueError):
+            structured.add_span('page', 2, 0, 1)
+
+    def test_upload_result_has_spans(self, sample_epub_content):
+        result = process_uploaded_file_data(base64.b64encode(sample_epub_content).decode(), "book.epub")
+        spans = StructuredText.from_dict({'text': result['text'], 'spans': result['spans']})
+        chapter_texts = [text for _, text in spans.iter_units('chapter')]
+        assert any('Content of chapter 2.' in text for text in chapter_texts)
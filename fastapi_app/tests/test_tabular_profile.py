@@ -0,0 +1,109 @@
+"""
+Test cases for NumPy-backed tabular summaries.
+"""
+
+import base64
+import pytest
+
+from app.utils import tabular_profile
+from app.utils.tabular_profile import load_table, profile_column, render_profile, query_table, TableStore
+from app.utils.file_processor import process_uploaded_file_data
+
+
+ROWS = [
+    ["city", "price", "qty"],
+    ["Kraków", "10.5", "1"],
+    ["Gdańsk", "20", "2"],
+    ["Kraków", "", "3"],
+    ["Warszawa", "40", "4"],
+]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    instance = TableStore(max_tables=2)
+    monkeypatch.setattr(tabular_profile, "table_store", instance)
+    return instance
+
+
+class TestLoadTable:
+    def test_column_types(self):
+        table = load_table("CSV", ROWS)
+        assert table.columns == ["city", "price", "qty"]
+        assert table.kinds == {"city": "categorical", "price": "numeric", "qty": "numeric"}
+        assert table.row_count == 4
+
+    def test_numeric_profile(self):
+        table = load_table("CSV", ROWS)
+        profile = profile_column(table, "price")
+        assert profile["count"] == 3
+        assert profile["missing"] == 1
+        assert profile["min"] == 10.5
+        assert profile["max"] == 40
+        assert profile["median"] == 20
+
+    def test_categorical_profile(self):
+        table = load_table("CSV", ROWS)
+        profile = profile_column(table, "city")
+        assert profile["distinct"] == 3
+        assert profile["top"][0] == ("Kraków", 2)
+
+    def test_row_and_cell_limits(self, monkeypatch):
+        monkeypatch.setattr(tabular_profile, "TABLE_MAX_CELLS", 9)
+        table = load_table("CSV", ROWS)
+        assert table.row_count == 3 and table.truncated
+        assert "3 rows x 3 columns, truncated" in render_profile(table)
+
+        monkeypatch.setattr(tabular_profile, "TABLE_MAX_ROWS", 2)
+        assert load_table("CSV", ROWS).row_count == 2
+
+    def test_empty_rows_return_none(self):
+        assert load_table("CSV", [[None, ""], []]) is None
+
+
+class TestQueryTable:
+    def test_filters_and_columns(self, store):
+        table = load_table("CSV", ROWS)
+        table_id = store.add(table, "digest")
+        result = query_table(table_id, columns=["city"], filters=[{"column": "price", "op": ">=", "value": 20}])
+        assert result["total_matches"] == 2
+        assert result["rows"] == [["Gdańsk"], ["Warszawa"]]
+
+    def test_contains_filter(self, store):
+        table_id = store.add(load_table("CSV", ROWS), "digest")
+        result = query_table(table_id, filters=[{"column": "city", "op": "contains", "value": "kra"}])
+        assert result["total_matches"] == 2
+
+    def test_unknown_table_and_column(self, store):
+        with pytest.raises(ValueError):
+            query_table("missing")
+        table_id = store.add(load_table("CSV", ROWS), "digest")
+        with pytest.raises(ValueError):
+            query_table(table_id, columns=["nope"])
+
+    def test_store_evicts_oldest(self, store):
+        ids = [store.add(load_table(f"T{i}", ROWS), "digest") for i in range(3)]
+        assert store.get(ids[0]) is None
+        assert store.get(ids[2]) is not None
+
+
+class TestSummaryMode:
+    def test_csv_summary_keeps_prompt_small(self, store):
+        rows = "value,label\n" + "".join(f"{i},{'ab'[i % 2]}\n" for i in range(5000))
+        content = base64.b64encode(rows.encode()).decode()
+        result = process_uploaded_file_data(content, "big.csv", tabular_mode="summary")
+        assert "value (numeric)" in result["text"]
+        assert "max=4999" in result["text"]
+        assert len(result["text"]) < 1000
+        assert store.get(result["tables"][0]).row_count == 5000
+
+    def test_render_profile_lists_samples(self):
+        table = load_table("CSV", ROWS)
+        table.table_id = "abc"
+        text = render_profile(table)
+        assert "Sample rows (4 of 4):" in text
+        assert "city | price | qty" in text
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            process_uploaded_file_data("", "x.csv", tabular_mode="everything")
@@ -0,0 +1,69 @@
+"""
+Test cases for whitespace and boilerplate compaction of document text before prompting.
+"""
+
+from app.models import schemas
+from app.services.pipeline_service import prepare_documents_content
+from app.utils.text_compaction import CompactionCache, compact_text
+
+
+class TestCompactText:
+    def test_whitespace_and_hyphenation(self):
+        text = "Title  here\r\n\n\n\nThe infor-\nmation was  collected\tby Jean-\nPaul.   \n​"
+        assert compact_text(text) == "Title here\n\nThe information was collected by Jean-\nPaul."
+
+    def test_boilerplate_lines_are_dropped(self):
+        text = "\n".join([
+            "Skip to content", "Menu", "Log in",
+            "",
+            "Quarterly results improved.",
+            "Page 2 of 9",
+            "- 3 -",
+            "",
+            "* * *",
+            "© 2024 ACME Corp. All rights reserved.",
+            "Privacy policy",
+        ])
+        assert compact_text(text) == "Quarterly results improved."
+
+    def test_copyright_footers_only(self):
+        clauses = "The Licensee agrees that:\n(a) fees are due monthly;\n(b) support ends in 2026;\n(c) the Licensee shall not sublicense the software;\n(d) disputes go to court."
+        assert compact_text(clauses) == clauses
+        prose = "Copyright law in Poland protects this work for 70 years."
+        assert compact_text(prose) == prose
+        footers = "Body.\n\nCopyright 2024 ACME Corp.\n(c) 2023 Example Ltd\nACME Corp. All rights reserved."
+        assert compact_text(footers) == "Body."
+
+    def test_content_is_kept(self):
+        text = "| year | revenue |\n|---|---|\n| 2023 | 12 |\n\nCells:\n2023\n2024\nTotal\n\n    def main():\n        return 0"
+        assert compact_text(text) == text
+
+    def test_page_numbers_at_paragraph_edges(self):
+        text = "12\nFirst page text.\n\nSecond page text.\n13\n\n2023\n\nThird page text.\n14"
+        assert compact_text(text) == "First page text.\n\nSecond page text.\n\n2023\n\nThird page text."
+
+    def test_year_headings_are_not_page_numbers(self):
+        text = "2023\n\nRevenue grew.\n\n2024\n\nRevenue fell.\n\n7\n\nNotes follow."
+        assert compact_text(text) == text
+
+    def test_navigation_words_in_prose(self):
+        text = "Press the button labelled\nNext\nto continue, then\nClose\nthe dialog.\n\nSearch\n\nResults are listed below."
+        assert compact_text(text) == text
+        assert compact_text("Home\nSearch\nLog in\nMenu\n\nBody text.") == "Body text."
+
+    def test_code_and_json_are_kept(self):
+        json_text = '{\n  "items": [\n    {"id": 1},\n    {"id": 2}\n  ],\n  "next": null\n}'
+        assert compact_text(json_text) == json_text
+        code = "Example:\n\n```python\nif  x:\n    y = 1\n\n\n\n# -----\n---\nprint('Page 2 of 9')\n```\n\nDone."
+        assert compact_text(code) == code
+        assert compact_text("a\n\n-->\n\n=>\n\n<>\n\nb") == "a\n\n-->\n\n=>\n\n<>\n\nb"
+
+
+class TestCompactionInPipeline:
+    def test_documents_are_compacted_once(self, monkeypatch):
+        cache = CompactionCache()
+        monkeypatch.setattr("app.services.pipeline_service.compaction_cache", cache)
+        documents = [schemas.DocumentInput(name="a.html", content="Skip to content\nMenu\n\n\n\nBody   text.\n\nBack to top", size=1)]
+        content, _ = prepare_documents_content(documents)
+        assert "--- START Document: a.html ---\nBody text.\n--- END Document ---" in content
+        assert cache.compact(documents[0].content) is cache.compact(documents[0].content)
@@ -0,0 +1,64 @@
+"""
+Test cases for text encoding detection and incremental decoding.
+"""
+
+import codecs
+
+import pytest
+
+from app.utils import text_encoding
+from app.utils.text_encoding import decode_text, detect_encoding
+from app.utils.file_processor import safe_extract_text_from_txt, safe_extract_text_from_csv
+
+POLISH = "Zażółć gęślą jaźń. Łódź i Świętokrzyskie, źdźbło trawy."
+FRENCH = "Le garçon a mangé à la fenêtre, très élégant, où être."
+
+
+class TestEncodingDetection:
+    @pytest.mark.parametrize("encoding", ['cp1250', 'iso-8859-2'])
+    def test_central_european_code_pages(self, encoding):
+        assert detect_encoding(POLISH.encode(encoding)) == encoding
+
+    def test_western_code_page(self):
+        assert detect_encoding(FRENCH.encode('cp1252')) == 'cp1252'
+
+    def test_utf8_and_ascii(self):
+        assert detect_encoding(POLISH.encode('utf-8')) == 'utf-8'
+        assert detect_encoding(b'plain ascii') == 'utf-8'
+
+    def test_boms(self):
+        assert detect_encoding(codecs.BOM_UTF8 + b'abc') == 'utf-8-sig'
+        assert detect_encoding(POLISH.encode('utf-16')) == 'utf-16'
+
+    def test_bomless_utf16(self):
+        assert detect_encoding(POLISH.encode('utf-16-le')) == 'utf-16-le'
+
+    def test_multibyte_sequence_cut_by_sample_is_still_utf8(self):
+        data = 'ż'.encode('utf-8') * 100
+        assert detect_encoding(data, sample_size=51) == 'utf-8'
+
+
+class TestDecoding:
+    def test_decodes_across_chunks(self, monkeypatch):
+        monkeypatch.setattr(text_encoding, 'DECODE_CHUNK_BYTES', 7)
+        data = (POLISH * 3).encode('utf-8')
+        assert decode_text(data).text == POLISH * 3
+
+    def test_falls_back_when_utf8_breaks_after_the_sample(self):
+        data = b'a' * (text_encoding.ENCODING_SAMPLE_BYTES + 10) + POLISH.encode('cp1250')
+        decoded = decode_text(data)
+        assert decoded.encoding == 'cp1250'
+        assert decoded.text.endswith(POLISH)
+
+    def test_max_chars_stops_early(self, monkeypatch):
+        monkeypatch.setattr(text_encoding, 'DECODE_CHUNK_BYTES', 16)
+        decoded = decode_text(b'x' * 1000, max_chars=40)
+        assert 40 < len(decoded.text) < 1000
+
+    def test_txt_extraction_keeps_polish_letters(self):
+        assert safe_extract_text_from_txt(POLISH.encode('cp1250')) == POLISH
+
+    def test_csv_in_cp1250(self):
+        data = "miasto;opis\nŁódź;źdźbło\n".encode('cp1250')
+        text = safe_extract_text_from_csv(data)
+        assert 'Łódź' in text and 'źdźbło' in text
@@ -0,0 +1,69 @@
+"""
+Test cases for streaming XML extraction.
+"""
+
+import base64
+
+import pytest
+
+from app.utils import xml_stream
+from app.utils.xml_stream import iter_xml_records
+from app.utils.file_processor import safe_extract_text_from_xml, process_uploaded_file_data
+
+CATALOG = (
+    b'<?xml version="1.0"?>'
+    b'<catalog xmlns="urn:example"><meta><generated>2024-01-01</generated></meta>'
+    b'<book id="b1"><title>Pan Tadeusz</title><author><name>Adam Mickiewicz</name></author></book>'
+    b'<book id="b2"><title>Lalka</title><author><name>Boleslaw Prus</name></author></book>'
+    b'</catalog>'
+)
+
+
+def make_large_xml(records: int) -> bytes:
+    rows = b''.join(b'<row n="%d"><value>%s</value></row>' % (i, b'x' * 50) for i in range(records))
+    return b'<?xml version="1.0"?><export>' + rows + b'</export>'
+
+
+class TestXMLStreaming:
+    def test_root_children_are_default_records(self):
+        records = list(iter_xml_records(CATALOG))
+        assert [r.title for r in records] == ['meta', 'book b1', 'book b2']
+        assert records[1].text == "book id=b1\n  title: Pan Tadeusz\n  author/name: Adam Mickiewicz"
+
+    def test_tag_filter(self):
+        records = list(iter_xml_records(CATALOG, tags=['name']))
+        assert [r.text for r in records] == ["name\n  Adam Mickiewicz", "name\n  Boleslaw Prus"]
+
+    def test_path_filters(self):
+        assert len(list(iter_xml_records(CATALOG, path='/catalog/book'))) == 2
+        assert len(list(iter_xml_records(CATALOG, path='/book'))) == 0
+        assert len(list(iter_xml_records(CATALOG, path='author/name'))) == 2
+
+    def test_unsupported_path(self):
+        with pytest.raises(ValueError):
+            list(iter_xml_records(CATALOG, path='//book[1]'))
+
+    def test_character_budget_stops_parsing(self):
+        records = list(iter_xml_records(make_large_xml(10000), max_chars=500))
+        assert sum(len(r.text) for r in records) == 500
+        assert len(records) < 20
+
+    def test_malformed_xml(self):
+        with pytest.raises(ValueError, match="Malformed XML"):
+            list(iter_xml_records(b'<root><unclosed></root>'))
+
+    def test_entities_are_not_expanded(self):
+        content = b'<!DOCTYPE r [<!ENTITY e "expanded">]><r><item>&e;</item></r>'
+        records = list(iter_xml_records(content))
+        assert "expanded" not in records[0].text
+
+    def test_streaming_option(self):
+        result = safe_extract_text_from_xml(CATALOG, {'streaming': True, 'record_tags': ['title']})
+        assert result == "title\n  Pan Tadeusz\n\ntitle\n  Lalka"
+
+    def test_large_upload_is_streamed(self, monkeypatch):
+        monkeypatch.setattr(xml_stream, 'XML_STREAM_THRESHOLD_BYTES', 1000)
+        content = base64.b64encode(make_large_xml(5000)).decode()
+        result = process_uploaded_file_data(content, "export.xml", max_chars=1000)
+        assert result["text"].startswith('row n=0\n  value: ')
+        assert result["truncated"] is True
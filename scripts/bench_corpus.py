@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Deterministic benchmark corpus shared by the bench_* scripts.
+
+Generates documents shaped like real uploads instead of the tiny test fixtures:
+saved news and wiki pages (navigation, cookie banners, share widgets, scripts,
+tables, footers around a long article) and text extracted from multi-page PDF
+reports (running headers, page numbers, hyphenated line breaks, tables). The
+same seed always yields the same corpus, so numbers are comparable between runs.
+
+Write the corpus to disk to inspect it or to benchmark other tools on it:
+    python scripts/bench_corpus.py /tmp/bench_corpus
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+DEFAULT_SEED = 2024
+
+WORDS = (
+    "the committee budget transport bridge district council report revenue growth costs staff market "
+    "analysis customer contract delivery quarter forecast energy prices investment policy households "
+    "regional survey respondents increase decrease average median sample methodology results project "
+    "infrastructure maintenance schedule supplier invoice agreement penalty acceptance stage period "
+    "performance network service capacity demand supply inflation interest rate loan credit savings"
+).split()
+POLISH_WORDS = "zażółć gęślą jaźń rada miasta budżet transport mieszkańcy raport przychody koszty".split()
+NAV_ITEMS = ["Home", "News", "World", "Business", "Technology", "Science", "Health", "Sport", "Culture", "Opinion"]
+
+
+def _sentence(rng: random.Random, words=WORDS) -> str:
+    chosen = [rng.choice(words) for _ in range(rng.randint(8, 22))]
+    if rng.random() < 0.3:
+        chosen.insert(rng.randrange(len(chosen)), f"{rng.randint(2, 980)}{rng.choice(['', '%', ' PLN', ' EUR'])}")
+    return " ".join(chosen).capitalize() + "."
+
+
+def _paragraph(rng: random.Random, words=WORDS) -> str:
+    return " ".join(_sentence(rng, words) for _ in range(rng.randint(3, 7)))
+
+
+def _html_table(rng: random.Random) -> str:
+    rows = "".join(
+        f"<tr><td>{rng.choice(WORDS)}</td><td>{rng.randint(10, 9999)}</td><td>{rng.uniform(-9, 9):.1f}%</td></tr>"
+        for _ in range(rng.randint(5, 25))
+    )
+    return f"<table class='wikitable'><thead><tr><th>Item</th><th>Value</th><th>Change</th></tr></thead><tbody>{rows}</tbody></table>"
+
+
+def generate_html_page(rng: random.Random, paragraphs: int) -> str:
+    """One saved article page: chrome around the content, roughly 20-150 KB."""
+    nav = "".join(f"<li class='nav-item'><a href='/{item.lower()}'>{item}</a></li>" for item in NAV_ITEMS)
+    script = "<script>window.dataLayer=window.dataLayer||[];" + "function t(e){return e}" * rng.randint(50, 200) + "</script>"
+    body = []
+    for number in range(paragraphs):
+        if number and number % 8 == 0:
+            body.append(f"<h2 id='s{number}'>{_sentence(rng)[:-1]}</h2>")
+        if number and number % 13 == 0:
+            body.append(_html_table(rng))
+        words = POLISH_WORDS + WORDS if rng.random() < 0.1 else WORDS
+        text = _paragraph(rng, words).replace(" council ", " <a href='/council'>council</a> ").replace(" report ", " <b>report</b> ")
+        body.append(f"<p>{text}</p>")
+    related = "".join(f"<li><a href='/a/{rng.randint(1000, 9999)}'>{_sentence(rng)}</a></li>" for _ in range(8))
+    return (
+        "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'><title>Article</title>"
+        f"<style>body{{font-family:sans-serif}}</style>{script}</head><body>"
+        f"<div id='cookie-banner' class='cookie-banner'>We use cookies to improve your experience. <button>Accept all</button></div>"
+        f"<header class='site-header'><a class='logo' href='/'>Daily Gazette</a><nav class='menu'><ul>{nav}</ul></nav></header>"
+        f"<div class='container has-sidebar'><main><article><header><h1>{_sentence(rng)[:-1]}</h1>"
+        f"<p class='byline'>By staff reporter</p></header>{''.join(body)}"
+        "<div class='share'><a href='#'>Facebook</a> <a href='#'>Twitter</a> <a href='#'>Email</a></div></article></main>"
+        f"<aside class='sidebar'><h3>Related</h3><ul>{related}</ul><div class='ad'>Advertisement</div></aside></div>"
+        "<footer class='site-footer'><p>© 2024 Daily Gazette. All rights reserved.</p>"
+        "<a href='/privacy'>Privacy policy</a> <a href='/terms'>Terms of use</a></footer>"
+        f"{script}</body></html>"
+    )
+
+
+def generate_report_text(rng: random.Random, pages: int) -> str:
+    """Text of a PDF report as the extractor returns it: one block per page."""
+    title = f"ACME Group Annual Report {rng.randint(2015, 2024)}"
+    blocks = []
+    for page in range(1, pages + 1):
+        lines = [title, ""]
+        for _ in range(rng.randint(2, 4)):
+            text = _paragraph(rng)
+            # Justified PDF text: fixed-width lines, some words hyphenated across them
+            line, wrapped = "", []
+            for word in text.split():
+                if len(line) + len(word) > 78:
+                    if len(word) > 7 and rng.random() < 0.3:
+                        wrapped.append(f"{line} {word[:4]}-".strip())
+                        line = word[4:]
+                        continue
+                    wrapped.append(line.strip())
+                    line = ""
+                line += " " + word
+            wrapped.append(line.strip())
+            lines.extend(wrapped + [""])
+        if page % 4 == 0:
+            lines += ["| Segment | Revenue | Change |", "| --- | --- | --- |"]
+            lines += [f"| {rng.choice(WORDS)} | {rng.randint(100, 9999)} | {rng.uniform(-9, 9):.1f}% |" for _ in range(6)]
+            lines.append("")
+        lines.append(f"Page {page} of {pages}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def generate_corpus(seed: int = DEFAULT_SEED) -> List[Tuple[str, bytes]]:
+    """(file name, content) pairs: 6 web pages and 4 extracted PDF reports."""
+    rng = random.Random(seed)
+    files = [(f"page_{n}.html", generate_html_page(rng, rng.randint(20, 120)).encode("utf-8")) for n in range(1, 7)]
+    files += [(f"report_{n}.txt", generate_report_text(rng, rng.randint(8, 40)).encode("utf-8")) for n in range(1, 5)]
+    return files
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write the generated benchmark corpus to a directory")
+    parser.add_argument("output", type=Path, help="Target directory")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+    args.output.mkdir(parents=True, exist_ok=True)
+    files = generate_corpus(args.seed)
+    for name, content in files:
+        (args.output / name).write_bytes(content)
+    print(f"Wrote {len(files)} files to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
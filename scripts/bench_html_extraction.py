@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML extraction engines on a corpus of saved web pages.
+
+Compares the html5lib path (BeautifulSoup + html5lib) with the lxml engine
+(with and without boilerplate stripping) and reports time per page, output
+size and speedup.
+
+By default it runs on the generated article pages from bench_corpus.py (20-150 KB
+each, with navigation, cookie banners, scripts, tables and footers around the
+text), so results are reproducible. Numbers for real traffic need a directory of
+saved pages passed with --corpus, e.g.:
+    mkdir -p /tmp/html_corpus && cd /tmp/html_corpus
+    wget -q -O wiki.html https://en.wikipedia.org/wiki/Optical_character_recognition
+    wget -q -O news.html https://www.bbc.com/news
+
+Usage:
+    python scripts/bench_html_extraction.py
+    python scripts/bench_html_extraction.py --corpus /tmp/html_corpus --repeat 10
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "fastapi_app"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.utils.file_processor import safe_extract_text_from_html  # noqa: E402
+from bench_corpus import DEFAULT_SEED, generate_corpus  # noqa: E402
+
+ENGINES = {
+    "html5lib": {"parser": "html5lib", "preserve_links": True},
+    "lxml": {"parser": "lxml", "preserve_links": True, "strip_boilerplate": False},
+    "lxml+boilerplate": {"parser": "lxml", "preserve_links": True, "strip_boilerplate": True},
+}
+
+
+def time_engine(pages, options, repeat):
+    """Returns (median seconds per pass over the corpus, total output characters)."""
+    timings = []
+    chars = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chars = sum(len(safe_extract_text_from_html(content, options)) for content in pages)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), chars
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction engines")
+    parser.add_argument("--corpus", type=Path, help="Directory with .html/.htm files (default: generated pages)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed of the generated corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the corpus per engine")
+    args = parser.parse_args()
+
+    if args.corpus:
+        files = sorted(p for p in args.corpus.rglob("*") if p.suffix.lower() in (".html", ".htm", ".xhtml"))
+        pages = [f.read_bytes() for f in files]
+        source = str(args.corpus)
+    else:
+        pages = [content for name, content in generate_corpus(args.seed) if name.endswith(".html")]
+        source = f"generated corpus (seed {args.seed})"
+    if not pages:
+        print(f"No HTML files found in {args.corpus}")
+        return 1
+    total_kb = sum(len(p) for p in pages) / 1024
+    print(f"Corpus: {len(pages)} pages, {total_kb:.0f} KB from {source}\n")
+
+    results = {name: time_engine(pages, options, args.repeat) for name, options in ENGINES.items()}
+    baseline = results["html5lib"][0]
+
+    print(f"{'engine':<18} {'ms/page':>9} {'MB/s':>8} {'chars':>10} {'speedup':>8}")
+    for name, (seconds, chars) in results.items():
+        per_page_ms = seconds / len(pages) * 1000
+        throughput = total_kb / 1024 / seconds if seconds else float("inf")
+        print(f"{name:<18} {per_page_ms:9.2f} {throughput:8.2f} {chars:10d} {baseline / seconds:7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
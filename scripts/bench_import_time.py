@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Measure the import time and memory cost of backend modules.
+
+Runs `python -X importtime` in a fresh interpreter so results are not skewed by
+modules already loaded, then prints the cumulative import time of the target,
+the heaviest modules it pulls in and the peak resident memory after import.
+
+Usage:
+    python scripts/bench_import_time.py
+    python scripts/bench_import_time.py --module app.main --top 20
+    python scripts/bench_import_time.py --max-ms 150   # exit 1 if slower (CI guard)
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "fastapi_app"
+
+RSS_SNIPPET = (
+    "import importlib, json, resource, sys;"
+    "importlib.import_module(sys.argv[1]);"
+    "print(json.dumps({'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,"
+    " 'modules': len(sys.modules)}))"
+)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Parse `-X importtime` output into {module: (self_us, cumulative_us)}."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            timings[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return timings
+
+
+def measure_once(module: str) -> dict:
+    """Import the module in a fresh interpreter and collect timings and memory."""
+    timing_run = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if timing_run.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{timing_run.stderr[-2000:]}")
+
+    memory_run = subprocess.run(
+        [sys.executable, "-c", RSS_SNIPPET, module],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return {
+        "timings": parse_importtime(timing_run.stderr),
+        **json.loads(memory_run.stdout),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark backend import time")
+    parser.add_argument("--module", default="app.utils.file_processor", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh-interpreter runs")
+    parser.add_argument("--top", type=int, default=10, help="Number of heaviest modules to list")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if the median import time exceeds this")
+    args = parser.parse_args()
+
+    runs = [measure_once(args.module) for _ in range(args.runs)]
+    totals_ms = [run["timings"].get(args.module, (0, 0))[1] / 1000 for run in runs]
+    median_ms = statistics.median(totals_ms)
+
+    print(f"Module:            {args.module}")
+    print(f"Import time:       median {median_ms:.1f} ms (min {min(totals_ms):.1f}, max {max(totals_ms):.1f}, {args.runs} runs)")
+    print(f"Peak RSS:          {statistics.median(run['max_rss_kb'] for run in runs) / 1024:.1f} MB")
+    print(f"Modules loaded:    {runs[-1]['modules']}")
+
+    print(f"\nTop {args.top} modules by self time (last run):")
+    heaviest = sorted(runs[-1]["timings"].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in heaviest:
+        print(f"  {self_us / 1000:8.1f} ms self  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"\nFAIL: import time {median_ms:.1f} ms exceeds the {args.max_ms:.1f} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())